@@ -0,0 +1,138 @@
+# assets.py
+"""
+Caricamento pigro delle immagini della GUI con cache delle versioni scalate.
+
+Nessuna immagine viene decodificata all'import: un file PNG (config.IMAGE_PATHS
+per i fogli dei personaggi, config.BACKGROUND_PATHS per gli sfondi) viene
+letto al primo uso e convertito una sola volta nel formato del display
+(convert_alpha() per i fogli con trasparenza, convert() per gli sfondi).
+Le versioni scalate (sfondo alla dimensione del pannello, frame di uno
+sprite alla dimensione dell'icona) sono tenute in cache per dimensione:
+dopo un VIDEORESIZE on_resize() le scarta e ogni immagine viene
+riscalata una volta sola, al primo ridisegno.
+Solo gui.py importa questo modulo: headless ed ensemble non caricano
+immagini.
+"""
+import os
+import zlib
+
+import pygame
+
+import config
+import data
+import simlog
+
+log = simlog.get("assets")
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def asset_path(path):
+    """Percorsi relativi risolti rispetto alla cartella del progetto (non alla cwd)."""
+    return path if os.path.isabs(path) else os.path.join(_BASE_DIR, path)
+
+
+def candidate_sprite_name(candidate):
+    """Sprite di SPRITE_MAPPING per il candidato: scelta stabile per genere e nome."""
+    gender = candidate.get('gender')
+    options = sorted(name for name in data.SPRITE_MAPPING
+                     if gender in ("male", "female") and name.startswith(f"{gender}_"))
+    if not options:
+        return "default_standing"
+    return options[zlib.crc32(str(candidate.get('name', '')).encode("utf-8")) % len(options)]
+
+
+class AssetManager:
+    """Immagini caricate al primo uso e versioni scalate in cache (vedi docstring del modulo)."""
+
+    def __init__(self, image_paths=None, background_paths=None, sprite_mapping=None,
+                 frame_size=None):
+        self.image_paths = dict(config.IMAGE_PATHS if image_paths is None else image_paths)
+        self.background_paths = dict(config.BACKGROUND_PATHS if background_paths is None
+                                     else background_paths)
+        self.sprite_mapping = data.SPRITE_MAPPING if sprite_mapping is None else sprite_mapping
+        self.frame_size = frame_size or config.SPRITE_SHEET_FRAME_SIZE
+        self._images = {}   # (tipo, chiave) -> Surface convertita (None se mancante)
+        self._scaled = {}   # (tipo, chiave, dimensione, tinta) -> Surface scalata
+        self.loads = 0
+        self.rescales = 0
+
+    def _load(self, kind, key, paths, alpha):
+        cache_key = (kind, key)
+        if cache_key in self._images:
+            return self._images[cache_key]
+        image = None
+        path = paths.get(key)
+        if path is None:
+            if log.warning:
+                log.write(f"Warning: no image path configured for {kind} '{key}'.", simlog.WARNING)
+        else:
+            try:
+                image = pygame.image.load(asset_path(path))
+                if pygame.display.get_surface() is not None:
+                    image = image.convert_alpha() if alpha else image.convert()
+                self.loads += 1
+            except (pygame.error, FileNotFoundError) as e_load:
+                if log.warning:
+                    log.write(f"Warning: could not load {kind} '{key}' from {path}: {e_load}", simlog.WARNING)
+                image = None
+        self._images[cache_key] = image  # Anche i mancanti: niente nuovi tentativi a ogni frame
+        return image
+
+    def sheet(self, key):
+        return self._load("sheet", key, self.image_paths, alpha=True)
+
+    def _sprite_frame(self, sprite_name):
+        sheet_key, row, col = self.sprite_mapping.get(
+            sprite_name, self.sprite_mapping["default_standing"])
+        sheet = self.sheet(sheet_key)
+        if sheet is None:
+            return None
+        frame = pygame.Rect(col * self.frame_size, row * self.frame_size,
+                            self.frame_size, self.frame_size)
+        if not sheet.get_rect().contains(frame):
+            if log.warning:
+                log.write(f"Warning: sprite '{sprite_name}' outside sheet '{sheet_key}'.", simlog.WARNING)
+            return None
+        return sheet.subsurface(frame)
+
+    def _cached_scale(self, cache_key, source, size, tint=None):
+        scaled = self._scaled.get(cache_key)
+        if scaled is None and source is not None:
+            try:
+                scaled = pygame.transform.smoothscale(source, size)
+            except ValueError:  # pragma: no cover # Superfici non a 24/32 bit
+                scaled = pygame.transform.scale(source, size)
+            if tint is not None:
+                overlay = pygame.Surface(size, pygame.SRCALPHA)
+                overlay.fill(tint)
+                scaled.blit(overlay, (0, 0))
+            self._scaled[cache_key] = scaled
+            self.rescales += 1
+        return scaled
+
+    def sprite(self, sprite_name, size):
+        """Frame dello sprite scalato a `size` (None se il foglio non è disponibile)."""
+        size = (max(1, int(size[0])), max(1, int(size[1])))
+        cache_key = ("sprite", sprite_name, size, None)
+        if cache_key in self._scaled:
+            return self._scaled[cache_key]
+        return self._cached_scale(cache_key, self._sprite_frame(sprite_name), size)
+
+    def background(self, key, size, tint=None):
+        """Sfondo scalato a `size`, con tinta RGBA opzionale applicata una volta sola."""
+        size = (max(1, int(size[0])), max(1, int(size[1])))
+        tint = tuple(tint) if tint is not None else None
+        cache_key = ("background", key, size, tint)
+        if cache_key in self._scaled:
+            return self._scaled[cache_key]
+        source = self._load("background", key, self.background_paths, alpha=False)
+        return self._cached_scale(cache_key, source, size, tint)
+
+    def on_resize(self):
+        """Scarta le versioni scalate (le immagini originali restano caricate)."""
+        self._scaled.clear()
+
+    def clear(self):
+        self._images.clear()
+        self._scaled.clear()
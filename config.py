@@ -1,5 +1,18 @@
 # config.py
+"""
+Parametri della simulazione.
+
+I parametri del modello vivono in un SimulationConfig immutabile, costruito
+da un seed più eventuali override (SimulationConfig.from_seed) e passato
+esplicitamente a election, voting e generation (argomento `sim_config`):
+più parametrizzazioni diverse possono girare nello stesso processo o pool,
+e a parità di seed i parametri sono identici.
+I nomi maiuscoli a livello di modulo sono lo specchio (in sola lettura) di
+DEFAULT_CONFIG, usato quando non viene passata una configurazione.
+"""
+import dataclasses
 import random
+from typing import NamedTuple
 
 # ==============================================================================
 # --- CORE SIMULATION SETUP ---
@@ -7,193 +20,338 @@ import random
 _min_grand_electors = 100
 _max_grand_electors = 240
 TARGET_DIVISOR_ELECTORS = 12
-_raw_grand_electors = random.randint(_min_grand_electors, _max_grand_electors)
-if _raw_grand_electors % TARGET_DIVISOR_ELECTORS != 0:
-    increased_electors = (_raw_grand_electors // TARGET_DIVISOR_ELECTORS +
-                          1) * TARGET_DIVISOR_ELECTORS
-    decreased_electors = (_raw_grand_electors //
-                          TARGET_DIVISOR_ELECTORS) * TARGET_DIVISOR_ELECTORS
-    if decreased_electors < _min_grand_electors:
-        NUM_GRAND_ELECTORS = increased_electors
+
+
+def _round_grand_electors(raw_grand_electors):
+    """Arrotonda al multiplo di TARGET_DIVISOR_ELECTORS più vicino (non sotto il minimo)."""
+    if raw_grand_electors % TARGET_DIVISOR_ELECTORS != 0:
+        increased_electors = (raw_grand_electors // TARGET_DIVISOR_ELECTORS +
+                              1) * TARGET_DIVISOR_ELECTORS
+        decreased_electors = (raw_grand_electors //
+                              TARGET_DIVISOR_ELECTORS) * TARGET_DIVISOR_ELECTORS
+        if decreased_electors < _min_grand_electors:
+            num_grand_electors = increased_electors
+        else:
+            num_grand_electors = decreased_electors if (
+                raw_grand_electors - decreased_electors) <= (
+                    increased_electors -
+                    raw_grand_electors) else increased_electors
     else:
-        NUM_GRAND_ELECTORS = decreased_electors if (
-            _raw_grand_electors - decreased_electors) <= (
-                increased_electors -
-                _raw_grand_electors) else increased_electors
-else:
-    NUM_GRAND_ELECTORS = _raw_grand_electors
-if NUM_GRAND_ELECTORS < _min_grand_electors:
-    NUM_GRAND_ELECTORS = (
-        (_min_grand_electors + TARGET_DIVISOR_ELECTORS - 1) //
-        TARGET_DIVISOR_ELECTORS) * TARGET_DIVISOR_ELECTORS
-MAX_ELECTION_ATTEMPTS = 6
+        num_grand_electors = raw_grand_electors
+    if num_grand_electors < _min_grand_electors:
+        num_grand_electors = (
+            (_min_grand_electors + TARGET_DIVISOR_ELECTORS - 1) //
+            TARGET_DIVISOR_ELECTORS) * TARGET_DIVISOR_ELECTORS
+    return num_grand_electors
 
-# ==============================================================================
-# --- CANDIDATE PROPERTIES & GENERATION ---
-# ==============================================================================
-CANDIDATE_AGE_RANGE = (20, 45)
-ATTRIBUTE_RANGE = (1, 5)
-PARTY_IDS = ["Reds", "Blues", "Greens", "Golds", "Independent"]
-PARTY_ID_ASSIGNMENT_WEIGHTS = [0.25, 0.25, 0.15, 0.15, 0.20]
-INITIAL_CAMPAIGN_BUDGET = random.randint(700, 1500)
-NUM_PRESELECTED_CANDIDATES = 0
-PRESELECTED_CANDIDATE_BOOST = random.uniform(4.0, 6.0)
-RUNOFF_CARRYOVER_LEANING_BONUS = random.uniform(1.5, 2.5)
 
-# ==============================================================================
-# --- ELECTOR/CITIZEN PROPERTIES & AI ---
-# ==============================================================================
-MIN_ELECTOR_AGE = 20
-ELECTOR_IDEAL_PREFERENCE_RANGE = (1, 5)
-ELECTOR_ATTRIBUTE_WEIGHT_RANGE = (0, 7)
-ELECTOR_ATTRIBUTE_MISMATCH_PENALTY_FACTOR = random.uniform(0.3, 0.7)
-MAX_ELECTOR_LEANING_BASE = random.randint(8, 12)
-ELECTOR_RANDOM_LEANING_VARIANCE = random.uniform(0.5, 1.5)
-# ELECTOR_MOMENTUM_FACTOR = random.uniform(0.1, 0.25) # Apparentemente non usato
-IDENTITY_WEIGHT_RANGE = (0.1, 0.8)
-IDENTITY_MATCH_BONUS_FACTOR = 0.6
-ELECTOR_TRAITS = [
-    "Loyal", "Pragmatic", "Idealistic", "Swing Voter", "Risk-Averse",
-    "Easily Influenced", "Bandwagoner", "Contrarian", "AntiEstablishment",
-    "CharismaFocused", "Underdog Supporter", "Confirmation Prone",
-    "Motivated Reasoner", "Strong Partisan"
-]
-ELECTOR_TRAIT_COUNT = random.randint(1, 6)
-ELECTOR_SUSCEPTIBILITY_BASE = random.uniform(0.4, 0.6)
-INFLUENCE_TRAIT_MULTIPLIER_EASILY_INFLUENCED = random.uniform(1.8, 2.5)
-INFLUENCE_TRAIT_MULTIPLIER_LOYAL = random.uniform(0.3, 0.6)
-STRATEGIC_VOTING_START_ROUND = random.randint(2, 5)
-UNLIKELY_TO_WIN_THRESHOLD = random.uniform(0.05, 0.15)
-STRATEGIC_VOTING_TRAIT_MULTIPLIER_PRAGMATIC = random.uniform(1.3, 1.7)
-STRATEGIC_VOTING_TRAIT_MULTIPLIER_IDEALISTIC = random.uniform(0.6, 0.9)
-STRATEGIC_VOTING_TRAIT_PENALTY_IDEALISTIC_INTEGRITY = random.uniform(1.8, 2.5)
-STRONGLY_DISLIKED_THRESHOLD_FACTOR = random.uniform(0.2, 0.4)
-ELECTOR_SWING_THRESHOLD = random.uniform(0.5, 1.5)
-BANDWAGON_EFFECT_FACTOR = random.uniform(0.1, 0.25)
-UNDERDOG_EFFECT_FACTOR = random.uniform(0.1, 0.25)
-MAX_BIAS_LEANING_ADJUSTMENT = random.uniform(0.8, 1.8)
-CONFIRMATION_BIAS_FACTOR = random.uniform(1.1, 1.4)
-MOTIVATED_REASONING_FACTOR = random.uniform(0.3, 0.6)
-MEDIA_LITERACY_RANGE = (1, 5)
-MEDIA_LITERACY_EFFECT_FACTOR = random.uniform(0.1, 0.3)
-ELECTOR_LEARNING_RATE = random.uniform(0.01, 0.05)
-CAMPAIGN_EXPOSURE_LEARNING_EFFECT = random.uniform(0.02, 0.08)
-SOCIAL_INFLUENCE_LEARNING_EFFECT = random.uniform(0.01, 0.05)
-# Citizen Params
-CITIZEN_IDEAL_PREFERENCE_RANGE = (1, 5)
-CITIZEN_ATTRIBUTE_MISMATCH_PENALTY_FACTOR = random.uniform(0.6, 0.9)
-MAX_CITIZEN_LEANING_BASE = random.randint(4, 6)
-CITIZEN_RANDOM_LEANING_VARIANCE = random.uniform(0.3, 0.7)
-CITIZEN_TRAITS = ["Attribute Focused", "Random Inclined", "Locally Loyal"]
-CITIZEN_TRAIT_COUNT = 1
-CITIZEN_SUSCEPTIBILITY_BASE = random.uniform(0.7, 0.9)
-CITIZEN_TRAIT_MULTIPLIER_RANDOM_INCLINED = random.uniform(1.3, 1.7)
-CITIZEN_TRAIT_MULTIPLIER_ATTRIBUTE_FOCUSED = 1.0
-CITIZEN_TRAIT_RANDOM_INCLINED_BIAS = random.uniform(0.8, 1.5)
+class MediaOutlet(NamedTuple):
+    """Testata giornalistica (immutabile, così SimulationConfig resta hashable)."""
+    id: str
+    bias_spectrum: float
+    reach: float
+    credibility: float
+    preferred_topics: tuple = ()
 
-# ==============================================================================
-# --- PHASE 1: DISTRICT ELECTIONS ---
-# ==============================================================================
-NUM_DISTRICTS = random.randint(10, max(12, NUM_GRAND_ELECTORS // 6))
-CANDIDATES_PER_DISTRICT = random.randint(10, 20)
-CITIZENS_PER_DISTRICT = random.randint(1000, 10000)
-INFLUENCE_CITIZENS_PER_CANDIDATE = random.randint(
-    30, min(100, CITIZENS_PER_DISTRICT // 10))
 
-# ==============================================================================
-# --- PHASE 2: GOVERNOR ELECTION (COLLEGE) ---
-# ==============================================================================
-MAX_NORMAL_ROUNDS = random.randint(10, 15)
-REQUIRED_MAJORITY = random.uniform(0.6, 0.7)
-REQUIRED_MAJORITY_ATTEMPT_4 = 0.5  # Soglia ridotta per tentativi successivi
-MAX_TOTAL_ROUNDS = MAX_NORMAL_ROUNDS + random.randint(20, 30)
-GOVERNOR_PAUSE_SECONDS = 0.3
+@dataclasses.dataclass(frozen=True, slots=True, kw_only=True)
+class SimulationConfig:
+    """
+    Parametrizzazione completa (immutabile) di una simulazione.
+    I campi senza default sono estratti a caso da from_seed(); `seed` è il
+    seed da cui sono stati estratti (None se costruita a mano).
+    """
+    seed: int | None = None
 
-# ==============================================================================
-# --- CAMPAIGN DYNAMICS ---
-# ==============================================================================
-INFLUENCE_ELECTORS_PER_CANDIDATE = random.randint(
-    max(10, NUM_GRAND_ELECTORS // 10), max(20, NUM_GRAND_ELECTORS // 4))
-# CAMPAIGN_INFLUENCE_CHANCE = random.uniform(0.6, 0.85) # Non più usato direttamente
-INFLUENCE_STRENGTH_FACTOR = random.uniform(0.08, 0.18)
-CAMPAIGN_THEME_BONUS_PER_ATTRIBUTE = random.uniform(0.4, 0.7)
-# Budget Allocation
-_min_alloc = random.randint(1, 10)
-_max_alloc = random.randint(40, 80)
-if _min_alloc > _max_alloc:
-    _min_alloc = _max_alloc - 1 if _max_alloc > 1 else 1
-CAMPAIGN_ALLOCATION_PER_ATTEMPT_RANGE = (_min_alloc, _max_alloc)
-CAMPAIGN_ALLOCATION_INFLUENCE_FACTOR = random.uniform(0.03, 0.08)
-CAMPAIGN_ALLOCATION_SUCCESS_CHANCE_FACTOR = random.uniform(0.003, 0.008)
-MAX_CAMPAIGN_INFLUENCE_PER_ATTEMPT = random.uniform(2.0, 4.0)
-# Rendimenti Decrescenti
-DIMINISHING_RETURNS_EXPONENT_PER_ATTEMPT = random.uniform(0.6, 0.85)
+    # --- CORE SIMULATION SETUP ---
+    NUM_GRAND_ELECTORS: int
+    MAX_ELECTION_ATTEMPTS: int = 6
 
-# ==============================================================================
-# --- COMPETITIVE ADAPTATION (CAMPAIGN AI) ---
-# ==============================================================================
-COMPETITIVE_ADAPTATION_SELF_FOCUS_FACTOR = random.uniform(0.4, 0.7)
-# COMPETITIVE_ADAPTATION_IMPACT = random.uniform(0.3, 0.6) # Non usato direttamente?
-COMPETITIVE_ADAPTATION_TOP_OPPONENTS = 2
-TARGETING_KEY_ELECTOR_BONUS_FACTOR = random.uniform(1.5, 2.5)
+    # --- CANDIDATE PROPERTIES & GENERATION ---
+    CANDIDATE_AGE_RANGE: tuple = (20, 45)
+    ATTRIBUTE_RANGE: tuple = (1, 5)
+    PARTY_IDS: tuple = ("Reds", "Blues", "Greens", "Golds", "Independent")
+    PARTY_ID_ASSIGNMENT_WEIGHTS: tuple = (0.25, 0.25, 0.15, 0.15, 0.20)
+    INITIAL_CAMPAIGN_BUDGET: int
+    NUM_PRESELECTED_CANDIDATES: int = 0
+    PRESELECTED_CANDIDATE_BOOST: float
+    RUNOFF_CARRYOVER_LEANING_BONUS: float
 
-# ==============================================================================
-# --- SOCIAL NETWORK ---
-# ==============================================================================
-USE_SOCIAL_NETWORK = True
-NETWORK_AVG_NEIGHBORS = 6
-NETWORK_REWIRING_PROB = 0.1
-SOCIAL_INFLUENCE_STRENGTH = 0.05
-SOCIAL_INFLUENCE_ITERATIONS = 1
+    # --- ELECTOR/CITIZEN PROPERTIES & AI ---
+    MIN_ELECTOR_AGE: int = 20
+    ELECTOR_IDEAL_PREFERENCE_RANGE: tuple = (1, 5)
+    ELECTOR_ATTRIBUTE_WEIGHT_RANGE: tuple = (0, 7)
+    ELECTOR_ATTRIBUTE_MISMATCH_PENALTY_FACTOR: float
+    MAX_ELECTOR_LEANING_BASE: int
+    ELECTOR_RANDOM_LEANING_VARIANCE: float
+    IDENTITY_WEIGHT_RANGE: tuple = (0.1, 0.8)
+    IDENTITY_MATCH_BONUS_FACTOR: float = 0.6
+    ELECTOR_TRAITS: tuple = (
+        "Loyal", "Pragmatic", "Idealistic", "Swing Voter", "Risk-Averse",
+        "Easily Influenced", "Bandwagoner", "Contrarian", "AntiEstablishment",
+        "CharismaFocused", "Underdog Supporter", "Confirmation Prone",
+        "Motivated Reasoner", "Strong Partisan"
+    )
+    ELECTOR_TRAIT_COUNT: int
+    ELECTOR_SUSCEPTIBILITY_BASE: float
+    INFLUENCE_TRAIT_MULTIPLIER_EASILY_INFLUENCED: float
+    INFLUENCE_TRAIT_MULTIPLIER_LOYAL: float
+    STRATEGIC_VOTING_START_ROUND: int
+    UNLIKELY_TO_WIN_THRESHOLD: float
+    STRATEGIC_VOTING_TRAIT_MULTIPLIER_PRAGMATIC: float
+    STRATEGIC_VOTING_TRAIT_MULTIPLIER_IDEALISTIC: float
+    STRATEGIC_VOTING_TRAIT_PENALTY_IDEALISTIC_INTEGRITY: float
+    STRONGLY_DISLIKED_THRESHOLD_FACTOR: float
+    ELECTOR_SWING_THRESHOLD: float
+    BANDWAGON_EFFECT_FACTOR: float
+    UNDERDOG_EFFECT_FACTOR: float
+    MAX_BIAS_LEANING_ADJUSTMENT: float
+    CONFIRMATION_BIAS_FACTOR: float
+    MOTIVATED_REASONING_FACTOR: float
+    MEDIA_LITERACY_RANGE: tuple = (1, 5)
+    MEDIA_LITERACY_EFFECT_FACTOR: float
+    ELECTOR_LEARNING_RATE: float
+    CAMPAIGN_EXPOSURE_LEARNING_EFFECT: float
+    SOCIAL_INFLUENCE_LEARNING_EFFECT: float
+    # Citizen Params
+    CITIZEN_IDEAL_PREFERENCE_RANGE: tuple = (1, 5)
+    CITIZEN_ATTRIBUTE_MISMATCH_PENALTY_FACTOR: float
+    MAX_CITIZEN_LEANING_BASE: int
+    CITIZEN_RANDOM_LEANING_VARIANCE: float
+    CITIZEN_TRAITS: tuple = ("Attribute Focused", "Random Inclined", "Locally Loyal")
+    CITIZEN_TRAIT_COUNT: int = 1
+    CITIZEN_SUSCEPTIBILITY_BASE: float
+    CITIZEN_TRAIT_MULTIPLIER_RANDOM_INCLINED: float
+    CITIZEN_TRAIT_MULTIPLIER_ATTRIBUTE_FOCUSED: float = 1.0
+    CITIZEN_TRAIT_RANDOM_INCLINED_BIAS: float
 
-# ==============================================================================
-# --- EVENTS ---
-# ==============================================================================
-CURRENT_HOT_TOPIC = None
-EVENT_SCANDAL_PROB_FACTOR_INTEGRITY_DIFF = random.uniform(0.015, 0.035)
-EVENT_SCANDAL_IMPACT = random.uniform(1.0, 3.0)
-EVENT_ETHICS_DEBATE_PROB_FACTOR_INTEGRITY_DIFF = random.uniform(0.008, 0.02)
-EVENT_ETHICS_DEBATE_IMPACT = random.uniform(0.08, 0.15)
-EVENT_ENDORSEMENT_BASE_PROB = 0.05
-EVENT_ENDORSEMENT_IMPACT_RANGE = (0.1, 0.3)
-EVENT_DEBATE_BASE_PROB = 0.08
-EVENT_DEBATE_IMPACT_FACTOR = random.uniform(0.3, 0.8)
-EVENT_DEBATE_NUM_PARTICIPANTS = random.randint(3, 5)
-EVENT_RALLY_BASE_PROB = 0.10
-EVENT_RALLY_IMPACT_FACTOR = random.uniform(0.4, 0.9)
-EVENT_RALLY_BUDGET_COST = random.randint(20, 60)
-EVENT_RALLY_FAVORABLE_THRESHOLD_FACTOR = 0.6
-EVENT_RALLY_OPPOSED_THRESHOLD_FACTOR = 0.3
+    # --- PHASE 1: DISTRICT ELECTIONS ---
+    NUM_DISTRICTS: int
+    CANDIDATES_PER_DISTRICT: int
+    CITIZENS_PER_DISTRICT: int
+    INFLUENCE_CITIZENS_PER_CANDIDATE: int
+
+    # --- PHASE 2: GOVERNOR ELECTION (COLLEGE) ---
+    MAX_NORMAL_ROUNDS: int
+    REQUIRED_MAJORITY: float
+    REQUIRED_MAJORITY_ATTEMPT_4: float = 0.5  # Soglia ridotta per tentativi successivi
+    MAX_TOTAL_ROUNDS: int
+
+    # --- CAMPAIGN DYNAMICS ---
+    INFLUENCE_ELECTORS_PER_CANDIDATE: int
+    INFLUENCE_STRENGTH_FACTOR: float
+    CAMPAIGN_THEME_BONUS_PER_ATTRIBUTE: float
+    CAMPAIGN_ALLOCATION_PER_ATTEMPT_RANGE: tuple
+    CAMPAIGN_ALLOCATION_INFLUENCE_FACTOR: float
+    CAMPAIGN_ALLOCATION_SUCCESS_CHANCE_FACTOR: float
+    MAX_CAMPAIGN_INFLUENCE_PER_ATTEMPT: float
+    DIMINISHING_RETURNS_EXPONENT_PER_ATTEMPT: float
+
+    # --- COMPETITIVE ADAPTATION (CAMPAIGN AI) ---
+    COMPETITIVE_ADAPTATION_SELF_FOCUS_FACTOR: float
+    COMPETITIVE_ADAPTATION_TOP_OPPONENTS: int = 2
+    TARGETING_KEY_ELECTOR_BONUS_FACTOR: float
+
+    # --- SOCIAL NETWORK ---
+    USE_SOCIAL_NETWORK: bool = True
+    NETWORK_AVG_NEIGHBORS: int = 6
+    NETWORK_REWIRING_PROB: float = 0.1
+    SOCIAL_INFLUENCE_STRENGTH: float = 0.05
+    SOCIAL_INFLUENCE_ITERATIONS: int = 1
+
+    # --- EVENTS ---
+    EVENT_SCANDAL_PROB_FACTOR_INTEGRITY_DIFF: float
+    EVENT_SCANDAL_IMPACT: float
+    EVENT_ETHICS_DEBATE_PROB_FACTOR_INTEGRITY_DIFF: float
+    EVENT_ETHICS_DEBATE_IMPACT: float
+    EVENT_ENDORSEMENT_BASE_PROB: float = 0.05
+    EVENT_ENDORSEMENT_IMPACT_RANGE: tuple = (0.1, 0.3)
+    EVENT_DEBATE_BASE_PROB: float = 0.08
+    EVENT_DEBATE_IMPACT_FACTOR: float
+    EVENT_DEBATE_NUM_PARTICIPANTS: int
+    EVENT_RALLY_BASE_PROB: float = 0.10
+    EVENT_RALLY_IMPACT_FACTOR: float
+    EVENT_RALLY_BUDGET_COST: int
+    EVENT_RALLY_FAVORABLE_THRESHOLD_FACTOR: float = 0.6
+    EVENT_RALLY_OPPOSED_THRESHOLD_FACTOR: float = 0.3
+
+    # --- MEDIA ECOSYSTEM ---
+    MEDIA_OUTLETS: tuple
+    # Fattori per calcolo influenza media
+    MEDIA_BIAS_FACTOR: float = 0.6  # Quanto il bias influenza la valutazione (0-1)
+    # Moltiplicatore impatto se bias allineati (Elettore-Fonte)
+    MEDIA_CONFIRMATION_BIAS_FACTOR: float = 1.6
+    # Moltiplicatore impatto se bias opposti (Elettore-Fonte)
+    MEDIA_OPPOSING_BIAS_FACTOR: float = 0.4
+    # Scala impatto base in base a credibilità fonte (0-1)
+    MEDIA_CREDIBILITY_FACTOR: float = 1.0
+    MEDIA_IMPACT_SCALE: float = 0.25  # Fattore scala generale per impatto media sui leanings
+
+    @classmethod
+    def from_seed(cls, seed=None, **overrides):
+        """
+        Estrae i parametri casuali con random.Random(seed) e applica gli override.
+        Senza seed ne viene preso uno dal modulo random (riproducibile via random.seed()).
+        """
+        unknown = set(overrides) - set(cls.parameter_names())
+        if unknown:
+            raise ValueError(f"Unknown simulation parameters: {', '.join(sorted(unknown))}")
+        if seed is None:
+            seed = random.getrandbits(64)
+        params = _draw_parameters(random.Random(seed))
+        params.update(overrides)  # Gli altri parametri restano quelli estratti dal seed
+        return cls(seed=seed, **params)
+
+    @classmethod
+    def parameter_names(cls):
+        return tuple(f.name for f in dataclasses.fields(cls) if f.name != "seed")
+
+    def replace(self, **overrides):
+        """Copia con alcuni parametri sostituiti (i parametri derivati non vengono riestratti)."""
+        unknown = set(overrides) - set(self.parameter_names())
+        if unknown:
+            raise ValueError(f"Unknown simulation parameters: {', '.join(sorted(unknown))}")
+        return dataclasses.replace(self, **overrides)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.parameter_names()}
+
+
+def _draw_parameters(rng):
+    """Estrae i parametri casuali (stesse distribuzioni e stesso ordine di sempre)."""
+    p = {}
+    p["NUM_GRAND_ELECTORS"] = _round_grand_electors(
+        rng.randint(_min_grand_electors, _max_grand_electors))
+    p["INITIAL_CAMPAIGN_BUDGET"] = rng.randint(700, 1500)
+    p["PRESELECTED_CANDIDATE_BOOST"] = rng.uniform(4.0, 6.0)
+    p["RUNOFF_CARRYOVER_LEANING_BONUS"] = rng.uniform(1.5, 2.5)
+
+    p["ELECTOR_ATTRIBUTE_MISMATCH_PENALTY_FACTOR"] = rng.uniform(0.3, 0.7)
+    p["MAX_ELECTOR_LEANING_BASE"] = rng.randint(8, 12)
+    p["ELECTOR_RANDOM_LEANING_VARIANCE"] = rng.uniform(0.5, 1.5)
+    # ELECTOR_MOMENTUM_FACTOR = random.uniform(0.1, 0.25) # Apparentemente non usato
+    p["ELECTOR_TRAIT_COUNT"] = rng.randint(1, 6)
+    p["ELECTOR_SUSCEPTIBILITY_BASE"] = rng.uniform(0.4, 0.6)
+    p["INFLUENCE_TRAIT_MULTIPLIER_EASILY_INFLUENCED"] = rng.uniform(1.8, 2.5)
+    p["INFLUENCE_TRAIT_MULTIPLIER_LOYAL"] = rng.uniform(0.3, 0.6)
+    p["STRATEGIC_VOTING_START_ROUND"] = rng.randint(2, 5)
+    p["UNLIKELY_TO_WIN_THRESHOLD"] = rng.uniform(0.05, 0.15)
+    p["STRATEGIC_VOTING_TRAIT_MULTIPLIER_PRAGMATIC"] = rng.uniform(1.3, 1.7)
+    p["STRATEGIC_VOTING_TRAIT_MULTIPLIER_IDEALISTIC"] = rng.uniform(0.6, 0.9)
+    p["STRATEGIC_VOTING_TRAIT_PENALTY_IDEALISTIC_INTEGRITY"] = rng.uniform(1.8, 2.5)
+    p["STRONGLY_DISLIKED_THRESHOLD_FACTOR"] = rng.uniform(0.2, 0.4)
+    p["ELECTOR_SWING_THRESHOLD"] = rng.uniform(0.5, 1.5)
+    p["BANDWAGON_EFFECT_FACTOR"] = rng.uniform(0.1, 0.25)
+    p["UNDERDOG_EFFECT_FACTOR"] = rng.uniform(0.1, 0.25)
+    p["MAX_BIAS_LEANING_ADJUSTMENT"] = rng.uniform(0.8, 1.8)
+    p["CONFIRMATION_BIAS_FACTOR"] = rng.uniform(1.1, 1.4)
+    p["MOTIVATED_REASONING_FACTOR"] = rng.uniform(0.3, 0.6)
+    p["MEDIA_LITERACY_EFFECT_FACTOR"] = rng.uniform(0.1, 0.3)
+    p["ELECTOR_LEARNING_RATE"] = rng.uniform(0.01, 0.05)
+    p["CAMPAIGN_EXPOSURE_LEARNING_EFFECT"] = rng.uniform(0.02, 0.08)
+    p["SOCIAL_INFLUENCE_LEARNING_EFFECT"] = rng.uniform(0.01, 0.05)
+    p["CITIZEN_ATTRIBUTE_MISMATCH_PENALTY_FACTOR"] = rng.uniform(0.6, 0.9)
+    p["MAX_CITIZEN_LEANING_BASE"] = rng.randint(4, 6)
+    p["CITIZEN_RANDOM_LEANING_VARIANCE"] = rng.uniform(0.3, 0.7)
+    p["CITIZEN_SUSCEPTIBILITY_BASE"] = rng.uniform(0.7, 0.9)
+    p["CITIZEN_TRAIT_MULTIPLIER_RANDOM_INCLINED"] = rng.uniform(1.3, 1.7)
+    p["CITIZEN_TRAIT_RANDOM_INCLINED_BIAS"] = rng.uniform(0.8, 1.5)
+
+    p["NUM_DISTRICTS"] = rng.randint(10, max(12, p["NUM_GRAND_ELECTORS"] // 6))
+    p["CANDIDATES_PER_DISTRICT"] = rng.randint(10, 20)
+    p["CITIZENS_PER_DISTRICT"] = rng.randint(1000, 10000)
+    p["INFLUENCE_CITIZENS_PER_CANDIDATE"] = rng.randint(
+        30, min(100, p["CITIZENS_PER_DISTRICT"] // 10))
+
+    p["MAX_NORMAL_ROUNDS"] = rng.randint(10, 15)
+    p["REQUIRED_MAJORITY"] = rng.uniform(0.6, 0.7)
+    p["MAX_TOTAL_ROUNDS"] = p["MAX_NORMAL_ROUNDS"] + rng.randint(20, 30)
+
+    p["INFLUENCE_ELECTORS_PER_CANDIDATE"] = rng.randint(
+        max(10, p["NUM_GRAND_ELECTORS"] // 10), max(20, p["NUM_GRAND_ELECTORS"] // 4))
+    # CAMPAIGN_INFLUENCE_CHANCE = random.uniform(0.6, 0.85) # Non più usato direttamente
+    p["INFLUENCE_STRENGTH_FACTOR"] = rng.uniform(0.08, 0.18)
+    p["CAMPAIGN_THEME_BONUS_PER_ATTRIBUTE"] = rng.uniform(0.4, 0.7)
+    # Budget Allocation
+    min_alloc = rng.randint(1, 10)
+    max_alloc = rng.randint(40, 80)
+    if min_alloc > max_alloc:
+        min_alloc = max_alloc - 1 if max_alloc > 1 else 1
+    p["CAMPAIGN_ALLOCATION_PER_ATTEMPT_RANGE"] = (min_alloc, max_alloc)
+    p["CAMPAIGN_ALLOCATION_INFLUENCE_FACTOR"] = rng.uniform(0.03, 0.08)
+    p["CAMPAIGN_ALLOCATION_SUCCESS_CHANCE_FACTOR"] = rng.uniform(0.003, 0.008)
+    p["MAX_CAMPAIGN_INFLUENCE_PER_ATTEMPT"] = rng.uniform(2.0, 4.0)
+    # Rendimenti Decrescenti
+    p["DIMINISHING_RETURNS_EXPONENT_PER_ATTEMPT"] = rng.uniform(0.6, 0.85)
+
+    p["COMPETITIVE_ADAPTATION_SELF_FOCUS_FACTOR"] = rng.uniform(0.4, 0.7)
+    # COMPETITIVE_ADAPTATION_IMPACT = random.uniform(0.3, 0.6) # Non usato direttamente?
+    p["TARGETING_KEY_ELECTOR_BONUS_FACTOR"] = rng.uniform(1.5, 2.5)
+
+    p["EVENT_SCANDAL_PROB_FACTOR_INTEGRITY_DIFF"] = rng.uniform(0.015, 0.035)
+    p["EVENT_SCANDAL_IMPACT"] = rng.uniform(1.0, 3.0)
+    p["EVENT_ETHICS_DEBATE_PROB_FACTOR_INTEGRITY_DIFF"] = rng.uniform(0.008, 0.02)
+    p["EVENT_ETHICS_DEBATE_IMPACT"] = rng.uniform(0.08, 0.15)
+    p["EVENT_DEBATE_IMPACT_FACTOR"] = rng.uniform(0.3, 0.8)
+    p["EVENT_DEBATE_NUM_PARTICIPANTS"] = rng.randint(3, 5)
+    p["EVENT_RALLY_IMPACT_FACTOR"] = rng.uniform(0.4, 0.9)
+    p["EVENT_RALLY_BUDGET_COST"] = rng.randint(20, 60)
+
+    p["MEDIA_OUTLETS"] = (
+        MediaOutlet("Progressive Post", bias_spectrum=-0.7, reach=0.35, credibility=0.8,
+                    preferred_topics=("social_vision", "ethical_integrity")),
+        MediaOutlet("Central Times", bias_spectrum=0.0, reach=0.50, credibility=0.9,
+                    preferred_topics=("administrative_experience", "mediation_ability")),
+        MediaOutlet("Conservative Chronicle", bias_spectrum=0.8, reach=0.30, credibility=0.75,
+                    preferred_topics=("administrative_experience", "ethical_integrity")),
+        MediaOutlet("NetFeed Opinion", bias_spectrum=-0.9, reach=0.60, credibility=0.4,  # Esempio più estremo
+                    preferred_topics=()),  # Nessun focus specifico, copre tutto?
+        MediaOutlet("Local Bulletin", bias_spectrum=rng.uniform(-0.2, 0.2), reach=0.20, credibility=0.6,
+                    preferred_topics=("mediation_ability",)),  # Esempio media locale
+    )
+    return p
+
+
+def resolve(sim_config=None):
+    """La configurazione da usare: quella passata oppure DEFAULT_CONFIG."""
+    return sim_config if sim_config is not None else DEFAULT_CONFIG
+
+
+# Configurazione di default (seed dal modulo random) e specchio a livello di modulo
+DEFAULT_CONFIG = SimulationConfig.from_seed()
+globals().update(DEFAULT_CONFIG.as_dict())
 
 # ==============================================================================
-# --- MEDIA ECOSYSTEM ---
+# --- EXECUTION ---
 # ==============================================================================
-MEDIA_OUTLETS = [
-    {"id": "Progressive Post", "bias_spectrum": -0.7, "reach": 0.35, "credibility": 0.8,
-        "preferred_topics": ["social_vision", "ethical_integrity"]},
-    {"id": "Central Times", "bias_spectrum": 0.0, "reach": 0.50, "credibility": 0.9,
-        "preferred_topics": ["administrative_experience", "mediation_ability"]},
-    {"id": "Conservative Chronicle", "bias_spectrum": 0.8, "reach": 0.30, "credibility": 0.75,
-        "preferred_topics": ["administrative_experience", "ethical_integrity"]},
-    {"id": "NetFeed Opinion", "bias_spectrum": -0.9, "reach": 0.60, "credibility": 0.4,  # Esempio più estremo
-        "preferred_topics": []},  # Nessun focus specifico, copre tutto?
-    {"id": "Local Bulletin", "bias_spectrum": random.uniform(-0.2, 0.2), "reach": 0.20, "credibility": 0.6,
-        "preferred_topics": ["mediation_ability"]}  # Esempio media locale
-]
-# Fattori per calcolo influenza media
-MEDIA_BIAS_FACTOR = 0.6  # Quanto il bias influenza la valutazione (0-1)
-# Moltiplicatore impatto se bias allineati (Elettore-Fonte)
-MEDIA_CONFIRMATION_BIAS_FACTOR = 1.6
-# Moltiplicatore impatto se bias opposti (Elettore-Fonte)
-MEDIA_OPPOSING_BIAS_FACTOR = 0.4
-# Scala impatto base in base a credibilità fonte (0-1)
-MEDIA_CREDIBILITY_FACTOR = 1.0
-MEDIA_IMPACT_SCALE = 0.25  # Fattore scala generale per impatto media sui leanings
+# Processi per le elezioni distrettuali (None = automatico, 1 = seriale).
+# In automatico il pool (tutti i core) parte solo se cittadini x candidati x
+# distretti supera DISTRICT_PARALLEL_MIN_WORK: sotto quella soglia l'avvio dei
+# processi 'spawn' costa più del voto stesso.
+DISTRICT_WORKERS = None
+DISTRICT_PARALLEL_MIN_WORK = 20_000_000
+GOVERNOR_PAUSE_SECONDS = 0.3
+# Cartella delle istantanee per round dello stato elettori (snapshots.py); None = disattivate
+SNAPSHOT_DIR = None
+# Log della simulazione (simlog.py): livello (DEBUG, INFO, WARNING, ERROR, OFF),
+# livelli per categoria es. {"voting": "INFO"}, destinazione
+# ("stdout", "stderr", "gui", percorso di un file, None = nessuna).
+# Default WARNING: i messaggi DEBUG/INFO non vengono nemmeno formattati;
+# per attivarli --log-level DEBUG (gui.py, headless.py).
+LOG_LEVEL = "WARNING"
+LOG_CATEGORY_LEVELS = {}
+LOG_SINK = "stdout"
 
 # ==============================================================================
 # --- DATABASE ---
 # ==============================================================================
 DATABASE_FILE = 'simai.db'
+# Scrittura differita (db_writer): candidati distinti in attesa prima di
+# bloccare il produttore, e attesa massima prima di scrivere un batch
+DB_WRITER_MAX_PENDING = 4096
+DB_WRITER_FLUSH_INTERVAL_SECONDS = 0.25
+# Record candidato tenuti nella cache LRU di db_manager (per UUID e nome)
+CANDIDATE_CACHE_SIZE = 1024
 
 # ==============================================================================
 # --- GUI / PYGAME ---
@@ -203,6 +361,8 @@ PIXEL_FONT_SIZE = 18
 # BLOCK_SIZE = 10 # Apparentemente non usato
 SPRITE_WIDTH = 32
 SPRITE_HEIGHT = 32
+# Lato dei frame nei fogli dei personaggi (assets/characters, griglia 64x64)
+SPRITE_SHEET_FRAME_SIZE = 64
 # Colors
 BLACK = (0, 0, 0)
 WHITE = (255, 255, 255)
@@ -218,6 +378,11 @@ LIGHT_BLUE = (173, 216, 230)
 PINK = (255, 182, 193)
 BG_COLOR = DARK_GRAY
 WINDOW_TITLE = "Anthalys Governor Election Simulation"
+# Superfici di testo renderizzate tenute in cache (LRU) dalla GUI
+GUI_TEXT_CACHE_SIZE = 512
+# Messaggi di log in attesa nel canale simulazione -> GUI (buffer circolare:
+# se la GUI resta indietro si perdono i più vecchi, la simulazione non attende)
+GUI_LOG_BUFFER_SIZE = 500
 IMAGE_PATHS = {  # Assicurati che questi percorsi siano corretti
     "character_male_dark": "assets/characters/darkmale.png",
     "character_male_light": "assets/characters/lightmale.png",
@@ -228,5 +393,12 @@ IMAGE_PATHS = {  # Assicurati che questi percorsi siano corretti
     "character_female_tanned": "assets/characters/femaletanned.png",
     "character_female_tanned2": "assets/characters/femaletanned2.png",
 }
+BACKGROUND_PATHS = {  # Sfondi del pannello visuale (caricati al primo uso, assets.py)
+    "city": "assets/backgrounds/city.png",
+    "district": "assets/backgrounds/district_bg.png",
+    "college": "assets/backgrounds/college_bg.png",
+    "elected": "assets/backgrounds/elected_bg.png",
+    "deadlock": "assets/backgrounds/deadlock_bg.png",
+}
 
 # --- NESSUNA SEZIONE IA e LLM QUI ---
@@ -1,26 +1,113 @@
 # db_manager.py
+import atexit
+import copy
 import sqlite3
 import json
+import threading
 import uuid
+from collections import OrderedDict
 import config
+import simlog
 
 # Definizione a livello di modulo per il nome del file DB
 DATABASE_FILE = config.DATABASE_FILE
+log = simlog.get("db")
 
+# Connessioni persistenti: una per thread (GUI e simulazione non condividono
+# mai la stessa connessione), riaperta se DATABASE_FILE cambia.
+_local = threading.local()
+_open_connections = set()
+_connections_lock = threading.Lock()
+# Statement preparati riutilizzati dalla cache di sqlite3 (stesse stringhe SQL)
+_STATEMENT_CACHE_SIZE = 256
+_BUSY_TIMEOUT_SECONDS = 30.0
 
-def get_db_connection():
-    """Establishes a connection to the SQLite database."""
-    conn = sqlite3.connect(DATABASE_FILE)
+
+def _open_connection(database_file):
+    # check_same_thread=False solo per poterle chiudere allo shutdown:
+    # ogni connessione viene usata esclusivamente dal thread che l'ha aperta
+    conn = sqlite3.connect(database_file, timeout=_BUSY_TIMEOUT_SECONDS,
+                           cached_statements=_STATEMENT_CACHE_SIZE,
+                           check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    # WAL: letture concorrenti (GUI) durante le scritture (simulazione);
+    # synchronous=NORMAL in WAL evita un fsync per ogni commit
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
     # conn.execute("PRAGMA foreign_keys = ON") # Opzionale
     return conn
 
 
+def get_db_connection(database_file=None):
+    """Returns this thread's persistent connection to the SQLite database."""
+    database_file = database_file or DATABASE_FILE
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.database_file == database_file:
+        return conn
+    if conn is not None:
+        close_db_connection()
+    conn = _open_connection(database_file)
+    _local.conn, _local.database_file = conn, database_file
+    with _connections_lock:
+        _open_connections.add(conn)
+    return conn
+
+
+def close_db_connection():
+    """Closes the calling thread's connection (e.g. before deleting the DB file)."""
+    conn = getattr(_local, "conn", None)
+    _local.conn = _local.database_file = None
+    if conn is None:
+        return
+    with _connections_lock:
+        _open_connections.discard(conn)
+    try:
+        conn.close()
+    except sqlite3.Error as e:  # pragma: no cover
+        if log.warning:
+            log.write(f"Warning: error closing database connection: {e}", simlog.WARNING)
+
+
+def close_all_connections():
+    """Closes every pooled connection (shutdown hook)."""
+    with _connections_lock:
+        connections = list(_open_connections)
+        _open_connections.clear()
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:  # pragma: no cover
+            pass
+    _local.conn = _local.database_file = None
+
+
+atexit.register(close_all_connections)
+
+# Contatori aggregati: colonne INTEGER dedicate (incremento atomico in SQL).
+# La colonna JSON 'stats' conserva solo eventuali chiavi extra.
+STAT_COLUMNS = (
+    "total_elections_participated",
+    "governor_wins",
+    "election_losses",
+    "total_votes_received_all_time",
+    "rounds_participated_all_time",
+)
+SCHEMA_VERSION = 1
+
+_INCREMENT_STATS_SQL = (
+    "UPDATE candidates SET "
+    + ", ".join(f"{col} = {col} + ?" for col in STAT_COLUMNS)
+    + " WHERE uuid = ?")
+
+
 def create_tables():
-    """Creates the necessary tables if they don't exist."""
+    """Creates the necessary tables if they don't exist and migrates old schemas."""
     conn = get_db_connection()
     cursor = conn.cursor()
-    cursor.execute('''
+    stat_columns_sql = "".join(
+        f"            {col} INTEGER NOT NULL DEFAULT 0,\n" for col in STAT_COLUMNS)
+    cursor.execute(f'''
         CREATE TABLE IF NOT EXISTS candidates (
             uuid TEXT PRIMARY KEY,
             name TEXT UNIQUE NOT NULL COLLATE NOCASE,
@@ -29,180 +116,728 @@ def create_tables():
             party_id TEXT,
             initial_budget REAL DEFAULT 0,
             current_budget REAL DEFAULT 0,
-            attributes TEXT, -- JSON text
+{stat_columns_sql}            attributes TEXT, -- JSON text
             traits TEXT,     -- JSON text
-            stats TEXT       -- JSON text
+            stats TEXT       -- JSON text (chiavi extra)
         )
     ''')
     # cursor.execute("CREATE INDEX IF NOT EXISTS idx_candidate_name ON candidates(name)") # Opzionale
+    # Storico dei risultati di ogni round (solo INSERT, una riga per candidato)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS round_results (
+            id INTEGER PRIMARY KEY,
+            run_id TEXT NOT NULL,
+            attempt INTEGER NOT NULL,
+            round INTEGER NOT NULL,
+            candidate_uuid TEXT NOT NULL,
+            votes INTEGER NOT NULL,
+            share REAL NOT NULL,
+            budget_remaining REAL
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_round_results_run "
+                   "ON round_results(run_id, attempt, round)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_round_results_candidate "
+                   "ON round_results(candidate_uuid)")
     conn.commit()
-    conn.close()
+    _migrate_stat_columns(conn)
 
 
-def save_candidate(candidate_data):
-    """Saves or updates a candidate's data in the database."""
-    if not candidate_data or 'name' not in candidate_data:
+def _migrate_stat_columns(conn):
+    """
+    Schema v0 -> v1: aggiunge le colonne dei contatori e vi somma i valori
+    presenti nel JSON 'stats', in un'unica transazione esplicita (in SQLite
+    anche ALTER TABLE è transazionale): se qualcosa fallisce nulla viene
+    applicato e al prossimo avvio la migrazione riparte da capo.
+    La copia dipende solo da user_version ed è additiva, quindi non azzera
+    colonne già presenti.
+    """
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
         return
+    if conn.in_transaction:  # pragma: no cover
+        conn.commit()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        existing = {row['name'] for row in conn.execute("PRAGMA table_info(candidates)")}
+        for col in STAT_COLUMNS:
+            if col not in existing:
+                conn.execute(
+                    f"ALTER TABLE candidates ADD COLUMN {col} INTEGER NOT NULL DEFAULT 0")
+        updates = []
+        for row in conn.execute("SELECT uuid, stats FROM candidates"):
+            stats, extras = _split_stats(_load_json(row['stats'], {}))
+            updates.append(tuple(stats[col] for col in STAT_COLUMNS)
+                           + (json.dumps(extras), row['uuid']))
+        conn.executemany(
+            "UPDATE candidates SET "
+            + ", ".join(f"{col} = {col} + ?" for col in STAT_COLUMNS)
+            + ", stats = ? WHERE uuid = ?", updates)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+        if updates and log.info:
+            log.write(f"Migrated {len(updates)} candidates to typed stat columns.", simlog.INFO)
+    except sqlite3.Error as e:  # pragma: no cover
+        if conn.in_transaction:
+            conn.rollback()
+        if log.error:
+            log.write(f"Database Error migrating candidate stats: {e}", simlog.ERROR)
+    finally:
+        _candidate_cache.clear()
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    candidate_uuid = str(candidate_data.get('uuid', uuid.uuid4()))
+
+def _load_json(text, default):
+    try:
+        value = json.loads(text or 'null')
+    except (json.JSONDecodeError, TypeError):  # pragma: no cover
+        return default
+    return value if isinstance(value, type(default)) else default
+
+
+def _split_stats(stats_data):
+    """Separa i contatori (interi, default 0) dalle chiavi extra del dict stats."""
+    counters = {}
+    for col in STAT_COLUMNS:
+        try:
+            counters[col] = int(stats_data.get(col, 0) or 0)
+        except (ValueError, TypeError):  # pragma: no cover
+            counters[col] = 0
+    extras = {k: v for k, v in stats_data.items() if k not in STAT_COLUMNS}
+    return counters, extras
+
+
+_UPSERT_CANDIDATE_SQL = (
+    "INSERT INTO candidates (uuid, name, gender, age, party_id, initial_budget, current_budget, "
+    "attributes, traits, stats, " + ", ".join(STAT_COLUMNS) + ") "
+    "VALUES (" + ", ".join("?" * (10 + len(STAT_COLUMNS))) + ") "
+    "ON CONFLICT(uuid) DO UPDATE SET name = excluded.name, gender = excluded.gender, "
+    "age = excluded.age, party_id = excluded.party_id, initial_budget = excluded.initial_budget, "
+    "current_budget = excluded.current_budget, attributes = excluded.attributes, "
+    "traits = excluded.traits")
+
+
+# Colonne del candidato aggiornabili singolarmente (UPDATE mirati)
+CANDIDATE_FIELDS = ("name", "gender", "age", "party_id", "initial_budget",
+                    "current_budget", "attributes", "traits")
+_JSON_FIELDS = {"attributes": "{}", "traits": "[]"}
+
+
+def candidate_fields(candidate_data):
+    """Valori (non serializzati) delle colonne CANDIDATE_FIELDS del candidato."""
     initial_budget = float(
         candidate_data.get('initial_budget', config.INITIAL_CAMPAIGN_BUDGET))
-    current_budget = float(candidate_data.get('current_budget',
-                                              initial_budget))
-    attributes_json = json.dumps(candidate_data.get('attributes', {}))
-    traits_json = json.dumps(candidate_data.get('traits', []))
+    return {
+        "name": candidate_data.get('name'),
+        "gender": candidate_data.get('gender'),
+        "age": candidate_data.get('age'),
+        "party_id": candidate_data.get('party_id'),
+        "initial_budget": initial_budget,
+        "current_budget": float(candidate_data.get('current_budget', initial_budget)),
+        "attributes": candidate_data.get('attributes', {}),
+        "traits": candidate_data.get('traits', []),
+    }
+
+
+def encode_candidate_fields(fields):
+    """Serializza i valori di candidate_fields per SQLite (JSON dove serve)."""
+    return {col: json.dumps(value) if col in _JSON_FIELDS else value
+            for col, value in fields.items()}
+
+
+def candidate_row(candidate_data, fields=None):
+    """
+    Serializes a candidate dict into the parameter tuple written by
+    save_candidate/write_batch (an immutable snapshot of its current state).
+    """
+    candidate_uuid = str(candidate_data.get('uuid', uuid.uuid4()))
+    encoded = encode_candidate_fields(fields or candidate_fields(candidate_data))
     stats_data = candidate_data.get('stats', {})
     if not isinstance(stats_data, dict):
         stats_data = {}
-    base_stats = {
-        "total_elections_participated": 0,
-        "governor_wins": 0,
-        "election_losses": 0,
-        "total_votes_received_all_time": 0,
-        "rounds_participated_all_time": 0
-    }
-    for k, v in base_stats.items():
-        stats_data.setdefault(k, v)
-    stats_json = json.dumps(stats_data)
+    counters, extra_stats = _split_stats(stats_data)
+    stats_json = json.dumps(extra_stats)
+    return ((candidate_uuid,) + tuple(encoded[col] for col in CANDIDATE_FIELDS)
+            + (stats_json,) + tuple(counters[col] for col in STAT_COLUMNS))
+
+
+class CandidateChangeTracker:
+    """
+    Ricorda, per UUID, i valori di CANDIDATE_FIELDS già scritti su disco.
+    diff() confronta un nuovo salvataggio con quelli senza modificare nulla:
+    un candidato mai scritto va scritto per intero, uno modificato solo nelle
+    colonne cambiate, uno invariato per niente (es. budget già a zero).
+    Lo snapshot si aggiorna solo con mark_written(), dopo il commit: una
+    scrittura fallita non fa perdere le colonne sporche.
+    """
+
+    def __init__(self):
+        self._snapshots = {}
+
+    def __len__(self):
+        return len(self._snapshots)
+
+    def diff(self, candidate_data, key=None, pending=None):
+        """
+        Restituisce ("rows", valori di tutte le colonne) per un candidato mai
+        scritto, ("fields", {colonna: valore}) per le sole colonne cambiate,
+        (None, None) se il record è pulito. I valori non sono serializzati
+        (vedi encode_candidate_fields) e vanno poi passati a mark_written().
+        `pending`: valori già accodati ma non ancora scritti ({colonna: valore}),
+        che prevalgono sullo snapshot nel confronto.
+        """
+        key = key or str(candidate_data.get('uuid'))
+        fields = candidate_fields(candidate_data)
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            if pending is not None and all(
+                    col in pending and pending[col] == value for col, value in fields.items()):
+                return None, None  # Riga completa identica già in coda
+            return "rows", copy.deepcopy(fields)
+        current = {**snapshot, **(pending or {})}
+        dirty = {col: value for col, value in fields.items()
+                 if col not in current or current[col] != value}
+        if not dirty:
+            return None, None
+        return "fields", copy.deepcopy(dirty)
+
+    def mark_written(self, key, fields):
+        """Registra come persistiti i valori di diff() scritti con successo."""
+        snapshot = self._snapshots.get(key)
+        if snapshot is None:
+            if not set(CANDIDATE_FIELDS) <= set(fields):
+                return  # Aggiornamento parziale di un record dimenticato: riscritto al prossimo salvataggio
+            snapshot = self._snapshots[key] = {}
+        snapshot.update(copy.deepcopy(fields))
+
+    def forget(self, key=None):
+        if key is None:
+            self._snapshots.clear()
+        else:
+            self._snapshots.pop(key, None)
+
+
+def _write_candidates(cursor, rows):
+    # Un candidato diverso con lo stesso nome viene sostituito (come INSERT OR REPLACE)
+    cursor.executemany(
+        'DELETE FROM candidates WHERE name = ? COLLATE NOCASE AND uuid != ?',
+        [(row[1], row[0]) for row in rows])
+    # Upsert: le statistiche (contatori e JSON 'stats') vengono scritte solo
+    # all'inserimento, poi cambiano esclusivamente tramite incrementi (mai
+    # sovrascritte da una copia in memoria non aggiornata)
+    cursor.executemany(_UPSERT_CANDIDATE_SQL, rows)
+
+
+def save_candidate(candidate_data):
+    """Saves or updates a candidate's data in the database."""
+    if not candidate_data or 'name' not in candidate_data:
+        return
+
+    conn = get_db_connection()
+    rows = [candidate_row(candidate_data)]
+    try:
+        with conn:
+            _write_candidates(conn.cursor(), rows)
+    except sqlite3.Error as e:  # pragma: no cover
+        if log.error:
+            log.write(
+                f"Database Error saving candidate {candidate_data.get('name')}: {e}", simlog.ERROR
+            )
+    finally:
+        _invalidate_candidate_rows(rows)
+
 
+def save_candidates(candidates_data):
+    """Saves or updates many candidates in a single transaction."""
+    rows = [candidate_row(c) for c in candidates_data
+            if c and 'name' in c]
+    if not rows:
+        return
+    conn = get_db_connection()
     try:
-        cursor.execute(
-            '''
-            INSERT OR REPLACE INTO candidates (uuid, name, gender, age, party_id, initial_budget, current_budget, attributes, traits, stats)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (candidate_uuid, candidate_data.get('name'),
-              candidate_data.get('gender'), candidate_data.get('age'),
-              candidate_data.get('party_id'), initial_budget, current_budget,
-              attributes_json, traits_json, stats_json))
-        conn.commit()
+        with conn:
+            _write_candidates(conn.cursor(), rows)
     except sqlite3.Error as e:  # pragma: no cover
-        print(
-            f"Database Error saving candidate {candidate_data.get('name')}: {e}"
-        )
+        if log.error:
+            log.write(f"Database Error saving {len(rows)} candidates: {e}", simlog.ERROR)
     finally:
-        conn.close()
+        _invalidate_candidate_rows(rows)
+
+
+def _invalidate_candidate_rows(rows):
+    # Dopo il commit: UUID scritti e nomi (un omonimo con altro UUID è stato sostituito)
+    _candidate_cache.invalidate(uuids=[row[0] for row in rows], names=[row[1] for row in rows])
+
+
+def _row_to_candidate(row):
+    """Converte una riga 'candidates' nel dict del candidato (JSON decodificati, contatori in 'stats')."""
+    candidate_data = dict(row)
+    name = candidate_data.get('name')
+
+    # --- CORREZIONE PARSING JSON ---
+    try:
+        # Usa or '{}' per fornire una stringa JSON valida se il campo è None o vuoto
+        candidate_data['attributes'] = json.loads(
+            candidate_data.get('attributes') or '{}')
+    except json.JSONDecodeError:  # pragma: no cover
+        if log.warning:
+            log.write(
+                f"Warning: Invalid JSON in 'attributes' for candidate {name}. Defaulting to {{}}.", simlog.WARNING
+            )
+        candidate_data['attributes'] = {}
+    try:
+        candidate_data['traits'] = json.loads(
+            candidate_data.get('traits') or '[]')
+    except json.JSONDecodeError:  # pragma: no cover
+        if log.warning:
+            log.write(
+                f"Warning: Invalid JSON in 'traits' for candidate {name}. Defaulting to [].", simlog.WARNING
+            )
+        candidate_data['traits'] = []
+    try:
+        candidate_data['stats'] = json.loads(
+            candidate_data.get('stats') or '{}')
+    except json.JSONDecodeError:  # pragma: no cover
+        if log.warning:
+            log.write(
+                f"Warning: Invalid JSON in 'stats' for candidate {name}. Defaulting to {{}}.", simlog.WARNING
+            )
+        candidate_data['stats'] = {}
+    # --- FINE CORREZIONE ---
+
+    # Stesso formato di prima: i contatori tornano dentro 'stats'
+    for col in STAT_COLUMNS:
+        candidate_data['stats'][col] = candidate_data.pop(col, 0) or 0
+    return candidate_data
+
+
+class _CandidateCache:
+    """
+    Cache LRU read-through dei record candidato (già decodificati), per UUID
+    con indice secondario per nome case-insensitive. Le scritture invalidano
+    le voci dopo il commit; un contatore di versione impedisce a una lettura
+    iniziata prima di un'invalidazione di reinserire un valore superato.
+    Si svuota da sola se cambia DATABASE_FILE.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(0, int(capacity))
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # uuid -> record
+        self._names = {}                # candidate_name_key(nome) -> uuid
+        self._database_file = None
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _sync_database(self):
+        if self._database_file != DATABASE_FILE:
+            self._entries.clear()
+            self._names.clear()
+            self._database_file = DATABASE_FILE
+            self.version += 1
+
+    def get(self, candidate_uuid=None, name=None):
+        """Copia del record in cache (o None), aggiornando hit/miss."""
+        with self._lock:
+            self._sync_database()
+            if candidate_uuid is None:
+                candidate_uuid = self._names.get(candidate_name_key(name))
+            record = self._entries.get(str(candidate_uuid)) if candidate_uuid else None
+            if record is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(str(candidate_uuid))
+            self.hits += 1
+        return copy.deepcopy(record)
+
+    def current_version(self):
+        with self._lock:
+            self._sync_database()
+            return self.version
+
+    def put(self, record, version):
+        if not self.capacity or not record or not record.get('uuid'):
+            return
+        with self._lock:
+            if version != self.version or self._database_file != DATABASE_FILE:
+                return  # Scritture avvenute durante la lettura: valore forse superato
+            key = str(record['uuid'])
+            self._entries[key] = copy.deepcopy(record)
+            self._entries.move_to_end(key)
+            self._names[candidate_name_key(record.get('name'))] = key
+            while len(self._entries) > self.capacity:
+                _, evicted = self._entries.popitem(last=False)
+                name_key = candidate_name_key(evicted.get('name'))
+                if self._names.get(name_key) == str(evicted.get('uuid')):
+                    del self._names[name_key]
+
+    def invalidate(self, uuids=(), names=()):
+        with self._lock:
+            self.version += 1
+            for c_uuid in uuids:
+                record = self._entries.pop(str(c_uuid), None)
+                if record is not None:
+                    self._names.pop(candidate_name_key(record.get('name')), None)
+            for name in names:
+                c_uuid = self._names.pop(candidate_name_key(name), None)
+                if c_uuid is not None:
+                    self._entries.pop(c_uuid, None)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._names.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries),
+                    "capacity": self.capacity,
+                    "hit_rate": self.hits / lookups if lookups else None}
+
+
+_candidate_cache = _CandidateCache(config.CANDIDATE_CACHE_SIZE)
+
+
+def candidate_cache_stats():
+    """Hit/miss counters and size of the candidate LRU cache."""
+    return _candidate_cache.stats()
+
+
+def clear_candidate_cache():
+    _candidate_cache.clear()
+
+
+def _fetch_candidate(where_sql, value, cached=None):
+    """Read-through: serve dalla cache, altrimenti legge la riga e la mette in cache."""
+    if cached is not None:
+        return cached
+    version = _candidate_cache.current_version()
+    conn = get_db_connection()
+    row = conn.execute(f'SELECT * FROM candidates WHERE {where_sql}', (value, )).fetchone()
+    if not row:
+        return None
+    candidate_data = _row_to_candidate(row)
+    _candidate_cache.put(candidate_data, version)
+    return candidate_data
 
 
 def get_candidate_by_name(name):
     """Retrieves a candidate's data by name (case-insensitive)."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
     try:
-        cursor.execute(
-            'SELECT * FROM candidates WHERE name = ? COLLATE NOCASE', (name, ))
-        row = cursor.fetchone()
-        if row:
-            candidate_data = dict(row)
-
-            # --- CORREZIONE PARSING JSON ---
-            try:
-                # Usa or '{}' per fornire una stringa JSON valida se il campo è None o vuoto
-                candidate_data['attributes'] = json.loads(
-                    candidate_data.get('attributes') or '{}')
-            except json.JSONDecodeError:  # pragma: no cover
-                print(
-                    f"Warning: Invalid JSON in 'attributes' for candidate {name}. Defaulting to {{}}."
-                )
-                candidate_data['attributes'] = {}
-            try:
-                candidate_data['traits'] = json.loads(
-                    candidate_data.get('traits') or '[]')
-            except json.JSONDecodeError:  # pragma: no cover
-                print(
-                    f"Warning: Invalid JSON in 'traits' for candidate {name}. Defaulting to []."
-                )
-                candidate_data['traits'] = []
-            try:
-                candidate_data['stats'] = json.loads(
-                    candidate_data.get('stats') or '{}')
-            except json.JSONDecodeError:  # pragma: no cover
-                print(
-                    f"Warning: Invalid JSON in 'stats' for candidate {name}. Defaulting to {{}}."
-                )
-                candidate_data['stats'] = {}
-            # --- FINE CORREZIONE ---
-
-            # Assicura struttura stats base
-            base_stats = {
-                "total_elections_participated": 0,
-                "governor_wins": 0,
-                "election_losses": 0,
-                "total_votes_received_all_time": 0,
-                "rounds_participated_all_time": 0
-            }
-            # Usa setdefault per aggiungere chiavi mancanti con valore 0
-            for k, v in base_stats.items():
-                candidate_data['stats'].setdefault(k, v)
-
-            return candidate_data
+        return _fetch_candidate('name = ? COLLATE NOCASE', name,
+                                _candidate_cache.get(name=name))
+    except sqlite3.Error as e:  # pragma: no cover
+        if log.error:
+            log.write(f"Database Error getting candidate by name {name}: {e}", simlog.ERROR)
+        return None
+
 
+def get_candidate_by_uuid(candidate_uuid):
+    """Retrieves a candidate's data by UUID."""
+    if not candidate_uuid:
+        return None
+    try:
+        return _fetch_candidate('uuid = ?', str(candidate_uuid),
+                                _candidate_cache.get(candidate_uuid=candidate_uuid))
     except sqlite3.Error as e:  # pragma: no cover
-        print(f"Database Error getting candidate by name {name}: {e}")
+        if log.error:
+            log.write(f"Database Error getting candidate {candidate_uuid}: {e}", simlog.ERROR)
         return None
-    finally:
-        conn.close()
-    return None  # Ritorna None se 'row' non viene trovato
 
 
 def candidate_exists(name):
     """Checks if a candidate with the given name exists (case-insensitive)."""
+    if _candidate_cache.get(name=name) is not None:
+        return True
     conn = get_db_connection()
-    cursor = conn.cursor()
     exists = False
     try:
-        cursor.execute(
-            'SELECT 1 FROM candidates WHERE name = ? COLLATE NOCASE', (name, ))
-        exists = cursor.fetchone() is not None
+        exists = conn.execute(
+            'SELECT 1 FROM candidates WHERE name = ? COLLATE NOCASE', (name, )).fetchone() is not None
     except sqlite3.Error as e:  # pragma: no cover
-        print(f"Database Error checking if candidate exists {name}: {e}")
-    finally:
-        conn.close()
+        if log.error:
+            log.write(f"Database Error checking if candidate exists {name}: {e}", simlog.ERROR)
     return exists
 
 
+def candidate_name_key(name):
+    """Chiave case-insensitive dei nomi (come COLLATE NOCASE)."""
+    return (name or "").casefold()
+
+
+class CandidateIndex:
+    """
+    Indice in memoria di tutti i candidati salvati, per nome case-insensitive.
+    Le righe vengono lette in blocco con una sola query e decodificate solo
+    quando un candidato viene effettivamente usato; i nuovi candidati vengono
+    accodati e scritti insieme con flush() (save_candidates).
+    """
+
+    def __init__(self, rows=()):
+        self._rows = {candidate_name_key(row['name']): row for row in rows}
+        self._pending = []
+
+    @classmethod
+    def load(cls):
+        conn = get_db_connection()
+        try:
+            return cls(conn.execute('SELECT * FROM candidates').fetchall())
+        except sqlite3.Error as e:  # pragma: no cover
+            if log.error:
+                log.write(f"Database Error loading candidates: {e}", simlog.ERROR)
+            return cls()
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __contains__(self, name):
+        return candidate_name_key(name) in self._rows
+
+    def get(self, name):
+        """Dict del candidato (come get_candidate_by_name) o None."""
+        row = self._rows.get(candidate_name_key(name))
+        if row is None:
+            return None
+        if not isinstance(row, dict):
+            row = _row_to_candidate(row)
+        # Copia: chi lo riceve può modificarlo liberamente
+        return copy.deepcopy(row)
+
+    def add(self, candidate_data):
+        """Registra un nuovo candidato (salvato al prossimo flush())."""
+        candidate_data = copy.deepcopy(candidate_data)
+        self._rows[candidate_name_key(candidate_data.get('name'))] = candidate_data
+        self._pending.append(candidate_data)
+
+    def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        save_candidates(pending)
+
+
+def load_all_candidates():
+    """Bulk-loads every stored candidate into a CandidateIndex."""
+    return CandidateIndex.load()
+
+
 def update_candidate_stats(candidate_uuid, stats_to_increment):
     """Incrementally updates statistics for a given candidate UUID."""
     if not candidate_uuid or not stats_to_increment:
         return
+    update_candidate_stats_batch({candidate_uuid: stats_to_increment})
+
+
+def _numeric_increments(candidate_uuid, stats_to_increment):
+    increments = {}
+    for key, increment_value in stats_to_increment.items():
+        try:
+            increments[key] = int(increment_value)
+        except (ValueError, TypeError):  # pragma: no cover
+            if log.warning:
+                log.write(
+                    f"Warning: Non-numeric increment value '{increment_value}' for key '{key}' on UUID {candidate_uuid}. Skipping.", simlog.WARNING
+                )
+    return increments
+
+
+# Limite prudente sul numero di parametri '?' per singola query
+_MAX_SQL_VARIABLES = 500
+
+
+def _normalize_increments(increments_by_uuid):
+    return {
+        str(c_uuid): _numeric_increments(c_uuid, incs)
+        for c_uuid, incs in increments_by_uuid.items() if c_uuid and incs
+    }
+
+
+def _apply_stat_increments(conn, increments_by_uuid):
+    """
+    Counter columns are incremented in SQL (col = col + ?) with a single
+    executemany; only non-counter keys need a JSON read-modify-write.
+    """
+    counter_rows = []
+    extra_increments = {}
+    for c_uuid, increments in increments_by_uuid.items():
+        if any(col in increments for col in STAT_COLUMNS):
+            counter_rows.append(
+                tuple(increments.get(col, 0) for col in STAT_COLUMNS) + (c_uuid,))
+        extras = {k: v for k, v in increments.items() if k not in STAT_COLUMNS}
+        if extras:
+            extra_increments[c_uuid] = extras
+    if counter_rows:
+        # Candidati non trovati vengono ignorati (WHERE senza match)
+        conn.executemany(_INCREMENT_STATS_SQL, counter_rows)
+    if extra_increments:
+        _increment_extra_stats(conn, extra_increments)
+
+
+def _increment_extra_stats(conn, extra_increments):
+    uuids = list(extra_increments)
+    updates = []
+    for start in range(0, len(uuids), _MAX_SQL_VARIABLES):
+        chunk = uuids[start:start + _MAX_SQL_VARIABLES]
+        placeholders = ", ".join("?" * len(chunk))
+        for row in conn.execute(
+                f"SELECT uuid, stats FROM candidates WHERE uuid IN ({placeholders})", chunk):
+            current_stats = _load_json(row['stats'], {})
+            for key, increment in extra_increments[row['uuid']].items():
+                current_stats[key] = current_stats.get(key, 0) + increment
+            updates.append((json.dumps(current_stats), row['uuid']))
+    conn.executemany("UPDATE candidates SET stats = ? WHERE uuid = ?", updates)
+
+
+def update_candidate_stats_batch(increments_by_uuid):
+    """Applies {uuid: {stat: increment}} for many candidates in one transaction."""
+    increments_by_uuid = _normalize_increments(increments_by_uuid)
+    if not increments_by_uuid:
+        return
+    conn = get_db_connection()
+    try:
+        with conn:  # Una sola transazione (commit o rollback automatico)
+            _apply_stat_increments(conn, increments_by_uuid)
+    except sqlite3.Error as e:  # pragma: no cover
+        if log.error:
+            log.write(f"Database error updating stats for {len(increments_by_uuid)} candidates: {e}", simlog.ERROR)
+    finally:
+        _candidate_cache.invalidate(uuids=increments_by_uuid)
+
+
+ROUND_RESULT_COLUMNS = ("run_id", "attempt", "round", "candidate_uuid", "votes",
+                        "share", "budget_remaining")
+_INSERT_ROUND_RESULTS_SQL = (
+    "INSERT INTO round_results (" + ", ".join(ROUND_RESULT_COLUMNS) + ") VALUES ("
+    + ", ".join("?" * len(ROUND_RESULT_COLUMNS)) + ")")
+
+
+def round_result_rows(run_id, attempt, round_num, candidates_info, results_counter):
+    """
+    Righe di round_results per un round: una per candidato in corsa (anche a
+    zero voti), con quota sui voti espressi e budget rimasto.
+    """
+    total_votes = sum(results_counter.values())
+    rows = []
+    for cand in candidates_info:
+        c_uuid = cand.get('uuid')
+        if not c_uuid:
+            continue
+        votes = int(results_counter.get(cand.get('name'), 0))
+        budget = cand.get('campaign_budget', cand.get('current_budget'))
+        rows.append((str(run_id), int(attempt), int(round_num), str(c_uuid), votes,
+                     votes / total_votes if total_votes else 0.0,
+                     float(budget) if budget is not None else None))
+    return rows
 
+
+def save_round_results(rows, database_file=None):
+    """Inserts round_results rows (from round_result_rows) with one executemany."""
+    return write_batch(round_results=rows, database_file=database_file)
+
+
+def get_vote_trajectories(run_id=None, attempt=None, candidate_uuid=None):
+    """
+    Per-candidate vote trajectories from round_results:
+    {candidate_uuid: [{"run_id", "attempt", "round", "votes", "share", "budget_remaining"}, ...]}
+    ordered by run, attempt and round. Filters are optional.
+    """
+    conditions, params = [], []
+    for column, value in (("run_id", run_id), ("attempt", attempt),
+                          ("candidate_uuid", candidate_uuid)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    where = " WHERE " + " AND ".join(conditions) if conditions else ""
+    trajectories = {}
     conn = get_db_connection()
-    cursor = conn.cursor()  # Muovi la creazione del cursore qui
     try:
-        # Approccio Fetch-Modify-Update (più semplice)
-        cursor.execute("SELECT stats FROM candidates WHERE uuid = ?",
-                       (str(candidate_uuid), ))
-        row = cursor.fetchone()
-        if row:
-            try:
-                current_stats_str = row['stats'] if row['stats'] else '{}'
-                current_stats = json.loads(current_stats_str)
-            except (json.JSONDecodeError, TypeError):  # pragma: no cover
-                current_stats = {}
-
-            # Aggiorna statistiche
-            for key, increment_value in stats_to_increment.items():
-                try:
-                    numeric_increment = int(increment_value)
-                    current_stats[key] = current_stats.get(
-                        key, 0) + numeric_increment
-                except (ValueError, TypeError):  # pragma: no cover
-                    print(
-                        f"Warning: Non-numeric increment value '{increment_value}' for key '{key}' on UUID {candidate_uuid}. Skipping."
-                    )
-
-            # Salva JSON aggiornato
-            updated_stats_json = json.dumps(current_stats)
-            cursor.execute("UPDATE candidates SET stats = ? WHERE uuid = ?",
-                           (updated_stats_json, str(candidate_uuid)))
-            conn.commit()
-        # else: Candidato non trovato, nessun log necessario qui, forse nel chiamante se importante
+        for row in conn.execute(
+                "SELECT run_id, attempt, round, candidate_uuid, votes, share, budget_remaining "
+                f"FROM round_results{where} ORDER BY candidate_uuid, run_id, attempt, round", params):
+            point = dict(row)
+            trajectories.setdefault(point.pop('candidate_uuid'), []).append(point)
+    except sqlite3.Error as e:  # pragma: no cover
+        if log.error:
+            log.write(f"Database Error reading vote trajectories: {e}", simlog.ERROR)
+    return trajectories
+
 
+def _update_candidate_fields(conn, field_updates):
+    """UPDATE delle sole colonne cambiate: un executemany per insieme di colonne."""
+    groups = {}
+    for c_uuid, fields in field_updates.items():
+        columns = tuple(col for col in CANDIDATE_FIELDS if col in fields)
+        if columns:
+            groups.setdefault(columns, []).append(
+                tuple(fields[col] for col in columns) + (str(c_uuid),))
+    for columns, params in groups.items():
+        conn.executemany(
+            "UPDATE candidates SET " + ", ".join(f"{col} = ?" for col in columns)
+            + " WHERE uuid = ?", params)
+
+
+def write_batch(candidate_rows=(), stats_increments=None, database_file=None,
+                field_updates=None, round_results=()):
+    """
+    Writes, in a single transaction, full candidate rows (from candidate_row),
+    targeted column updates ({uuid: {column: encoded value}}), stat
+    increments and round_results rows. Used by the write-behind writer (db_writer).
+    Returns True on commit, False on a database error.
+    """
+    candidate_rows = list(candidate_rows)
+    field_updates = field_updates or {}
+    stats_increments = _normalize_increments(stats_increments or {})
+    round_results = list(round_results)
+    if not candidate_rows and not field_updates and not stats_increments and not round_results:
+        return True
+    conn = get_db_connection(database_file)
+    try:
+        with conn:
+            if candidate_rows:
+                _write_candidates(conn.cursor(), candidate_rows)
+            if field_updates:
+                _update_candidate_fields(conn, field_updates)
+            if stats_increments:
+                _apply_stat_increments(conn, stats_increments)
+            if round_results:
+                conn.executemany(_INSERT_ROUND_RESULTS_SQL, round_results)
     except sqlite3.Error as e:  # pragma: no cover
-        print(f"Database error updating stats for {candidate_uuid}: {e}")
-        # Considera conn.rollback() se usi transazioni esplicite
-    except Exception as e:  # pragma: no cover
-        print(f"Generic error updating stats for {candidate_uuid}: {e}")
+        if log.error:
+            log.write(f"Database Error writing batch ({len(candidate_rows)} candidates, "
+                  f"{len(field_updates)} partial updates, {len(stats_increments)} stat updates, "
+                  f"{len(round_results)} round results): {e}", simlog.ERROR)
+        return False
     finally:
-        conn.close()
+        if candidate_rows or field_updates or stats_increments:
+            _invalidate_candidate_rows(candidate_rows)
+            _candidate_cache.invalidate(uuids=list(field_updates) + list(stats_increments))
+    return True
+
+
+class StatsAccumulator:
+    """
+    Raccoglie in memoria gli incrementi delle statistiche (per round o per
+    tentativo) e li consegna tutti insieme al flush() a `sink`
+    (default: update_candidate_stats_batch, un'unica transazione).
+    """
+
+    def __init__(self, sink=None):
+        self._pending = {}
+        self._sink = sink or update_candidate_stats_batch
+
+    def add(self, candidate_uuid, stats_to_increment):
+        if not candidate_uuid:
+            return
+        pending = self._pending.setdefault(str(candidate_uuid), {})
+        for key, increment_value in stats_to_increment.items():
+            pending[key] = pending.get(key, 0) + increment_value
+
+    def __len__(self):
+        return len(self._pending)
+
+    def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        self._sink(pending)
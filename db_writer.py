@@ -0,0 +1,317 @@
+# db_writer.py
+"""
+Scrittura differita (write-behind) sul database dei candidati.
+
+Il thread della simulazione non scrive più su disco a metà round: consegna
+le modifiche a un thread scrittore dedicato e prosegue.
+- save_candidate() confronta il candidato con l'ultimo stato scritto
+  (db_manager.CandidateChangeTracker) e con quanto è già in coda: un
+  candidato nuovo viene accodato per intero, uno modificato solo con le
+  colonne cambiate (UPDATE mirato), uno invariato non viene accodato
+  affatto. Salvataggi ripetuti dello stesso UUID prima della scrittura si
+  fondono. Lo snapshot del tracker si aggiorna solo dopo il commit del
+  batch (mark_written).
+- update_candidate_stats_batch() accoda incrementi di statistiche, sommati
+  per UUID.
+- save_round_results() accoda le righe di round_results di un round (solo
+  INSERT, nessuna fusione).
+Lo scrittore applica tutto ciò che è in attesa in un'unica transazione
+(db_manager.write_batch): prima i candidati nuovi, poi le colonne cambiate,
+poi gli incrementi e lo storico dei round. Se la transazione fallisce
+l'errore va nel log (categoria "db") e i candidati del batch vengono
+dimenticati dal tracker: il loro prossimo salvataggio li riscrive per intero.
+La coda è limitata (config.DB_WRITER_MAX_PENDING candidati distinti): se il
+disco non tiene il passo il produttore attende invece di far crescere la
+memoria.
+flush() blocca finché tutto ciò che è stato accodato prima della chiamata è
+scritto; end_attempt() in più azzera gli snapshot dei candidati; shutdown()
+svuota la coda e ferma il thread (chiusura GUI, atexit).
+"""
+import atexit
+import threading
+
+import config
+import db_manager
+import simlog
+
+log = simlog.get("db")
+
+
+class WriteBehindWriter:
+    """Thread scrittore con coda limitata e fusione per UUID."""
+
+    def __init__(self, max_pending=None, flush_interval=None):
+        self.max_pending = max(1, int(max_pending or config.DB_WRITER_MAX_PENDING))
+        self.flush_interval = (config.DB_WRITER_FLUSH_INTERVAL_SECONDS
+                               if flush_interval is None else flush_interval)
+        self._cond = threading.Condition()
+        # database_file -> {"rows": {uuid: row}, "fields": {uuid: {colonna: valore}},
+        #                   "stats": {uuid: {stat: incremento}}, "results": [righe]}
+        self._pending = {}
+        # database_file -> CandidateChangeTracker (stato già scritto per UUID)
+        self._trackers = {}
+        # database_file -> {uuid: {colonna: valore}} accodati o in scrittura, non ancora scritti
+        self._unwritten = {}
+        self._tracking_lock = threading.Lock()
+        self._pending_count = 0
+        self._submitted = 0      # Numero di sequenza dell'ultima modifica accodata
+        self._written = 0        # Ultima sequenza scritta (o scartata per errore)
+        self._flush_waiters = 0
+        self._results_sequence = 0  # Chiave delle righe di round_results in coda
+        self._release_connection = False
+        self._stopping = False
+        self.failed_batches = 0
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    # --- Lato produttore ---------------------------------------------------
+
+    def _enqueue(self, database_file, kind, key, value, written=None):
+        with self._cond:
+            if self._stopping:
+                return False
+            target = self._bucket(database_file)[kind]
+            while key not in target and self._pending_count >= self.max_pending:
+                # Contropressione: si attende lo scrittore solo a coda piena
+                self._cond.wait()
+                target = self._bucket(database_file)[kind]
+            if key not in target:
+                self._pending_count += 1
+            if kind == "rows":
+                target[key] = value
+            elif kind == "fields":
+                target.setdefault(key, {}).update(value)
+            elif kind == "results":
+                target[key] = value
+            else:
+                merged = target.setdefault(key, {})
+                for stat, increment in value.items():
+                    merged[stat] = merged.get(stat, 0) + increment
+            if written is not None:
+                self._bucket(database_file)["written"].setdefault(key, {}).update(written)
+            self._submitted += 1
+            self._cond.notify_all()
+            return True
+
+    def _bucket(self, database_file):
+        return self._pending.setdefault(
+            database_file, {"rows": {}, "fields": {}, "stats": {}, "results": {}, "written": {}})
+
+    def save_candidate(self, candidate_data):
+        if not candidate_data or 'name' not in candidate_data:
+            return
+        if not candidate_data.get('uuid'):
+            db_manager.save_candidate(candidate_data)  # Senza UUID non c'è nulla da tracciare
+            return
+        database_file = db_manager.DATABASE_FILE
+        c_uuid = str(candidate_data['uuid'])
+        with self._tracking_lock:
+            tracker = self._trackers.setdefault(database_file, db_manager.CandidateChangeTracker())
+            unwritten = self._unwritten.setdefault(database_file, {})
+            kind, fields = tracker.diff(candidate_data, c_uuid, pending=unwritten.get(c_uuid))
+            if kind is None:
+                return  # Nessun campo cambiato dall'ultimo salvataggio (o già in coda)
+            unwritten.setdefault(c_uuid, {}).update(fields)
+        if kind == "rows":
+            payload = db_manager.candidate_row(candidate_data, fields)
+        else:
+            payload = db_manager.encode_candidate_fields(fields)
+        if not self._enqueue(database_file, kind, c_uuid, payload, written=fields):
+            self._written_back(database_file, {c_uuid: fields}, False)
+            db_manager.save_candidate(candidate_data)  # Scrittore già fermo
+
+    def forget_candidates(self):
+        """Azzera gli snapshot: il prossimo salvataggio di ogni candidato sarà completo."""
+        with self._tracking_lock:
+            self._trackers.clear()
+            self._unwritten.clear()
+
+    def _write_failed(self, database_file, bucket):
+        """Batch non scritto: i suoi candidati verranno riscritti per intero al prossimo salvataggio."""
+        uuids = set(bucket["rows"]) | set(bucket["fields"]) | set(bucket["written"])
+        with self._tracking_lock:
+            self.failed_batches += 1
+            tracker = self._trackers.get(database_file)
+            if tracker is not None:
+                for c_uuid in uuids:
+                    tracker.forget(c_uuid)
+        if log.error:
+            log.write(f"Background database write to {database_file} failed: {len(uuids)} candidates "
+                      f"will be rewritten on their next save; {len(bucket['stats'])} stat updates and "
+                      f"{sum(len(rows) for rows in bucket['results'].values())} round results were not saved.",
+                      simlog.ERROR)
+
+    def _written_back(self, database_file, written, success):
+        """
+        Esito della scrittura dei valori `written` ({uuid: {colonna: valore}}):
+        se riuscita diventano lo snapshot del tracker; in ogni caso escono dai
+        valori in attesa (restano solo quelli accodati nel frattempo).
+        """
+        with self._tracking_lock:
+            tracker = self._trackers.get(database_file)
+            unwritten = self._unwritten.get(database_file, {})
+            for c_uuid, fields in written.items():
+                if success and tracker is not None:
+                    tracker.mark_written(c_uuid, fields)
+                pending = unwritten.get(c_uuid)
+                if pending is None:
+                    continue
+                for col, value in fields.items():
+                    if col in pending and pending[col] == value:
+                        del pending[col]
+                if not pending:
+                    del unwritten[c_uuid]
+
+    def update_candidate_stats_batch(self, increments_by_uuid):
+        database_file = db_manager.DATABASE_FILE
+        for c_uuid, increments in increments_by_uuid.items():
+            if not c_uuid or not increments:
+                continue
+            if not self._enqueue(database_file, "stats", str(c_uuid), dict(increments)):
+                db_manager.update_candidate_stats_batch({c_uuid: increments})
+
+    def save_round_results(self, rows):
+        if not rows:
+            return
+        database_file = db_manager.DATABASE_FILE
+        with self._cond:
+            self._results_sequence += 1
+            key = self._results_sequence
+        if not self._enqueue(database_file, "results", key, list(rows)):
+            db_manager.save_round_results(rows, database_file=database_file)
+
+    def flush(self, timeout=None, release_connection=False):
+        """
+        Attende la scrittura di tutto ciò che è stato accodato finora.
+        Con release_connection=True lo scrittore chiude poi la propria
+        connessione (es. prima di cancellare il file del database).
+        Restituisce False se il timeout scade.
+        """
+        if threading.current_thread() is self._thread:  # pragma: no cover
+            return True
+        with self._cond:
+            target = self._submitted
+            if release_connection:
+                self._release_connection = True
+                self._submitted += 1  # Forza un giro dello scrittore
+                target = self._submitted
+            self._flush_waiters += 1
+            self._cond.notify_all()
+            try:
+                return self._cond.wait_for(
+                    lambda: self._written >= target or not self._thread.is_alive(), timeout)
+            finally:
+                self._flush_waiters -= 1
+
+    def shutdown(self, timeout=None):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    # --- Thread scrittore --------------------------------------------------
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._pending_count or self._written < self._submitted or self._stopping)
+                if (not self._pending_count and self._written >= self._submitted
+                        and self._stopping):
+                    break
+                if self.flush_interval and not self._stopping:
+                    # Breve attesa per raccogliere altre modifiche nello stesso batch,
+                    # interrotta da flush() o shutdown()
+                    self._cond.wait_for(
+                        lambda: self._stopping or self._flush_waiters
+                        or self._pending_count >= self.max_pending, self.flush_interval)
+                pending, self._pending = self._pending, {}
+                self._pending_count = 0
+                sequence = self._submitted
+                release_connection, self._release_connection = self._release_connection, False
+                # Spazio libero in coda: i produttori in attesa possono ripartire
+                self._cond.notify_all()
+
+            for database_file, bucket in pending.items():
+                try:
+                    written = db_manager.write_batch(
+                        bucket["rows"].values(), bucket["stats"], database_file=database_file,
+                        field_updates=bucket["fields"],
+                        round_results=[row for rows in bucket["results"].values() for row in rows])
+                except Exception as e_write:  # pragma: no cover
+                    if log.error:
+                        log.write(f"Background database write raised: {e_write}", simlog.ERROR)
+                    written = False
+                self._written_back(database_file, bucket["written"], written)
+                if not written:
+                    self._write_failed(database_file, bucket)
+            if release_connection:
+                db_manager.close_db_connection()
+
+            with self._cond:
+                self._written = sequence
+                self._cond.notify_all()
+        db_manager.close_db_connection()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer():
+    """Scrittore condiviso del processo, avviato al primo uso."""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteBehindWriter()
+        return _writer
+
+
+def save_candidate(candidate_data):
+    """Accoda il salvataggio del candidato (non blocca su disco)."""
+    get_writer().save_candidate(candidate_data)
+
+
+def update_candidate_stats_batch(increments_by_uuid):
+    """Accoda incrementi {uuid: {stat: incremento}} (sink per db_manager.StatsAccumulator)."""
+    if increments_by_uuid:
+        get_writer().update_candidate_stats_batch(increments_by_uuid)
+
+
+def save_round_results(rows):
+    """Accoda le righe di round_results di un round (db_manager.round_result_rows)."""
+    if rows:
+        get_writer().save_round_results(rows)
+
+
+def flush(timeout=None, release_connection=False):
+    """Blocca finché le modifiche accodate sono scritte (fine tentativo)."""
+    writer = _writer
+    if writer is None:
+        return True
+    return writer.flush(timeout, release_connection=release_connection)
+
+
+def end_attempt(timeout=None):
+    """
+    Fine tentativo: attende la scrittura di tutto ciò che è accodato e azzera
+    gli snapshot dei candidati (la memoria non cresce tra un tentativo e l'altro).
+    """
+    writer = _writer
+    if writer is None:
+        return True
+    written = writer.flush(timeout)
+    writer.forget_candidates()
+    return written
+
+
+def shutdown(timeout=None):
+    """Scrive tutto e ferma lo scrittore (chiusura GUI / uscita processo)."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.shutdown(timeout)
+
+
+atexit.register(shutdown)
@@ -0,0 +1,107 @@
+# district_scheduler.py
+"""
+Esecuzione parallela delle elezioni distrettuali (Fase 1).
+
+Ogni distretto ha candidati e cittadini propri: nessuno stato condiviso,
+quindi i distretti girano in un ProcessPoolExecutor. Ogni distretto riceve
+un flusso RNG indipendente (SeedSequence.spawn) e i risultati vengono
+riuniti in ordine di distretto: a parità di seed l'output è identico a
+quello di un'esecuzione seriale. Per default il pool si usa solo sopra
+config.DISTRICT_PARALLEL_MIN_WORK (vedi resolve_worker_count): i distretti
+piccoli costano meno dell'avvio dei processi. La SimulationConfig viaggia con ogni task,
+quindi i worker non dipendono dalla config estratta al loro import.
+"""
+import atexit
+import multiprocessing
+import os
+import random
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import config
+import district_voting
+import simlog
+
+log = simlog.get("districts")
+
+_executor = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def _run_district_task(task):
+    district_index, district_candidates, num_citizens, seed_seq, sim_config = task
+    rng = np.random.default_rng(seed_seq)
+    return district_voting.run_district_election(
+        district_index, district_candidates, num_citizens, rng, sim_config=sim_config)
+
+
+def resolve_worker_count(max_workers=None, work=None):
+    """
+    Processi da usare: max_workers esplicito, altrimenti config.DISTRICT_WORKERS;
+    se entrambi None tutti i core, ma solo quando `work` (cittadini x candidati
+    x distretti) raggiunge config.DISTRICT_PARALLEL_MIN_WORK.
+    """
+    if max_workers is None:
+        max_workers = config.DISTRICT_WORKERS
+    if max_workers is None:
+        if work is not None and work < config.DISTRICT_PARALLEL_MIN_WORK:
+            return 1
+        max_workers = os.cpu_count() or 1
+    return max(1, int(max_workers))
+
+
+def get_executor(max_workers):
+    """Pool di processi persistente (riutilizzato tra i tentativi)."""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != max_workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            # 'spawn' è sicuro anche se chiamato dal thread di simulazione della GUI
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+            _executor_workers = max_workers
+        return _executor
+
+
+def shutdown_executor():
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+        _executor, _executor_workers = None, 0
+
+
+atexit.register(shutdown_executor)
+
+
+def run_district_elections(districts, num_citizens, seed=None, max_workers=None, sim_config=None):
+    """
+    Esegue le elezioni di tutti i distretti (liste di candidati).
+    Restituisce i risultati di run_district_election in ordine di distretto.
+    """
+    if not districts:
+        return []
+    cfg = config.resolve(sim_config)  # Risolta qui: nei worker DEFAULT_CONFIG è diversa
+    if seed is None:
+        seed = random.getrandbits(64)  # Riproducibile via random.seed()
+    child_seeds = np.random.SeedSequence(seed).spawn(len(districts))
+    tasks = [(i + 1, list(candidates), num_citizens, child_seeds[i], cfg)
+             for i, candidates in enumerate(districts)]
+
+    work = num_citizens * sum(len(candidates) for candidates in districts)
+    workers = min(resolve_worker_count(max_workers, work), len(tasks))
+    if workers > 1:
+        try:
+            executor = get_executor(workers)
+            # map() conserva l'ordine dei task = ordine dei distretti
+            return list(executor.map(_run_district_task, tasks,
+                                     chunksize=max(1, len(tasks) // (workers * 4))))
+        except (OSError, RuntimeError) as e_pool:  # pragma: no cover
+            if log.warning:
+                log.write(f"Warning: district process pool unavailable ({e_pool}). Running serially.", simlog.WARNING)
+            shutdown_executor()
+    return [_run_district_task(task) for task in tasks]
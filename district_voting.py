@@ -0,0 +1,121 @@
+# district_voting.py
+"""
+Motore di voto distrettuale (Fase 1) vettoriale.
+
+Le preferenze dei cittadini sono array di piccoli interi (N, A) e i tratti
+una maschera booleana (N, T): i punteggi di attrazione per tutti i
+cittadini e candidati si calcolano con una sola operazione matriciale e
+i voti vengono estratti in blocco. Stesse regole di
+voting.simulate_citizen_vote, senza cicli per cittadino.
+"""
+from collections import Counter
+
+import numpy as np
+
+import config
+from elector_state import ATTRIBUTE_KEYS
+
+
+class CitizenPopulation:
+    """Cittadini di un distretto: preferenze (N, A) int8 e maschera tratti (N, T)."""
+
+    __slots__ = ("preferences", "trait_mask", "trait_names")
+
+    def __init__(self, preferences, trait_mask, trait_names):
+        self.preferences = preferences
+        self.trait_mask = trait_mask
+        self.trait_names = list(trait_names)
+
+    def __len__(self):
+        return self.preferences.shape[0]
+
+    def has_trait(self, trait):
+        if trait not in self.trait_names:
+            return np.zeros(len(self), dtype=bool)
+        return self.trait_mask[:, self.trait_names.index(trait)]
+
+
+def initialize_citizen_population(num_citizens, rng, sim_config=None):
+    """Assegna preferenze e tratti casuali a tutti i cittadini in blocco."""
+    cfg = config.resolve(sim_config)
+    num_citizens = max(0, int(num_citizens))
+    trait_names = list(cfg.CITIZEN_TRAITS)
+    preferences = rng.integers(*cfg.CITIZEN_IDEAL_PREFERENCE_RANGE,
+                               size=(num_citizens, len(ATTRIBUTE_KEYS)),
+                               endpoint=True).astype(np.int8)
+    trait_mask = np.zeros((num_citizens, len(trait_names)), dtype=bool)
+    k_traits = min(cfg.CITIZEN_TRAIT_COUNT, len(trait_names))
+    if k_traits > 0 and num_citizens > 0:
+        # k tratti distinti per cittadino (come random.sample)
+        picked = np.argsort(rng.random((num_citizens, len(trait_names))), axis=1)[:, :k_traits]
+        np.put_along_axis(trait_mask, picked, True, axis=1)
+    return CitizenPopulation(preferences, trait_mask, trait_names)
+
+
+def compute_attraction_scores(citizens, candidate_attributes, rng, sim_config=None):
+    """Punteggi (N, C) di attrazione, con moltiplicatori e rumore applicati per maschera."""
+    cfg = config.resolve(sim_config)
+    distance = np.abs(candidate_attributes[None, :, :] -
+                      citizens.preferences[:, None, :]).sum(axis=2)
+    scores = np.maximum(0.1, cfg.MAX_CITIZEN_LEANING_BASE -
+                        distance * cfg.CITIZEN_ATTRIBUTE_MISMATCH_PENALTY_FACTOR)
+
+    attribute_focused = citizens.has_trait("Attribute Focused")[:, None]
+    random_inclined = citizens.has_trait("Random Inclined")[:, None]
+    random_bias = rng.uniform(-0.5, 0.5, size=scores.shape)
+    scores = np.where(attribute_focused,
+                      scores * cfg.CITIZEN_TRAIT_MULTIPLIER_ATTRIBUTE_FOCUSED, scores)
+    random_bias = np.where(attribute_focused, random_bias * 0.5, random_bias)
+    if random_inclined.any():
+        bias_range = cfg.CITIZEN_TRAIT_RANDOM_INCLINED_BIAS
+        random_bias += np.where(random_inclined,
+                                rng.uniform(-bias_range, bias_range, size=scores.shape), 0.0)
+    return np.maximum(0.01, scores + random_bias)
+
+
+def simulate_district_vote_batch(citizens, district_candidates_info, rng, sim_config=None):
+    """Voto di tutti i cittadini del distretto; restituisce il conteggio (Counter)."""
+    cfg = config.resolve(sim_config)
+    candidates = [c for c in district_candidates_info if isinstance(c, dict) and c.get('name')]
+    if not candidates or len(citizens) == 0:
+        return Counter()
+    candidate_attributes = np.array(
+        [[c.get("attributes", {}).get(attr, cfg.ATTRIBUTE_RANGE[0]) for attr in ATTRIBUTE_KEYS]
+         for c in candidates], dtype=np.float64)
+    scores = compute_attraction_scores(citizens, candidate_attributes, rng, sim_config=cfg)
+
+    # Estrazione pesata per riga (inversione della CDF)
+    cumulative = np.cumsum(scores, axis=1)
+    targets = rng.random(len(citizens)) * cumulative[:, -1]
+    votes = np.minimum((cumulative <= targets[:, None]).sum(axis=1), len(candidates) - 1)
+
+    tally = np.bincount(votes, minlength=len(candidates))
+    return Counter({candidates[i]['name']: int(tally[i]) for i in np.flatnonzero(tally)})
+
+
+def run_district_election(district_index, district_candidates_info, num_citizens, rng, sim_config=None):
+    """Una elezione distrettuale completa: popolazione, voto e vincitore."""
+    citizens = initialize_citizen_population(num_citizens, rng, sim_config=sim_config)
+    results = simulate_district_vote_batch(
+        citizens, district_candidates_info, rng, sim_config=sim_config)
+    winner_name = results.most_common(1)[0][0] if results else None
+    winner = next((c for c in district_candidates_info if c.get('name') == winner_name), None)
+    return {
+        "district": district_index,
+        "results": results,
+        "winner": winner,
+        "num_citizens": len(citizens),
+    }
+
+
+def split_into_districts(candidates, num_districts):
+    """Divide la lista candidati in `num_districts` blocchi contigui (il più possibile uguali)."""
+    if num_districts <= 0:
+        return []
+    size, extra = divmod(len(candidates), num_districts)
+    districts, start = [], 0
+    for i in range(num_districts):
+        end = start + size + (1 if i < extra else 0)
+        districts.append(candidates[start:end])
+        start = end
+    return districts
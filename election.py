@@ -15,7 +15,13 @@ import data
 import utils
 import voting  # Contiene le funzioni di simulazione specifiche
 import db_manager
+import db_writer
 import generation
+import social_influence
+import district_voting
+import district_scheduler
+import snapshots
+import simlog
 # Import opzionale di numpy
 try:
     import numpy as np
@@ -24,127 +30,227 @@ except ImportError:  # pragma: no cover
     HAS_NUMPY = False
 
 
+# Identificativo della sessione (GUI o processo) per lo storico round_results
+SESSION_RUN_ID = uuid.uuid4().hex
+log = simlog.get("election")
+
+
 def generate_candidate_oath(candidate_info, hot_topic=None):
     """Genera un giuramento/dichiarazione d'intenti più variata."""
     # ... (Codice completo come mostrato prima) ...
     return "Giuramento placeholder"  # Placeholder
 
 
-def generate_random_event(candidates_info, elector_full_preferences_data, last_round_results=None):
+def generate_random_event(candidates_info, elector_full_preferences_data, last_round_results=None, sim_config=None):
     """Genera evento casuale. USA voting.apply_elector_impact."""
     # ... (Codice completo come mostrato prima, assicurandosi che usi voting.apply_elector_impact) ...
     pass  # Placeholder
 
 
-def run_election_simulation(election_attempt, preselected_candidates_info_gui, runoff_carryover_winner_name, continue_event, running_event, step_by_step_mode):
+def run_district_phase(election_attempt, seed=None, sim_config=None):
+    """
+    Fase 1: elezioni distrettuali (voto vettoriale dei cittadini).
+    Restituisce i vincitori di ogni distretto, in ordine di distretto.
+    """
+    cfg = config.resolve(sim_config)
+    utils.send_pygame_update(utils.UPDATE_TYPE_STATUS, {
+                             "attempt": election_attempt, "phase": "District Elections", "round": 0, "status": "Generating district candidates..."})
+    all_district_candidates = generation.generate_candidates(
+        cfg.NUM_DISTRICTS * cfg.CANDIDATES_PER_DISTRICT, data.MALE_FIRST_NAMES,
+        data.FEMALE_FIRST_NAMES, data.SURNAMES, sim_config=cfg)
+    districts = [d for d in district_voting.split_into_districts(
+        all_district_candidates, cfg.NUM_DISTRICTS) if d]
+
+    utils.send_pygame_update(utils.UPDATE_TYPE_STATUS, {
+                             "status": "Citizens Voting..."})
+    # Distretti indipendenti in parallelo, un flusso RNG per distretto
+    district_results = district_scheduler.run_district_elections(
+        districts, cfg.CITIZENS_PER_DISTRICT, seed=seed, sim_config=cfg)
+    district_winners = []
+    for district_result in district_results:
+        winner = district_result["winner"]
+        if winner:
+            district_winners.append(winner)
+            utils.send_pygame_update(
+                utils.UPDATE_TYPE_MESSAGE, f"District {district_result['district']}: {winner.get('name')} wins ({district_result['results'][winner.get('name')]}/{district_result['num_citizens']} votes).")
+    return district_winners
+
+
+def load_carryover_candidates(preselected_candidates, runoff_winner_name=None):
+    """
+    Candidati riportati al tentativo successivo (preselezionati ed eventuale
+    vincitore del ballottaggio), riletti dal database per avere budget e
+    statistiche aggiornati dal tentativo precedente. Le letture passano per la
+    cache LRU di db_manager: lo stesso record non viene riletto dal disco.
+    """
+    carried = []
+    for candidate in preselected_candidates or []:
+        candidate = copy.deepcopy(candidate)
+        stored = db_manager.get_candidate_by_uuid(candidate.get('uuid'))
+        if stored:
+            candidate['campaign_budget'] = float(stored.get(
+                'current_budget', candidate.get('campaign_budget', 0.0)))
+            candidate['stats'] = stored.get('stats', {})
+            candidate['traits'] = stored.get('traits', candidate.get('traits', []))
+        carried.append(candidate)
+    carried_names = {db_manager.candidate_name_key(c.get('name')) for c in carried}
+    if runoff_winner_name and db_manager.candidate_name_key(runoff_winner_name) not in carried_names:
+        stored = db_manager.get_candidate_by_name(runoff_winner_name)
+        if stored:
+            carried.append({
+                "uuid": stored.get("uuid"), "name": stored.get("name"),
+                "attributes": stored.get("attributes", {}), "gender": stored.get("gender"),
+                "age": stored.get("age"), "party_id": stored.get("party_id"),
+                "campaign_budget": float(stored.get("current_budget", stored.get("initial_budget", 0))),
+                "initial_budget": float(stored.get("initial_budget", 0)),
+                "traits": stored.get("traits", []), "stats": stored.get("stats", {})})
+    return carried
+
+
+def run_election_simulation(election_attempt, preselected_candidates_info_gui, runoff_carryover_winner_name, continue_event, running_event, step_by_step_mode, pause_seconds=None, sim_config=None, run_id=None, snapshot_dir=None, export_record=None):
     """
     Orchestra un tentativo di simulazione. Aggiorna statistiche. SENZA LLM.
     Include debug dettagliato e controlli robustezza.
+    `pause_seconds` sostituisce GOVERNOR_PAUSE_SECONDS (0 = nessuna pausa, es. headless).
+    `sim_config` è la SimulationConfig del tentativo (default: config.DEFAULT_CONFIG).
+    `run_id` identifica la serie di tentativi nello storico round_results
+    (default: SESSION_RUN_ID).
+    `snapshot_dir` attiva le istantanee per round dello stato elettori
+    (default: config.SNAPSHOT_DIR; None = disattivate).
+    `export_record` (export.AttemptRecord, opzionale) viene riempito con i dati
+    del tentativo per l'esportazione colonnare.
+    Restituisce un dict con l'esito del tentativo (None su errore critico).
     """
+    cfg = config.resolve(sim_config)
+    run_id = run_id or SESSION_RUN_ID
     governor_elected_name = None
+    attempt_result = {"run_id": run_id, "attempt": election_attempt, "config_seed": cfg.seed, "elected": False, "governor": None,
+                      "reason": None, "rounds": 0, "candidates": [], "final_results": {}}
+    if pause_seconds is None:
+        pause_seconds = config.GOVERNOR_PAUSE_SECONDS
     if running_event is None:
         running_event = threading.Event()
-    if utils.simulation_running_event is None:
+    if getattr(utils, 'simulation_running_event', None) is None:
         utils.simulation_running_event = running_event
+    # Incrementi delle statistiche accumulati e consegnati allo scrittore (uno per round)
+    stats_accumulator = db_manager.StatsAccumulator(sink=db_writer.update_candidate_stats_batch)
+    if snapshot_dir is None:
+        snapshot_dir = config.SNAPSHOT_DIR
+    snapshot_recorder = None
 
-    # DEBUG
-    print(
-        f"\nDEBUG: +++ Entered run_election_simulation for Attempt {election_attempt} +++")
+    if log.debug:
+        log.write(f"\nDEBUG: +++ Entered run_election_simulation for Attempt {election_attempt} +++")
 
     try:
-        # DEBUG
-        print(f"DEBUG: Attempt {election_attempt}: Setting running_event...")
+        if log.debug:
+            log.write(f"DEBUG: Attempt {election_attempt}: Setting running_event...")
         running_event.set()
 
-        # DEBUG
-        print(
-            f"DEBUG: Attempt {election_attempt}: Sending initial status updates via queue...")
+        if log.debug:
+            log.write(f"DEBUG: Attempt {election_attempt}: Sending initial status updates via queue...")
         utils.send_pygame_update(utils.UPDATE_TYPE_STATUS, {
                                  "attempt": election_attempt, "phase": "Initializing", "round": 0, "status": "Starting..."})
         utils.send_pygame_update(
             utils.UPDATE_TYPE_MESSAGE, f"Attempt {election_attempt} starting...")
-        # DEBUG
-        print(
-            f"DEBUG: Attempt {election_attempt}: Initial updates supposedly sent.")
+        if log.debug:
+            log.write(f"DEBUG: Attempt {election_attempt}: Initial updates supposedly sent.")
 
         # 1. Inizializzazione
-        # DEBUG
-        print(f"DEBUG: Attempt {election_attempt}: Initializing DB...")
+        if log.debug:
+            log.write(f"DEBUG: Attempt {election_attempt}: Initializing DB...")
         db_manager.create_tables()
-        # DEBUG
-        print(f"DEBUG: Attempt {election_attempt}: Generating electors...")
+        if log.debug:
+            log.write(f"DEBUG: Attempt {election_attempt}: Generating electors...")
         grand_electors_struct = generation.generate_grand_electors(
-            config.NUM_GRAND_ELECTORS)
+            cfg.NUM_GRAND_ELECTORS, sim_config=cfg)
         elector_ids = [e_struct['id'] for e_struct in grand_electors_struct]
         social_network_graph = None
-        if config.USE_SOCIAL_NETWORK:
+        if cfg.USE_SOCIAL_NETWORK:
             social_network_graph = generation.create_elector_network(
-                elector_ids)
+                elector_ids, sim_config=cfg)
 
         # Gestione Candidati e STATS Iniziali
         current_candidates_info = []
         # ... (Logica popolazione current_candidates_info come prima) ...
         if preselected_candidates_info_gui:
             # etc.
-            current_candidates_info = copy.deepcopy(
-                preselected_candidates_info_gui)
+            current_candidates_info = load_carryover_candidates(
+                preselected_candidates_info_gui, runoff_carryover_winner_name)
         else:
             # etc.
-            current_candidates_info = generation.generate_candidates(...);
+            # Fase 1: i vincitori distrettuali diventano i candidati governatore
+            current_candidates_info = run_district_phase(election_attempt, sim_config=cfg)
         if not current_candidates_info:
             utils.send_pygame_update(
                 utils.UPDATE_TYPE_ERROR, "No candidates available.")
             running_event.clear(); return
+        attempt_result["candidates"] = [c.get('name') for c in current_candidates_info]
+        if export_record is not None:
+            export_record.set_candidates(current_candidates_info)
 
-        participating_uuids_in_attempt = []
-        # ... (Logica aggiornamento stats partecipazione e init budget/stats come prima) ...
+        participating_uuids_in_attempt = [
+            c.get('uuid') for c in current_candidates_info if c.get('uuid')]
+        uuid_by_candidate_name = {
+            c.get('name'): c.get('uuid') for c in current_candidates_info if c.get('uuid')}
+        for c_uuid_attempt in participating_uuids_in_attempt:
+            stats_accumulator.add(c_uuid_attempt, {'total_elections_participated': 1})
 
         # Inizializza preferenze elettori
-        # DEBUG
-        print(
-            f"DEBUG: Attempt {election_attempt}: Initializing elector preferences...")
+        if log.debug:
+            log.write(f"DEBUG: Attempt {election_attempt}: Initializing elector preferences...")
         elector_preferences_data = voting.initialize_elector_preferences(
-            grand_electors_struct, current_candidates_info, preselected_candidates_info_gui)
+            grand_electors_struct, current_candidates_info, preselected_candidates_info_gui,
+            sim_config=cfg)
         # Controllo Robusto 1
         if elector_preferences_data is None:  # pragma: no cover
             error_msg = f"Critical Error: Failed to initialize elector preferences (Attempt {election_attempt})."
             utils.send_pygame_update(utils.UPDATE_TYPE_ERROR, error_msg)
-            print(f"ERROR: {error_msg}"); running_event.clear(); return
-        # DEBUG
-        print(
-            f"DEBUG: Attempt {election_attempt}: Initialization complete. Prefs type: {type(elector_preferences_data)}, Num prefs: {len(elector_preferences_data)}")
+            if log.error:
+                log.write(f"ERROR: {error_msg}", simlog.ERROR)
+            running_event.clear(); return
+        if log.debug:
+            log.write(f"DEBUG: Attempt {election_attempt}: Initialization complete. Prefs type: {type(elector_preferences_data)}, Num prefs: {len(elector_preferences_data)}, Leanings shape: {elector_preferences_data.leanings.shape}")
+
+        if snapshot_dir:
+            snapshot_recorder = snapshots.SnapshotRecorder(
+                snapshots.snapshot_path(snapshot_dir, run_id, election_attempt),
+                elector_preferences_data, cfg.MAX_TOTAL_ROUNDS,
+                run_id=run_id, attempt=election_attempt)
+            attempt_result["snapshot_file"] = snapshot_recorder.path
+
+        # Adiacenza CSR costruita una sola volta per tentativo
+        social_engine = None
+        if social_network_graph is not None:
+            social_engine = social_influence.SocialInfluenceEngine(
+                social_network_graph, elector_preferences_data.elector_ids, sim_config=cfg)
 
         last_round_results_counter = Counter()
 
         # --- Ciclo Principale dell'Elezione ---
-        # DEBUG
-        print(
-            f"DEBUG: Attempt {election_attempt}: Entering main round loop...")
-        for current_round_num in range(config.MAX_TOTAL_ROUNDS):
+        if log.debug:
+            log.write(f"DEBUG: Attempt {election_attempt}: Entering main round loop...")
+        for current_round_num in range(cfg.MAX_TOTAL_ROUNDS):
             round_display_num = current_round_num + 1
-            # DEBUG
-            print(
-                f"\n----- DEBUG: Attempt {election_attempt}: Starting Round {round_display_num} -----")
+            if log.debug:
+                log.write(f"\n----- DEBUG: Attempt {election_attempt}: Starting Round {round_display_num} -----")
             if not running_event.is_set():
-                print("DEBUG: Stop signal received at round start.")
+                if log.debug:
+                    log.write("DEBUG: Stop signal received at round start.")
                 break
 
             utils.send_pygame_update(utils.UPDATE_TYPE_STATUS, {
                                      "phase": "Governor Election", "round": round_display_num, "status": "Processing Round..."})
 
             # STATS: Aggiorna partecipazione al round
-            # DEBUG
-            print(
-                f"DEBUG Rd {round_display_num}: Updating round participation stats...")
-            for c_info_round_start in current_candidates_info:
-                c_uuid_round_start = c_info_round_start.get('uuid')
-                if c_uuid_round_start and c_uuid_round_start in participating_uuids_in_attempt:
-                     db_manager.update_candidate_stats(
-                         c_uuid_round_start, {'rounds_participated_all_time': 1})
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Updating round participation stats...")
+            for c_uuid_round_start in participating_uuids_in_attempt:
+                stats_accumulator.add(
+                    c_uuid_round_start, {'rounds_participated_all_time': 1})
 
             # FASE: Strategie Candidati
-            # DEBUG
-            print(f"DEBUG Rd {round_display_num}: Adapting Strategies...")
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Adapting Strategies...")
             utils.send_pygame_update(utils.UPDATE_TYPE_STATUS, {
                                      "status": "Adapting Strategies..."})
             if hasattr(voting, 'analyze_competition_and_adapt_strategy'):
@@ -152,145 +258,163 @@ def run_election_simulation(election_attempt, preselected_candidates_info_gui, r
                     if not running_event.is_set():
                         break
                     voting.analyze_competition_and_adapt_strategy(
-                        cand_info_strat, current_candidates_info, last_round_results_counter, round_display_num)
+                        cand_info_strat, current_candidates_info, last_round_results_counter, round_display_num,
+                        sim_config=cfg)
             if not running_event.is_set():
-                print("DEBUG: Stop signal after strategy.")
+                if log.debug:
+                    log.write("DEBUG: Stop signal after strategy.")
                 break
-            # DEBUG
-            print(
-                f"DEBUG Rd {round_display_num}: Finished Adapting Strategies.")
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Finished Adapting Strategies.")
 
             # FASE: Campagna
-            # DEBUG
-            print(f"DEBUG Rd {round_display_num}: Simulating Campaigning...")
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Simulating Campaigning...")
             utils.send_pygame_update(utils.UPDATE_TYPE_STATUS, {
                                      "status": "Campaigning..."})
             if hasattr(voting, 'simulate_campaigning'):
                 voting.simulate_campaigning(
-                    current_candidates_info, grand_electors_struct, elector_preferences_data, last_round_results_counter)
+                    current_candidates_info, grand_electors_struct, elector_preferences_data, last_round_results_counter,
+                    sim_config=cfg)
             if not running_event.is_set():
-                print("DEBUG: Stop signal after campaigning.")
+                if log.debug:
+                    log.write("DEBUG: Stop signal after campaigning.")
                 break
-            # DEBUG
-            print(f"DEBUG Rd {round_display_num}: Finished Campaigning.")
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Finished Campaigning.")
 
             # FASE: Eventi Casuali
-            # DEBUG
-            print(f"DEBUG Rd {round_display_num}: Generating Random Event...")
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Generating Random Event...")
             utils.send_pygame_update(utils.UPDATE_TYPE_STATUS, {
                                      "status": "Processing Random Events..."})
             generate_random_event(
-                current_candidates_info, elector_preferences_data, last_round_results_counter)
+                current_candidates_info, elector_preferences_data, last_round_results_counter, sim_config=cfg)
             if not running_event.is_set():
-                print("DEBUG: Stop signal after random events.")
+                if log.debug:
+                    log.write("DEBUG: Stop signal after random events.")
                 break
-            # DEBUG
-            print(f"DEBUG Rd {round_display_num}: Finished Random Event.")
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Finished Random Event.")
 
             # FASE: Media Influence
-            # DEBUG
-            print(
-                f"DEBUG Rd {round_display_num}: Simulating Media Influence...")
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Simulating Media Influence...")
             utils.send_pygame_update(utils.UPDATE_TYPE_STATUS, {
                                      "status": "Simulating Media Influence..."})
             if hasattr(voting, 'simulate_media_influence'):
                 voting.simulate_media_influence(
                     current_candidates_info, elector_preferences_data)
             if not running_event.is_set():
-                print("DEBUG: Stop signal after media influence.")
+                if log.debug:
+                    log.write("DEBUG: Stop signal after media influence.")
                 break
-            # DEBUG
-            print(f"DEBUG Rd {round_display_num}: Finished Media Influence.")
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Finished Media Influence.")
 
             # FASE: Influenza Sociale
-            # DEBUG
-            print(
-                f"DEBUG Rd {round_display_num}: Simulating Social Influence...")
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Simulating Social Influence...")
             utils.send_pygame_update(utils.UPDATE_TYPE_STATUS, {
                                      "status": "Simulating Social Influence..."})
-            if config.USE_SOCIAL_NETWORK and social_network_graph:
-                # DEBUG
-                print(
-                    f"DEBUG Rd {round_display_num}: Calling simulate_social_influence. Prefs type before: {type(elector_preferences_data)}")
+            if cfg.USE_SOCIAL_NETWORK and social_network_graph:
+                if log.debug:
+                    log.write(f"DEBUG Rd {round_display_num}: Calling simulate_social_influence. Prefs type before: {type(elector_preferences_data)}")
                 try:
-                     if hasattr(voting, 'simulate_social_influence'):
-                         result_social_influence = voting.simulate_social_influence(
-                              social_network_graph, elector_preferences_data)
-                          # DEBUG
-                          print(
-                              f"DEBUG Rd {round_display_num}: simulate_social_influence returned type: {type(result_social_influence)}")
-                          # Controllo Robusto 2
-                          if result_social_influence is None:  # pragma: no cover
-                              error_msg = f"Critical Error: Social influence returned None in Round {round_display_num} (Attempt {election_attempt})."
-                              utils.send_pygame_update(
-                                  utils.UPDATE_TYPE_ERROR, error_msg)
-                              print(f"ERROR: {error_msg}"); running_event.clear(); return
-                          else:
-                              elector_preferences_data = result_social_influence
-                      # else: warning?
-                 except Exception as e_social:  # pragma: no cover
-                     tb_social = traceback.format_exc()
-                      error_msg = f"Error during social influence call: {e_social}\n{tb_social}"
-                      utils.send_pygame_update(utils.UPDATE_TYPE_ERROR, error_msg); print(f"ERROR: {error_msg}"); running_event.clear(); return
+                    if hasattr(voting, 'simulate_social_influence'):
+                        result_social_influence = voting.simulate_social_influence(
+                            social_network_graph, elector_preferences_data, engine=social_engine, sim_config=cfg)
+                        if log.debug:
+                            log.write(f"DEBUG Rd {round_display_num}: simulate_social_influence returned type: {type(result_social_influence)}")
+                        # Controllo Robusto 2
+                        if result_social_influence is None:  # pragma: no cover
+                            error_msg = f"Critical Error: Social influence returned None in Round {round_display_num} (Attempt {election_attempt})."
+                            utils.send_pygame_update(
+                                utils.UPDATE_TYPE_ERROR, error_msg)
+                            if log.error:
+                                log.write(f"ERROR: {error_msg}", simlog.ERROR)
+                            running_event.clear(); return
+                        else:
+                            elector_preferences_data = result_social_influence
+                    # else: warning?
+                except Exception as e_social:  # pragma: no cover
+                    tb_social = traceback.format_exc()
+                    error_msg = f"Error during social influence call: {e_social}\n{tb_social}"
+                    utils.send_pygame_update(utils.UPDATE_TYPE_ERROR, error_msg)
+                    if log.error:
+                        log.write(f"ERROR: {error_msg}", simlog.ERROR)
+                    running_event.clear(); return
             else:
-                print(f"DEBUG Rd {round_display_num}: Social influence skipped (disabled or no graph).")  # DEBUG
+                if log.debug:
+                    log.write(f"DEBUG Rd {round_display_num}: Social influence skipped (disabled or no graph).")
             if not running_event.is_set():
-                print("DEBUG: Stop signal after social influence."); break
-            print(f"DEBUG Rd {round_display_num}: Finished Social Influence.")  # DEBUG
+                if log.debug:
+                    log.write("DEBUG: Stop signal after social influence.")
+                break
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Finished Social Influence.")
 
             # --- Fase di Voto ---
-            # DEBUG
-            print(f"DEBUG Rd {round_display_num}: Starting Voting Phase...")
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Starting Voting Phase...")
             utils.send_pygame_update(utils.UPDATE_TYPE_STATUS, {
                                      "status": "Electors Voting..."})
-            current_round_votes_list = []
             # Controllo Robusto 3
             if elector_preferences_data is None:  # pragma: no cover
                 error_msg = f"Critical Error: elector_preferences_data is None before voting in Round {round_display_num}!"
                 utils.send_pygame_update(utils.UPDATE_TYPE_ERROR, error_msg)
-                print(f"ERROR: {error_msg}"); running_event.clear(); return
-            # DEBUG
-            print(f"DEBUG Rd {round_display_num}: elector_preferences_data type before voting loop: {type(elector_preferences_data)}")
-
-            for elector_struct_vote in grand_electors_struct:
-                if not running_event.is_set():
-                    break
-                elector_id_vote = elector_struct_vote['id']
-                elector_data_vote = elector_preferences_data.get(
-                    elector_id_vote)
-                if elector_data_vote:
-                    # Chiama SEMPRE simulate_ai_vote (versione senza LLM)
-                    vote_cast = voting.simulate_ai_vote(
-                        elector_id_vote, current_candidates_info, elector_data_vote,
-                        last_round_results_counter, round_display_num, current_candidates_info)
-                    if vote_cast:
-                        current_round_votes_list.append(vote_cast)
+                if log.error:
+                    log.write(f"ERROR: {error_msg}", simlog.ERROR)
+                running_event.clear(); return
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: elector_preferences_data type before voting: {type(elector_preferences_data)}")
+
+            # Voto dell'intero Collegio in un'unica chiamata vettoriale
+            current_results_counter = voting.simulate_college_vote_batch(
+                elector_preferences_data, current_candidates_info,
+                last_round_results_counter, round_display_num, sim_config=cfg)
             if not running_event.is_set():
-                print("DEBUG: Stop signal during voting loop."); break
-            print(f"DEBUG Rd {round_display_num}: Finished Voting Loop.")  # DEBUG
+                if log.debug:
+                    log.write("DEBUG: Stop signal during voting.")
+                break
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Finished Voting.")
             # --- Fine Fase di Voto ---
 
             # Conteggio Voti e Aggiornamento Stats Voti
-            # DEBUG
-            print(f"DEBUG Rd {round_display_num}: Counting votes and updating stats...")
-            current_results_counter = voting.count_votes(
-                current_round_votes_list)
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Updating vote stats...")
             if current_results_counter:
                 for cand_name_round, votes_round in current_results_counter.items():
-                    cand_uuid_round_vote = next((c.get('uuid') for c in current_candidates_info if c.get(
-                         'name') == cand_name_round), None)
-                     if cand_uuid_round_vote:
-                         db_manager.update_candidate_stats(
-                             cand_uuid_round_vote, {'total_votes_received_all_time': votes_round})
-            print(f"DEBUG Rd {round_display_num}: Finished counting votes. Results: {current_results_counter.most_common(3)}")  # DEBUG
+                    cand_uuid_round_vote = uuid_by_candidate_name.get(cand_name_round)
+                    if cand_uuid_round_vote:
+                        stats_accumulator.add(
+                            cand_uuid_round_vote, {'total_votes_received_all_time': votes_round})
+            # Un'unica transazione per tutte le statistiche del round
+            stats_accumulator.flush()
+            # Storico del round (voti, quota, budget) per l'analisi a posteriori
+            round_rows = db_manager.round_result_rows(
+                run_id, election_attempt, round_display_num,
+                current_candidates_info, current_results_counter)
+            db_writer.save_round_results(round_rows)
+            if export_record is not None:
+                export_record.add_round(round_rows)
+            if snapshot_recorder is not None:
+                snapshot_recorder.record(round_display_num, elector_preferences_data)
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Finished counting votes. Results: {current_results_counter.most_common(3)}")
+            attempt_result["rounds"] = round_display_num
+            attempt_result["final_results"] = dict(current_results_counter)
 
             # Identifica Elettori Chiave
             if elector_preferences_data and current_results_counter and hasattr(voting, 'identify_key_electors'):
                 key_electors_list_data = voting.identify_key_electors(
-                    elector_preferences_data, current_results_counter)
+                    elector_preferences_data, current_results_counter, sim_config=cfg)
                 if key_electors_list_data:
-                     utils.send_pygame_update(
-                         utils.UPDATE_TYPE_KEY_ELECTORS, key_electors_list_data)
+                    utils.send_pygame_update(
+                        utils.UPDATE_TYPE_KEY_ELECTORS, key_electors_list_data)
+                if export_record is not None:
+                    export_record.add_key_electors(round_display_num, key_electors_list_data)
 
             last_round_results_counter = current_results_counter
 
@@ -298,25 +422,25 @@ def run_election_simulation(election_attempt, preselected_candidates_info_gui, r
             # ... (come prima) ...
 
             # Verifica Elezione
-            # DEBUG
-            print(f"DEBUG Rd {round_display_num}: Verifying election...")
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Verifying election...")
             governor_elected_name = None
             if hasattr(voting, 'verify_election'):
-                current_majority_threshold = config.REQUIRED_MAJORITY if election_attempt < 3 else config.REQUIRED_MAJORITY_ATTEMPT_4
+                current_majority_threshold = cfg.REQUIRED_MAJORITY if election_attempt < 3 else cfg.REQUIRED_MAJORITY_ATTEMPT_4
                 governor_elected_name, _, _ = voting.verify_election(
-                     current_results_counter, config.NUM_GRAND_ELECTORS, current_majority_threshold)
-                 # DEBUG
-                 print(f"DEBUG Rd {round_display_num}: Verification result - Governor Elected: {governor_elected_name}")
-                 if governor_elected_name:
-                     break
+                    current_results_counter, cfg.NUM_GRAND_ELECTORS, current_majority_threshold)
+                if log.debug:
+                    log.write(f"DEBUG Rd {round_display_num}: Verification result - Governor Elected: {governor_elected_name}")
+                if governor_elected_name:
+                    break
             # else: log errore?
 
             # Controllo max round normali
             # ... (come prima) ...
 
             # Gestione Step-by-Step / Pausa
-            # DEBUG
-            print(f"DEBUG Rd {round_display_num}: Reached end of round logic (step/pause).")
+            if log.debug:
+                log.write(f"DEBUG Rd {round_display_num}: Reached end of round logic (step/pause).")
             if step_by_step_mode:
                 utils.send_pygame_update(utils.UPDATE_TYPE_STATUS, {
                                          "status": "Waiting for Next Round"})
@@ -329,48 +453,66 @@ def run_election_simulation(election_attempt, preselected_candidates_info_gui, r
             else:
                 if not running_event.is_set():
                     break
-                time.sleep(config.GOVERNOR_PAUSE_SECONDS)
+                if pause_seconds > 0:
+                    time.sleep(pause_seconds)
 
-            # DEBUG
-            print(f"DEBUG: Attempt {election_attempt}: Finished Round {round_display_num}.")
+            if log.debug:
+                log.write(f"DEBUG: Attempt {election_attempt}: Finished Round {round_display_num}.")
         # --- Fine Ciclo dei Round ---
 
-        # DEBUG
-        print(f"DEBUG: Attempt {election_attempt}: Exited main round loop.")
+        if log.debug:
+            log.write(f"DEBUG: Attempt {election_attempt}: Exited main round loop.")
 
         # --- STATS: Aggiorna Vittorie/Sconfitte ---
-        # DEBUG
-        print(f"DEBUG: Attempt {election_attempt}: Updating Win/Loss stats...")
+        if log.debug:
+            log.write(f"DEBUG: Attempt {election_attempt}: Updating Win/Loss stats...")
         if running_event.is_set():  # Solo se non fermato
             if governor_elected_name:
-                # ... (Logica stats vittoria/sconfitta come prima) ...
+                attempt_result.update(
+                    elected=True, governor=governor_elected_name, reason="Elected")
+                for cand_name_final, c_uuid_final in uuid_by_candidate_name.items():
+                    stats_accumulator.add(c_uuid_final, {
+                        'governor_wins' if cand_name_final == governor_elected_name else 'election_losses': 1})
                 utils.send_pygame_update(
                     utils.UPDATE_TYPE_MESSAGE, f"GOVERNOR {governor_elected_name.upper()} ELECTED! (Attempt {election_attempt})")
                 utils.send_pygame_update(utils.UPDATE_TYPE_COMPLETE, {
                                           "elected": True, "governor": governor_elected_name})
-                 # ... (aggiorna DB stats) ...
             else:  # Deadlock
-                # ... (Logica stats sconfitta per tutti come prima) ...
+                attempt_result["reason"] = "Deadlock"
+                for c_uuid_final in participating_uuids_in_attempt:
+                    stats_accumulator.add(c_uuid_final, {'election_losses': 1})
                 utils.send_pygame_update(
                     utils.UPDATE_TYPE_MESSAGE, f"Attempt {election_attempt}: Deadlock after {current_round_num + 1} rounds.")
                 utils.send_pygame_update(utils.UPDATE_TYPE_COMPLETE, {
                                           "elected": False, "governor": None, "reason": "Deadlock"})
-                 # ... (aggiorna DB stats) ...
         elif not governor_elected_name:  # Fermato dall'utente
+            attempt_result["reason"] = "Stopped"
             utils.send_pygame_update(
                 utils.UPDATE_TYPE_MESSAGE, "Simulation stopped by user.")
             utils.send_pygame_update(utils.UPDATE_TYPE_STATUS, {
                                       "status": "Stopped by user"})
-        # DEBUG
-        print(f"DEBUG: Attempt {election_attempt}: Finished updating Win/Loss stats.")
+        if log.debug:
+            log.write(f"DEBUG: Attempt {election_attempt}: Finished updating Win/Loss stats.")
+        if export_record is not None:
+            export_record.finish(elector_preferences_data, current_candidates_info,
+                                 attempt_result["final_results"], attempt_result["governor"])
 
     except Exception as e_sim:  # pragma: no cover
         tb_str = traceback.format_exc()
         error_message_sim = f"CRITICAL error in run_election_simulation (Attempt {election_attempt}): {str(e_sim)}\n{tb_str}"
         utils.send_pygame_update(utils.UPDATE_TYPE_ERROR, error_message_sim)
-        print(error_message_sim)
+        if log.error:
+            log.write(error_message_sim, simlog.ERROR)
+        attempt_result = None
     finally:
-        # DEBUG
-        print(f"DEBUG: Attempt {election_attempt}: run_election_simulation finally block reached. Clearing running_event.")
+        # Scrive gli incrementi rimasti (esito finale, round interrotto) e
+        # attende lo scrittore: a fine tentativo il database è aggiornato
+        stats_accumulator.flush()
+        db_writer.end_attempt()
+        if snapshot_recorder is not None:
+            snapshot_recorder.close()
+        if log.debug:
+            log.write(f"DEBUG: Attempt {election_attempt}: run_election_simulation finally block reached. Clearing running_event.")
         if running_event:
-            running_event.clear()
\ No newline at end of file
+            running_event.clear()
+    return attempt_result
@@ -0,0 +1,280 @@
+# elector_state.py
+"""
+Stato colonnare (structure-of-arrays) dei Grand Electors.
+
+Sostituisce il vecchio dizionario {elector_id: {...}} con matrici NumPy
+indicizzate per intero (riga = elettore, colonna = candidato/attributo).
+Per i chiamanti esistenti resta disponibile una vista compatibile con dict:
+`state[elector_id]` restituisce un mapping con le stesse chiavi di prima
+('leanings', 'weights', 'traits', 'identity_weight', ...) che scrive
+direttamente negli array sottostanti.
+"""
+from collections.abc import Mapping, MutableMapping
+
+import numpy as np
+
+import config
+import simlog
+
+log = simlog.get("elector_state")
+
+# Ordine canonico delle colonne attributo (weights / ideal_preferences)
+ATTRIBUTE_KEYS = ("administrative_experience", "social_vision",
+                  "mediation_ability", "ethical_integrity")
+
+
+class _RowView(MutableMapping):
+    """Vista dict su una riga di una matrice (chiave -> colonna), write-through."""
+
+    __slots__ = ("_row", "_index")
+
+    def __init__(self, row, index):
+        self._row = row  # Vista NumPy della riga, non una copia
+        self._index = index
+
+    def __getitem__(self, key):
+        return self._row[self._index[key]].item()
+
+    def __setitem__(self, key, value):
+        col = self._index.get(key)
+        if col is None:
+            raise KeyError(key)  # Le colonne sono fisse per il tentativo
+        self._row[col] = value
+
+    def __delitem__(self, key):
+        raise TypeError("Columns of ElectorState cannot be deleted.")
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class ElectorView(MutableMapping):
+    """Vista dict compatibile su un singolo elettore di un ElectorState."""
+
+    __slots__ = ("_state", "row")
+
+    _SCALAR_FIELDS = ("identity_weight", "policy_weight", "media_literacy",
+                      "media_preference_bias")
+
+    def __init__(self, state, row):
+        self._state = state
+        self.row = row
+
+    def _keys(self):
+        return ("id", "weights", "leanings", "initial_leanings", "traits",
+                "party_preference") + self._SCALAR_FIELDS + tuple(
+                    f"preference_{attr}" for attr in ATTRIBUTE_KEYS)
+
+    def __getitem__(self, key):
+        state, row = self._state, self.row
+        if key == "id":
+            return state.elector_ids[row]
+        if key == "leanings":
+            return _RowView(state.leanings[row], state.candidate_index)
+        if key == "initial_leanings":
+            return _RowView(state.initial_leanings[row], state.candidate_index)
+        if key == "weights":
+            return _RowView(state.weights[row], state.attribute_index)
+        if key == "traits":
+            return state.traits[row]
+        if key == "party_preference":
+            return state.party_ids[state.party_preference[row]]
+        if key in self._SCALAR_FIELDS:
+            return getattr(state, key)[row].item()
+        if key.startswith("preference_"):
+            col = state.attribute_index.get(key[len("preference_"):])
+            if col is not None:
+                return state.ideal_preferences[row, col].item()
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        state, row = self._state, self.row
+        if key in ("leanings", "initial_leanings", "weights"):
+            target = self[key]
+            for k, v in value.items():
+                target[k] = v
+        elif key == "traits":
+            state.set_traits(row, value)
+        elif key == "party_preference":
+            state.party_preference[row] = state.party_ids.index(value)
+        elif key in self._SCALAR_FIELDS:
+            getattr(state, key)[row] = value
+        elif key.startswith("preference_") and key[len("preference_"):] in state.attribute_index:
+            state.ideal_preferences[row, state.attribute_index[key[len(
+                "preference_"):]]] = value
+        else:
+            raise KeyError(key)
+
+    def __delitem__(self, key):
+        raise TypeError("Fields of ElectorState cannot be deleted.")
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+    def __repr__(self):
+        return f"ElectorView({self._state.elector_ids[self.row]!r})"
+
+
+class ElectorState(Mapping):
+    """
+    Stato di tutti gli elettori del Collegio per un tentativo.
+
+    Array principali (E = elettori, C = candidati, A = attributi):
+      leanings, initial_leanings  -> (E, C) float64
+      weights, ideal_preferences  -> (E, A) int16
+      identity_weight, policy_weight, media_preference_bias -> (E,) float64
+      media_literacy              -> (E,) int16
+      party_preference            -> (E,) int16, indice in party_ids
+      trait_mask                  -> (E, T) bool, colonne = trait_names
+    """
+
+    def __init__(self, elector_ids, candidate_names, traits=None, sim_config=None):
+        cfg = config.resolve(sim_config)
+        self.elector_ids = list(elector_ids)
+        self.candidate_names = list(candidate_names)
+        self.elector_index = {e_id: i for i, e_id in enumerate(self.elector_ids)}
+        self.candidate_index = {name: i for i, name in enumerate(self.candidate_names)}
+        self.attribute_index = {attr: i for i, attr in enumerate(ATTRIBUTE_KEYS)}
+        self.party_ids = list(cfg.PARTY_IDS)
+        self.trait_names = list(cfg.ELECTOR_TRAITS)
+        self.trait_index = {t: i for i, t in enumerate(self.trait_names)}
+
+        n_e, n_c, n_a = len(self.elector_ids), len(self.candidate_names), len(ATTRIBUTE_KEYS)
+        self.leanings = np.zeros((n_e, n_c), dtype=np.float64)
+        self.initial_leanings = np.zeros((n_e, n_c), dtype=np.float64)
+        self.weights = np.zeros((n_e, n_a), dtype=np.int16)
+        self.ideal_preferences = np.zeros((n_e, n_a), dtype=np.int16)
+        self.identity_weight = np.zeros(n_e, dtype=np.float64)
+        self.policy_weight = np.ones(n_e, dtype=np.float64)
+        self.media_literacy = np.zeros(n_e, dtype=np.int16)
+        self.media_preference_bias = np.zeros(n_e, dtype=np.float64)
+        self.party_preference = np.zeros(n_e, dtype=np.int16)
+        self.trait_mask = np.zeros((n_e, len(self.trait_names)), dtype=bool)
+        self.traits = [[] for _ in range(n_e)]
+        if traits is not None:
+            for row, elector_traits in enumerate(traits):
+                self.set_traits(row, elector_traits)
+
+    # --- Accesso per indice ---
+
+    @property
+    def num_electors(self):
+        return len(self.elector_ids)
+
+    @property
+    def num_candidates(self):
+        return len(self.candidate_names)
+
+    def set_traits(self, row, elector_traits):
+        """Aggiorna lista tratti e maschera booleana di un elettore."""
+        elector_traits = list(elector_traits) if isinstance(
+            elector_traits, (list, tuple)) else []
+        self.traits[row] = elector_traits
+        self.trait_mask[row, :] = False
+        for trait in elector_traits:
+            col = self.trait_index.get(trait)
+            if col is not None:
+                self.trait_mask[row, col] = True
+
+    def has_trait(self, trait):
+        """Vettore booleano (E,) degli elettori che hanno il tratto."""
+        col = self.trait_index.get(trait)
+        if col is None:
+            return np.zeros(self.num_electors, dtype=bool)
+        return self.trait_mask[:, col]
+
+    def has_trait_at(self, row, trait):
+        col = self.trait_index.get(trait)
+        return col is not None and bool(self.trait_mask[row, col])
+
+    def candidate_columns(self, names):
+        """Indici colonna dei nomi dati (ignora i nomi sconosciuti)."""
+        return np.array([self.candidate_index[n] for n in names if n in self.candidate_index],
+                        dtype=np.intp)
+
+    def view(self, row):
+        """Vista dict compatibile dell'elettore alla riga `row`."""
+        return ElectorView(self, row)
+
+    # --- Interfaccia Mapping (compatibilità con il vecchio dict) ---
+
+    def __getitem__(self, elector_id):
+        return ElectorView(self, self.elector_index[elector_id])
+
+    def __iter__(self):
+        return iter(self.elector_ids)
+
+    def __len__(self):
+        return len(self.elector_ids)
+
+    def __contains__(self, elector_id):
+        return elector_id in self.elector_index
+
+    # --- Copie ---
+
+    def copy(self):
+        """Copia profonda degli array (molto più economica di copy.deepcopy sul dict)."""
+        clone = object.__new__(ElectorState)
+        for name, value in self.__dict__.items():
+            if isinstance(value, np.ndarray):
+                value = value.copy()
+            elif name == "traits":
+                value = [list(t) for t in value]
+            clone.__dict__[name] = value
+        return clone
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    @classmethod
+    def from_dict(cls, preferences, sim_config=None):
+        """
+        Costruisce lo stato dal vecchio formato dict-of-dicts {elector_id: {...}}
+        (inverso di to_dict). Candidati nell'ordine in cui compaiono nei
+        'leanings'. Le chiavi sconosciute vengono saltate; i valori non
+        convertibili restano a zero e vengono segnalati nel log.
+        """
+        if isinstance(preferences, ElectorState):
+            return preferences
+        entries = [(e_id, data) for e_id, data in preferences.items() if isinstance(data, Mapping)]
+        candidate_names = list(dict.fromkeys(
+            name for _, data in entries for name in (data.get("leanings") or {})))
+        state = cls([e_id for e_id, _ in entries], candidate_names,
+                    traits=[data.get("traits", []) for _, data in entries], sim_config=sim_config)
+        for row, (_, data) in enumerate(entries):
+            e_view = state.view(row)
+            for key, value in data.items():
+                if key in ("id", "traits") or key not in e_view:
+                    continue  # Chiave sconosciuta (o già gestita)
+                try:
+                    e_view[key] = value
+                except (KeyError, ValueError, TypeError, AttributeError) as e_value:
+                    if log.warning:
+                        log.write(f"Warning: elector {state.elector_ids[row]!r}: cannot convert "
+                                  f"{key}={value!r} ({type(e_value).__name__}: {e_value})",
+                                  simlog.WARNING)
+        return state
+
+    def to_dict(self):
+        """Esporta il vecchio formato dict-of-dicts (solo per debug/serializzazione)."""
+        snapshot = {}
+        for row, e_id in enumerate(self.elector_ids):
+            e_view = self.view(row)
+            e_dict = dict(e_view)
+            for key in ("leanings", "initial_leanings", "weights"):
+                e_dict[key] = dict(e_view[key])
+            e_dict["traits"] = list(self.traits[row])
+            snapshot[e_id] = e_dict
+        return snapshot
@@ -0,0 +1,263 @@
+# ensemble.py
+"""
+Motore Monte Carlo: molte elezioni indipendenti dello stesso scenario.
+
+Uno scenario è una SimulationConfig (più eventuali override) e,
+opzionalmente, una lista di candidati preselezionati.
+Le repliche girano in un ProcessPoolExecutor; ogni replica riceve un flusso
+RNG indipendente (SeedSequence.spawn) e un proprio file SQLite temporaneo:
+le repliche non si contendono il lock del database e non riutilizzano i
+candidati salvati da altre repliche, quindi il risultato di ognuna dipende
+solo dal suo seed (identico in serie e in parallelo).
+I risultati vengono aggregati man mano che arrivano (EnsembleAggregator):
+la memoria non cresce con il numero di repliche.
+Con `export_dir` ogni replica restituisce anche un export.AttemptRecord che
+il processo principale scrive subito a blocchi (ResultsExporter).
+"""
+import contextlib
+import itertools
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import uuid
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+import config
+import db_manager
+import db_writer
+import district_scheduler
+import election
+import export
+import simlog
+import utils
+
+log = simlog.get("ensemble")
+
+
+class EnsembleAggregator:
+    """Statistiche in streaming sui risultati delle repliche."""
+
+    def __init__(self):
+        self.replicates = 0
+        self.elected = 0
+        self.deadlocks = 0
+        self.errors = 0
+        self.wins = Counter()           # governatore -> vittorie
+        self.appearances = Counter()    # candidato -> repliche in cui era in corsa
+        self.rounds = Counter()         # round alla decisione -> repliche elette
+        self.deadlock_rounds = Counter()
+
+    def add(self, result):
+        self.replicates += 1
+        if result is None or result.get("reason") == "Error":
+            self.errors += 1
+            return
+        self.appearances.update(set(result.get("candidates") or ()))
+        if result.get("elected"):
+            self.elected += 1
+            self.wins[result.get("governor")] += 1
+            self.rounds[result.get("rounds", 0)] += 1
+        else:
+            self.deadlocks += 1
+            self.deadlock_rounds[result.get("rounds", 0)] += 1
+
+    def win_probabilities(self):
+        """Frazione di repliche vinte da ogni candidato."""
+        if not self.replicates:
+            return {}
+        return {name: wins / self.replicates for name, wins in self.wins.most_common()}
+
+    def conditional_win_probabilities(self):
+        """Vittorie / repliche in cui il candidato era in corsa (utile con candidati casuali)."""
+        return {name: wins / self.appearances[name]
+                for name, wins in self.wins.most_common() if self.appearances[name]}
+
+    def rounds_summary(self):
+        if not self.rounds:
+            return {"mean": None, "min": None, "max": None, "histogram": {}}
+        total = sum(self.rounds.values())
+        return {
+            "mean": sum(r * n for r, n in self.rounds.items()) / total,
+            "min": min(self.rounds),
+            "max": max(self.rounds),
+            "histogram": dict(sorted(self.rounds.items())),
+        }
+
+    def summary(self):
+        completed = self.replicates - self.errors
+        return {
+            "replicates": self.replicates,
+            "elected": self.elected,
+            "deadlocks": self.deadlocks,
+            "errors": self.errors,
+            "deadlock_rate": self.deadlocks / completed if completed else None,
+            "win_probabilities": self.win_probabilities(),
+            "conditional_win_probabilities": self.conditional_win_probabilities(),
+            "rounds_to_decision": self.rounds_summary(),
+        }
+
+
+def _prepare_process():
+    """Configura il processo corrente per le repliche (headless, niente pool annidati)."""
+    config.DISTRICT_WORKERS = 1
+    utils.HEADLESS = True
+    simlog.disable()  # Nessuna formattazione né scrittura dei messaggi di log
+
+
+def _run_replicate(task):
+    (replicate_index, seed_seq, sim_config, election_attempt, preselected_candidates,
+     database_dir, export_run_prefix) = task
+    run_id = f"{export_run_prefix or 'replicate'}-{replicate_index}"
+    record = export.AttemptRecord(run_id, election_attempt) if export_run_prefix else None
+    running_event = threading.Event()
+    # voting controlla utils.simulation_running_event: deve essere quello della replica
+    utils.simulation_running_event = running_event
+    continue_event = threading.Event()
+    continue_event.set()
+    random.seed(int(seed_seq.generate_state(1, np.uint64)[0]))
+    db_manager.DATABASE_FILE = os.path.join(database_dir, f"replicate_{replicate_index}.db")
+    try:
+        result = election.run_election_simulation(
+            election_attempt=election_attempt,
+            preselected_candidates_info_gui=preselected_candidates,
+            runoff_carryover_winner_name=None, continue_event=continue_event,
+            running_event=running_event, step_by_step_mode=False, pause_seconds=0,
+            sim_config=sim_config, run_id=run_id, export_record=record)
+    finally:
+        # Scrittore svuotato e connessioni chiuse prima di cancellare il file (e i file WAL)
+        db_writer.flush(release_connection=True)
+        db_manager.close_db_connection()
+        for suffix in ("", "-wal", "-shm"):
+            with contextlib.suppress(OSError):
+                os.remove(db_manager.DATABASE_FILE + suffix)
+    if result is None:
+        return {"replicate": replicate_index, "reason": "Error"}
+    # Solo i campi necessari all'aggregazione (e all'esportazione) tornano al processo principale
+    compact = {
+        "replicate": replicate_index,
+        "elected": result.get("elected", False),
+        "governor": result.get("governor"),
+        "reason": result.get("reason"),
+        "rounds": result.get("rounds", 0),
+        "candidates": result.get("candidates", []),
+    }
+    if record is not None:
+        compact["export"] = record
+    return compact
+
+
+def _iter_tasks(replicates, seed, sim_config, election_attempt, preselected_candidates, database_dir,
+                export_run_prefix=None):
+    if seed is None:
+        seed = random.getrandbits(64)  # Riproducibile via random.seed()
+    root = np.random.SeedSequence(seed)
+    for replicate_index in range(replicates):
+        # Un figlio alla volta: nessuna lista di seed grande quanto l'ensemble
+        yield (replicate_index, root.spawn(1)[0], sim_config, election_attempt,
+               preselected_candidates, database_dir, export_run_prefix)
+
+
+def _run_serial(tasks, on_result):
+    saved = {"headless": utils.HEADLESS, "database": db_manager.DATABASE_FILE,
+             "district_workers": config.DISTRICT_WORKERS,
+             "event": getattr(utils, "simulation_running_event", None),
+             "log": simlog.current_settings()}
+    try:
+        _prepare_process()
+        for task in tasks:
+            on_result(_run_replicate(task))
+    finally:
+        utils.HEADLESS = saved["headless"]
+        db_manager.DATABASE_FILE = saved["database"]
+        config.DISTRICT_WORKERS = saved["district_workers"]
+        utils.simulation_running_event = saved["event"]
+        simlog.configure(**saved["log"])
+
+
+def _run_parallel(tasks, workers, on_result):
+    """
+    Invia le repliche al pool con una finestra limitata di future pendenti.
+    Se il pool si rompe restituisce le repliche non completate (da eseguire
+    in serie), altrimenti una lista vuota.
+    """
+    max_in_flight = workers * 4
+    in_flight = {}
+    try:
+        executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+            initializer=_prepare_process)
+        with executor:
+            for task in tasks:
+                in_flight[executor.submit(_run_replicate, task)] = task
+                if len(in_flight) >= max_in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        on_result(future.result())
+                        del in_flight[future]
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    on_result(future.result())
+                    del in_flight[future]
+    except (OSError, RuntimeError) as e_pool:  # pragma: no cover
+        if log.warning:
+            log.write(f"Warning: ensemble process pool unavailable ({e_pool}). Running serially.", simlog.WARNING)
+        return sorted(in_flight.values(), key=lambda task: task[0])
+    return []
+
+
+def run_ensemble(replicates, sim_config=None, config_overrides=None, preselected_candidates=None,
+                 election_attempt=1, seed=None, max_workers=None, database_dir=None,
+                 on_result=None, export_dir=None, export_formats=None):
+    """
+    Esegue `replicates` elezioni dello scenario e restituisce l'EnsembleAggregator.
+
+    sim_config: SimulationConfig dello scenario (default: config.DEFAULT_CONFIG).
+    config_overrides: dict {NOME_PARAMETRO: valore} applicato sopra sim_config.
+    preselected_candidates: candidati fissi (altrimenti Fase 1 distrettuale per replica).
+    database_dir: cartella per i DB temporanei delle repliche (default: tempdir di sistema).
+    on_result: callback opzionale per ogni risultato di replica (ordine di completamento).
+    export_dir: se indicato, esporta ogni replica in file colonnari (export.ResultsExporter,
+        run_id '<ensemble>-<replica>'); export_formats come in ResultsExporter.
+    """
+    replicates = max(0, int(replicates))
+    scenario = config.resolve(sim_config)
+    if config_overrides:
+        scenario = scenario.replace(**config_overrides)
+
+    aggregator = EnsembleAggregator()
+    exporter = None
+    export_run_prefix = None
+    if export_dir is not None:
+        exporter = export.ResultsExporter(export_dir, formats=export_formats)
+        export_run_prefix = uuid.uuid4().hex[:12]
+
+    def collect(result):
+        record = result.pop("export", None)
+        if record is not None:
+            exporter.write_attempt(record)
+        aggregator.add(result)
+        if on_result is not None:
+            on_result(result)
+
+    workers = min(district_scheduler.resolve_worker_count(max_workers), max(1, replicates))
+    with contextlib.ExitStack() as stack:
+        if exporter is not None:
+            stack.enter_context(exporter)
+        if database_dir is None:
+            database_dir = stack.enter_context(tempfile.TemporaryDirectory(prefix="ensemble_"))
+        tasks = _iter_tasks(replicates, seed, scenario, election_attempt,
+                            preselected_candidates, database_dir, export_run_prefix)
+        if workers > 1:
+            unfinished = _run_parallel(tasks, workers, collect)
+            if not unfinished:
+                return aggregator
+            # Repliche perse dal pool + quelle non ancora inviate
+            tasks = itertools.chain(unfinished, tasks)
+        _run_serial(tasks, collect)
+    return aggregator
@@ -0,0 +1,224 @@
+# export.py
+"""
+Esportazione colonnare dei risultati delle simulazioni.
+
+Per ogni tentativo run_election_simulation può riempire un AttemptRecord
+(candidati, voti per round, elettori chiave, leanings finali degli
+elettori). ResultsExporter accumula le righe di più tentativi in buffer
+colonnari e, ogni `chunk_rows` righe per tabella, li scrive su disco:
+- NumPy: un file compresso <tabella>-<chunk>.npz per blocco (sempre);
+- Parquet: un row group per blocco in <tabella>.parquet (se pyarrow è
+  installato).
+La memoria resta limitata a un blocco per tabella anche per ensemble da
+decine di migliaia di repliche. read_table() riunisce i blocchi .npz.
+
+Tabelle (formato lungo, una riga per osservazione):
+    candidates:   run_id, attempt, candidate_uuid, name, party_id, gender, age,
+                  initial_budget, final_budget, final_votes, elected
+    rounds:       run_id, attempt, round, candidate_uuid, votes, share, budget_remaining
+    key_electors: run_id, attempt, round, elector_id, easily_influenced,
+                  swing_voter, swing_between, reasons
+    leanings:     run_id, attempt, elector_id, candidate_uuid, leaning
+"""
+import glob
+import json
+import os
+
+import numpy as np
+
+import simlog
+
+# Import opzionale di pyarrow (Parquet)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:  # pragma: no cover
+    HAS_PYARROW = False
+
+log = simlog.get("export")
+
+# Colonne e tipi di ogni tabella ('U' = stringa)
+TABLES = {
+    "candidates": (("run_id", "U"), ("attempt", "i4"), ("candidate_uuid", "U"), ("name", "U"),
+                   ("party_id", "U"), ("gender", "U"), ("age", "i4"),
+                   ("initial_budget", "f8"), ("final_budget", "f8"),
+                   ("final_votes", "i8"), ("elected", "?")),
+    "rounds": (("run_id", "U"), ("attempt", "i4"), ("round", "i4"), ("candidate_uuid", "U"),
+               ("votes", "i8"), ("share", "f8"), ("budget_remaining", "f8")),
+    "key_electors": (("run_id", "U"), ("attempt", "i4"), ("round", "i4"), ("elector_id", "U"),
+                     ("easily_influenced", "?"), ("swing_voter", "?"),
+                     ("swing_between", "?"), ("reasons", "U")),
+    "leanings": (("run_id", "U"), ("attempt", "i4"), ("elector_id", "U"),
+                 ("candidate_uuid", "U"), ("leaning", "f8")),
+}
+# Valori al posto di None nelle colonne numeriche
+_MISSING = {"i4": -1, "i8": -1, "f8": np.nan, "?": False, "U": ""}
+
+DEFAULT_CHUNK_ROWS = 200_000
+
+
+class AttemptRecord:
+    """Dati esportabili di un tentativo, riempiti da run_election_simulation (picklable)."""
+
+    def __init__(self, run_id, attempt):
+        self.run_id = str(run_id)
+        self.attempt = int(attempt)
+        self.candidates = []      # dict dei candidati (campi statici)
+        self.rounds = []          # righe come db_manager.round_result_rows
+        self.key_electors = []    # (round, elector_id, easily, swing, swing_between, reasons)
+        self.governor = None
+        self.final_results = {}
+        self.final_budgets = {}
+        self.candidate_uuids = []  # Ordine delle colonne di final_leanings
+        self.elector_ids = []
+        self.final_leanings = None
+
+    def set_candidates(self, candidates_info):
+        self.candidates = [{key: c.get(key) for key in
+                            ("uuid", "name", "party_id", "gender", "age", "initial_budget")}
+                           for c in candidates_info]
+
+    def add_round(self, round_result_rows):
+        self.rounds.extend(round_result_rows)
+
+    def add_key_electors(self, round_num, key_electors_list):
+        for entry in key_electors_list or ():
+            reasons = entry.get("reasons", [])
+            self.key_electors.append((
+                int(round_num), str(entry.get("id")),
+                "Easily Influenced" in reasons, "Is a Swing Voter" in reasons,
+                any(r.startswith("Swing b/w") for r in reasons), "; ".join(reasons)))
+
+    def finish(self, state, candidates_info, final_results, governor=None):
+        """Stato finale: esito, budget rimasti e copia dei leanings degli elettori."""
+        self.governor = governor
+        self.final_results = dict(final_results or {})
+        self.final_budgets = {c.get('uuid'): c.get('campaign_budget', c.get('current_budget'))
+                              for c in candidates_info}
+        if state is not None:
+            uuid_by_name = {c.get('name'): c.get('uuid') for c in candidates_info}
+            self.candidate_uuids = [uuid_by_name.get(name) or name for name in state.candidate_names]
+            self.elector_ids = [str(e_id) for e_id in state.elector_ids]
+            self.final_leanings = np.array(state.leanings, dtype=np.float64, copy=True)
+
+
+class ResultsExporter:
+    """Scrive AttemptRecord in file colonnari a blocchi (vedi docstring del modulo)."""
+
+    def __init__(self, directory, chunk_rows=DEFAULT_CHUNK_ROWS, formats=None):
+        self.directory = directory
+        self.chunk_rows = max(1, int(chunk_rows))
+        if formats is None:
+            formats = ("npz", "parquet") if HAS_PYARROW else ("npz",)
+        formats = tuple(formats)
+        if "parquet" in formats and not HAS_PYARROW:
+            if log.warning:
+                log.write("Warning: pyarrow not installed, Parquet export disabled.", simlog.WARNING)
+            formats = tuple(f for f in formats if f != "parquet")
+        self.formats = formats
+        os.makedirs(directory, exist_ok=True)
+        self._buffers = {table: {col: [] for col, _ in columns} for table, columns in TABLES.items()}
+        self._chunks_written = {table: 0 for table in TABLES}
+        self._rows_written = {table: 0 for table in TABLES}
+        self._parquet_writers = {}
+        self.attempts_written = 0
+
+    # --- Accodamento righe -----------------------------------------------
+
+    def _append(self, table, *row):
+        for (col, _), value in zip(TABLES[table], row):
+            self._buffers[table][col].append(value)
+
+    def _pending_rows(self, table):
+        return len(self._buffers[table][TABLES[table][0][0]])
+
+    def write_attempt(self, record):
+        run_id, attempt = record.run_id, record.attempt
+        for c in record.candidates:
+            self._append("candidates", run_id, attempt, c.get("uuid"), c.get("name"),
+                         c.get("party_id"), c.get("gender"), c.get("age"),
+                         c.get("initial_budget"), record.final_budgets.get(c.get("uuid")),
+                         record.final_results.get(c.get("name"), 0),
+                         c.get("name") == record.governor)
+        for row in record.rounds:
+            self._append("rounds", *row)
+        for row in record.key_electors:
+            self._append("key_electors", run_id, attempt, *row)
+        if record.final_leanings is not None and record.final_leanings.size:
+            # Formato lungo vettoriale: elettore x candidato
+            n_e, n_c = record.final_leanings.shape
+            buffers = self._buffers["leanings"]
+            buffers["run_id"].extend([run_id] * (n_e * n_c))
+            buffers["attempt"].extend([attempt] * (n_e * n_c))
+            buffers["elector_id"].extend(np.repeat(record.elector_ids, n_c).tolist())
+            buffers["candidate_uuid"].extend(record.candidate_uuids * n_e)
+            buffers["leaning"].extend(record.final_leanings.ravel().tolist())
+        self.attempts_written += 1
+        for table in TABLES:
+            if self._pending_rows(table) >= self.chunk_rows:
+                self._flush_table(table)
+
+    # --- Scrittura blocchi -----------------------------------------------
+
+    def _column_arrays(self, table):
+        arrays = {}
+        for col, kind in TABLES[table]:
+            missing = _MISSING[kind]
+            values = [missing if v is None else v for v in self._buffers[table][col]]
+            arrays[col] = np.array(values, dtype=str if kind == "U" else kind)
+        return arrays
+
+    def _flush_table(self, table):
+        if not self._pending_rows(table):
+            return
+        arrays = self._column_arrays(table)
+        chunk = self._chunks_written[table]
+        if "npz" in self.formats:
+            np.savez_compressed(os.path.join(self.directory, f"{table}-{chunk:05d}.npz"), **arrays)
+        if "parquet" in self.formats:
+            arrow_table = pa.table(arrays)
+            writer = self._parquet_writers.get(table)
+            if writer is None:
+                writer = pq.ParquetWriter(os.path.join(self.directory, f"{table}.parquet"),
+                                          arrow_table.schema, compression="zstd")
+                self._parquet_writers[table] = writer
+            writer.write_table(arrow_table)
+        self._chunks_written[table] += 1
+        self._rows_written[table] += len(next(iter(arrays.values())))
+        for values in self._buffers[table].values():
+            values.clear()
+
+    def close(self):
+        for table in TABLES:
+            self._flush_table(table)
+        for writer in self._parquet_writers.values():
+            writer.close()
+        self._parquet_writers = {}
+        with open(os.path.join(self.directory, "manifest.json"), "w", encoding="utf-8") as f:
+            json.dump({"attempts": self.attempts_written, "formats": list(self.formats),
+                       "tables": {table: {"columns": [col for col, _ in columns],
+                                          "rows": self._rows_written[table],
+                                          "npz_chunks": self._chunks_written[table]
+                                          if "npz" in self.formats else 0}
+                                  for table, columns in TABLES.items()}}, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_table(directory, table):
+    """Riunisce i blocchi .npz di una tabella in un dict {colonna: array}."""
+    if table not in TABLES:
+        raise ValueError(f"Unknown table '{table}'")
+    chunks = sorted(glob.glob(os.path.join(directory, f"{table}-[0-9]*.npz")))
+    columns = {col: [] for col, _ in TABLES[table]}
+    for path in chunks:
+        with np.load(path) as chunk:
+            for col in columns:
+                columns[col].append(chunk[col])
+    return {col: np.concatenate(parts) if parts else np.array([], dtype=str if kind == "U" else kind)
+            for (col, kind), parts in zip(TABLES[table], columns.values())}
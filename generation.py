@@ -7,6 +7,7 @@ import json
 import config  # Assicurati sia importato
 import data
 import db_manager
+import simlog
 # Import opzionale numpy
 try:
     import numpy as np
@@ -14,11 +15,14 @@ try:
 except ImportError:  # pragma: no cover
     HAS_NUMPY = False
 
+log = simlog.get("generation")
 
-def generate_attributes_by_age(age):
+
+def generate_attributes_by_age(age, sim_config=None):
     """Genera attributi candidati influenzati dall'età."""
-    min_age, max_age = config.CANDIDATE_AGE_RANGE
-    min_attr, max_attr = config.ATTRIBUTE_RANGE
+    cfg = config.resolve(sim_config)
+    min_age, max_age = cfg.CANDIDATE_AGE_RANGE
+    min_attr, max_attr = cfg.ATTRIBUTE_RANGE
     # Gestisci age_range nullo o negativo
     age_range = max_age - min_age if max_age > min_age else 1
     norm_age = max(0, min(1, (age - min_age) /
@@ -64,14 +68,17 @@ def generate_attributes_by_age(age):
 
 
 def generate_candidates(num_candidates, pool_male_first_names,
-                        pool_female_first_names, pool_surnames):
+                        pool_female_first_names, pool_surnames, sim_config=None):
     """
     Genera/Carica candidati, assicurando struttura stats base.
     SENZA flag LLM.
     """
+    cfg = config.resolve(sim_config)
     if num_candidates <= 0:
         return []  # Gestisci input nullo
     db_manager.create_tables()
+    # Tutti i candidati noti in memoria: nessuna query per nome estratto
+    known_candidates = db_manager.load_all_candidates()
     candidates = []
     used_full_names = set()
 
@@ -96,12 +103,13 @@ def generate_candidates(num_candidates, pool_male_first_names,
             surname = random.choice(surnames)
             full_name = f"{first_name} {surname}"
 
-            existing_candidate = db_manager.get_candidate_by_name(full_name)
+            existing_candidate = known_candidates.get(full_name)
 
             if existing_candidate:
                 if full_name in used_names_set:  # Già aggiunto in questa run?
                     continue  # Cerca un altro nome
-                print(f"Loaded existing candidate: {full_name}")
+                if log.info:
+                    log.write(f"Loaded existing candidate: {full_name}", simlog.INFO)
                 candidate_data = existing_candidate
                 # Assicura struttura stats base
                 if 'stats' not in candidate_data or not isinstance(
@@ -118,13 +126,13 @@ def generate_candidates(num_candidates, pool_male_first_names,
                     candidate_data['stats'].setdefault(k, v)
 
             elif full_name not in used_names_set:
-                age = random.randint(*config.CANDIDATE_AGE_RANGE)
-                attributes = generate_attributes_by_age(age)
+                age = random.randint(*cfg.CANDIDATE_AGE_RANGE)
+                attributes = generate_attributes_by_age(age, sim_config=cfg)
                 party_id = random.choices(
-                    config.PARTY_IDS,
-                    weights=config.PARTY_ID_ASSIGNMENT_WEIGHTS,
+                    cfg.PARTY_IDS,
+                    weights=cfg.PARTY_ID_ASSIGNMENT_WEIGHTS,
                     k=1)[0]
-                initial_budget = float(config.INITIAL_CAMPAIGN_BUDGET)
+                initial_budget = float(cfg.INITIAL_CAMPAIGN_BUDGET)
                 base_stats = {
                     "total_elections_participated": 0,
                     "governor_wins": 0,
@@ -144,8 +152,9 @@ def generate_candidates(num_candidates, pool_male_first_names,
                     "traits": [],
                     "stats": base_stats
                 }
-                db_manager.save_candidate(candidate_data)
-                print(f"Generated and saved new candidate: {full_name}")
+                known_candidates.add(candidate_data)
+                if log.info:
+                    log.write(f"Generated new candidate: {full_name}", simlog.INFO)
 
             if candidate_data:
                 used_names_set.add(full_name)
@@ -175,8 +184,8 @@ def generate_candidates(num_candidates, pool_male_first_names,
                     "stats":
                     candidate_data.get("stats", {})
                 }
-        print(f"Warning: Max attempts reached for {gender} name generation."
-              )  # Log se esce dal while
+        if log.warning:  # Log se esce dal while
+            log.write(f"Warning: Max attempts reached for {gender} name generation.", simlog.WARNING)
         return None
 
     # Genera maschi
@@ -210,13 +219,13 @@ def generate_candidates(num_candidates, pool_male_first_names,
     # Fallback
     num_missing = num_candidates - len(candidates)
     if num_missing > 0:
-        print(f"Warning: Generating {num_missing} fallback candidates...")
+        if log.warning:
+            log.write(f"Warning: Generating {num_missing} fallback candidates...", simlog.WARNING)
         fallback_counter = 1
         while len(candidates) < num_candidates:
             # ... (Logica fallback come mostrata prima, assicurandosi di inizializzare stats) ...
             full_name = f"Fallback Candidate {fallback_counter:03d}"
-            if db_manager.candidate_exists(
-                    full_name) or full_name in used_full_names:
+            if full_name in known_candidates or full_name in used_full_names:
                 fallback_counter += 1
                 continue
             # ... (genera dati fallback) ...
@@ -227,12 +236,15 @@ def generate_candidates(num_candidates, pool_male_first_names,
                 "total_votes_received_all_time": 0,
                 "rounds_participated_all_time": 0
             }
+            initial_budget_fb = float(cfg.INITIAL_CAMPAIGN_BUDGET)
             candidate_data_fb = {
                 "uuid": str(uuid.uuid4()),
                 "name": full_name,  # ... altri dati ...
+                "initial_budget": initial_budget_fb,
+                "current_budget": initial_budget_fb,
                 "stats": base_stats_fb
             }
-            db_manager.save_candidate(candidate_data_fb)
+            known_candidates.add(candidate_data_fb)
             used_full_names.add(full_name)
             # Aggiungi alla lista con struttura consistente
             candidates.append(
@@ -246,19 +258,25 @@ def generate_candidates(num_candidates, pool_male_first_names,
                 })
             fallback_counter += 1
 
+    # Nuovi candidati scritti in un'unica transazione
+    known_candidates.flush()
+
     random.shuffle(candidates)
     final_count = len(candidates)
     if final_count < num_candidates:
-        print(
-            f"ERROR: Could only generate {final_count}/{num_candidates} candidates."
-        )
+        if log.error:
+            log.write(
+                f"ERROR: Could only generate {final_count}/{num_candidates} candidates.", simlog.ERROR
+            )
     else:
-        print(f"Generated/Loaded {final_count} candidates successfully.")
+        if log.info:
+            log.write(f"Generated/Loaded {final_count} candidates successfully.", simlog.INFO)
     return candidates
 
 
-def generate_grand_electors(num_electors):
+def generate_grand_electors(num_electors, sim_config=None):
     """Genera Grand Electors con tratti (SENZA flag LLM)."""
+    cfg = config.resolve(sim_config)
     electors = []
     if num_electors <= 0:
         return electors
@@ -266,11 +284,11 @@ def generate_grand_electors(num_electors):
     for i in range(num_electors):
         elector_id = f"Elector_{i+1}"
         assigned_traits = []
-        if config.ELECTOR_TRAITS:
-            k_traits = min(config.ELECTOR_TRAIT_COUNT,
-                           len(config.ELECTOR_TRAITS))
+        if cfg.ELECTOR_TRAITS:
+            k_traits = min(cfg.ELECTOR_TRAIT_COUNT,
+                           len(cfg.ELECTOR_TRAITS))
             if k_traits > 0:
-                assigned_traits = random.sample(config.ELECTOR_TRAITS,
+                assigned_traits = random.sample(cfg.ELECTOR_TRAITS,
                                                 k_traits)
         electors.append({
             "id": elector_id,
@@ -280,27 +298,30 @@ def generate_grand_electors(num_electors):
     return electors
 
 
-def create_elector_network(elector_ids):
+def create_elector_network(elector_ids, sim_config=None):
     """Crea rete sociale Watts-Strogatz."""
+    cfg = config.resolve(sim_config)
     # ... (Codice completo e robusto come mostrato prima) ...
     num_nodes = len(elector_ids)
     if num_nodes == 0:
         return nx.Graph()
-    k = config.NETWORK_AVG_NEIGHBORS
-    p = config.NETWORK_REWIRING_PROB
+    k = cfg.NETWORK_AVG_NEIGHBORS
+    p = cfg.NETWORK_REWIRING_PROB
     if k >= num_nodes:
         k = max(0, num_nodes - 2)
     if k % 2 != 0:
         k = max(0, k - 1)
     G = nx.empty_graph(num_nodes)  # Default a grafo vuoto
     if k > 0 or num_nodes <= 2:  # k=0 valido solo per n<=2 in WS
-        print(f"Generating Watts-Strogatz graph: n={num_nodes}, k={k}, p={p}")
+        if log.info:
+            log.write(f"Generating Watts-Strogatz graph: n={num_nodes}, k={k}, p={p}", simlog.INFO)
         try:
             G = nx.watts_strogatz_graph(n=num_nodes, k=k, p=p)
         except nx.NetworkXError:  # pragma: no cover
-            print(
-                f"Warning: WS graph failed with N={num_nodes}, K={k}. Creating fallback ring."
-            )
+            if log.warning:
+                log.write(
+                    f"Warning: WS graph failed with N={num_nodes}, K={k}. Creating fallback ring.", simlog.WARNING
+                )
             try:
                 G = nx.watts_strogatz_graph(
                     n=num_nodes, k=k,
@@ -309,11 +330,13 @@ def create_elector_network(elector_ids):
                 G = nx.empty_graph(num_nodes)  # Fallback estremo
     id_map = {i: elector_id for i, elector_id in enumerate(elector_ids)}
     G_relabeled = nx.relabel_nodes(G, id_map, copy=True)
-    print(
-        f"Social network generated: {G_relabeled.number_of_nodes()} nodes, {G_relabeled.number_of_edges()} edges."
-    )
+    if log.info:
+        log.write(
+            f"Social network generated: {G_relabeled.number_of_nodes()} nodes, {G_relabeled.number_of_edges()} edges.", simlog.INFO
+        )
     if G_relabeled.number_of_nodes() > 0:
         avg_degree = sum(dict(
             G_relabeled.degree()).values()) / G_relabeled.number_of_nodes()
-        print(f"Average node degree: {avg_degree:.2f}")
+        if log.info:
+            log.write(f"Average node degree: {avg_degree:.2f}", simlog.INFO)
     return G_relabeled
@@ -1,15 +1,21 @@
 # gui.py
+import argparse
 import pygame
 import sys
 import threading
-import queue
 import time
 import traceback
+from collections import OrderedDict
 import config
 import data
+import assets
 import utils
 import election
 import db_manager  # Importa db_manager
+import db_writer
+import simlog
+
+log = simlog.get("gui")
 
 # --- Controllo Esistenza Funzione Simulazione ---
 if not hasattr(election, 'run_election_simulation'):  # pragma: no cover
@@ -29,20 +35,81 @@ runoff_winner_for_next_attempt = None
 log_line_height = 16
 max_log_lines = 10
 
+# --- Cache Superfici di Testo ---
+
+
+class TextSurfaceCache:
+    """
+    Cache LRU delle superfici di testo, chiave (font, testo, colore, antialias),
+    e delle righe già spezzate dal word wrap del log. Tra un frame e l'altro
+    il testo visibile cambia di rado: font.render viene chiamato solo per le
+    righe nuove. Va svuotata quando cambiano i font o la finestra (VIDEORESIZE).
+    """
+
+    def __init__(self, capacity):
+        self.capacity = max(1, int(capacity))
+        self._surfaces = OrderedDict()
+        self._wrapped = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, store, key, value):
+        store[key] = value
+        if len(store) > self.capacity:
+            store.popitem(last=False)
+        return value
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, tuple(color), antialias)
+        text_surface = self._surfaces.get(key)
+        if text_surface is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return text_surface
+        self.misses += 1
+        return self._remember(self._surfaces, key, font.render(text, antialias, color))
+
+    def wrap(self, font, text, max_width):
+        """Righe del word wrap semplice del log (cache per font, testo e larghezza)."""
+        key = (font, text, max_width)
+        lines = self._wrapped.get(key)
+        if lines is not None:
+            self._wrapped.move_to_end(key)
+            return lines
+        lines_for_msg = []
+        current_line = ""
+        for word in text.split(' '):
+            test_line = current_line + word + " "
+            if font.size(test_line)[0] < max_width:
+                current_line = test_line
+            else:
+                lines_for_msg.append(current_line)
+                current_line = word + " "
+        lines_for_msg.append(current_line)
+        return self._remember(self._wrapped, key, tuple(line.strip() for line in lines_for_msg))
+
+    def clear(self):
+        self._surfaces.clear()
+        self._wrapped.clear()
+
+
+text_cache = TextSurfaceCache(config.GUI_TEXT_CACHE_SIZE)
+
 # --- Funzioni Helper GUI ---
 
 
 def render_text(font, text, color, surface, x, y, antialias=True):
-    """Renders text and returns height and bounding rect."""
+    """Renders text (via text_cache) and returns height and bounding rect."""
     try:
         if not font:
             return 0, pygame.Rect(x, y, 0, 0)
-        text_surface = font.render(str(text), antialias, color)
+        text_surface = text_cache.render(font, str(text), color, antialias)
         int_x, int_y = int(x), int(y)
         rect = surface.blit(text_surface, (int_x, int_y))
         return text_surface.get_height(), rect
     except Exception as e_render:  # pragma: no cover
-        print(f"ERROR rendering text '{str(text)[:50]}...': {e_render}")
+        if log.error:
+            log.write(f"ERROR rendering text '{str(text)[:50]}...': {e_render}", simlog.ERROR)
         return 0, pygame.Rect(int(x), int(y), 0, 0)
 
 
@@ -50,18 +117,20 @@ def draw_button(surface, rect, color, text, font, text_color, enabled=True):
     """Draws a button and returns its rect."""
     try:
         if not isinstance(rect, pygame.Rect):
-            print(f"ERROR: draw_button received invalid rect: {rect}")
+            if log.error:
+                log.write(f"ERROR: draw_button received invalid rect: {rect}", simlog.ERROR)
             return rect
         button_color = color if enabled else config.GRAY
         text_color_actual = text_color if enabled else config.DARK_GRAY
         pygame.draw.rect(surface, button_color, rect)
         pygame.draw.rect(surface, config.WHITE, rect, 1)
         if font and text:
-            text_surface = font.render(text, True, text_color_actual)
+            text_surface = text_cache.render(font, text, text_color_actual)
             text_rect = text_surface.get_rect(center=rect.center)
             surface.blit(text_surface, text_rect)
     except Exception as e_button:  # pragma: no cover
-        print(f"ERROR drawing button '{text}': {e_button}")
+        if log.error:
+            log.write(f"ERROR drawing button '{text}': {e_button}", simlog.ERROR)
     return rect
 
 # --- Funzione per Calcolare Aree UI ---
@@ -97,6 +166,251 @@ def calculate_ui_areas(width, height, current_log_line_height):
             1, (log_rect.height // current_log_line_height) - 2)
     return status_rect, visual_rect, results_rect, log_rect, button_rect, calculated_max_lines
 
+# --- Pannelli Off-Screen (ridisegno solo delle aree cambiate) ---
+
+
+class PanelSurfaces:
+    """
+    Una superficie off-screen per pannello, ridisegnata solo quando cambia la
+    sua chiave di stato (dati dalla coda, abilitazione bottoni, dimensioni).
+    begin() restituisce la superficie da ridisegnare, o None se il pannello è
+    invariato; present() copia sullo schermo i soli pannelli ridisegnati e ne
+    restituisce i rect per pygame.display.update(rects). Con full=True
+    (schermo ripulito, WINDOWEXPOSED) li ricopia tutti.
+    """
+
+    def __init__(self):
+        self._panels = {}  # nome -> [rect, superficie, chiave]
+        self._changed = []
+
+    def reset(self):
+        """Invalida tutti i pannelli (nuova finestra / VIDEORESIZE)."""
+        self._panels.clear()
+        self._changed = []
+
+    def begin(self, name, rect, key):
+        entry = self._panels.get(name)
+        if entry is not None and entry[0] == rect and entry[2] == key:
+            return None
+        if entry is not None and entry[1].get_size() == rect.size:
+            surface = entry[1]
+        else:
+            surface = pygame.Surface(rect.size)
+        surface.fill(config.BG_COLOR)
+        self._panels[name] = [pygame.Rect(rect), surface, key]
+        self._changed.append(name)
+        return surface
+
+    def present(self, screen, full=False):
+        dirty_rects = []
+        for name in (self._panels if full else self._changed):
+            rect, surface, _ = self._panels[name]
+            dirty_rects.append(screen.blit(surface, rect))
+        self._changed = []
+        return dirty_rects
+
+
+def draw_status_panel(surface, area, font, small_font, status_dict, step_by_step_mode):
+    try:
+        # Semplice rect senza Surface
+        pygame.draw.rect(surface, (64, 64, 64, 192), area)
+        pygame.draw.rect(surface, config.WHITE, area, 1)
+        status_y = area.top + 5
+        status_x_left = area.left + 10
+        status_x_right = area.right - 250
+        h1, _ = render_text(
+            font, f"Attempt: {status_dict.get('attempt', '-')}/{config.MAX_ELECTION_ATTEMPTS}", config.WHITE, surface, status_x_left, status_y)
+        h2, _ = render_text(
+            font, f"Phase: {status_dict.get('phase', 'N/A')}", config.WHITE, surface, status_x_left, status_y + h1 + 2)
+        render_text(font, f"Round: {status_dict.get('round', '-')}",
+                    config.WHITE, surface, status_x_right, status_y)
+        status_text_val = status_dict.get("status", "")
+        render_text(font, f"Status: {status_text_val}", config.WHITE,
+                    surface, status_x_left, status_y + h1 + h2 + 4)
+        if status_dict.get("governor"):
+            render_text(
+                font, f"Governor: {status_dict['governor']}", config.GREEN, surface, status_x_right, status_y + h1 + 2)
+        mode_text = "Mode: Step-by-Step" if step_by_step_mode else "Mode: Continuous"
+        render_text(
+            small_font, mode_text, config.WHITE, surface, status_x_left, area.bottom - small_font.get_linesize() - 5)
+    except Exception as e:
+        if log.error:  # pragma: no cover
+            log.write(f"Error drawing Status Area: {e}", simlog.ERROR)
+
+
+def visual_background_key(status_dict):
+    """Sfondo del pannello visuale (config.BACKGROUND_PATHS) per fase ed esito."""
+    if status_dict.get("status") == "Simulation Complete":
+        return "elected" if status_dict.get("governor") else "deadlock"
+    if status_dict.get("phase") == "District Elections":
+        return "district"
+    if status_dict.get("phase") == "Governor Election":
+        return "college"
+    return "city"
+
+
+def draw_visual_panel(surface, area, small_font, results_data, asset_manager=None, background_key=None):
+    """Disegna sfondo, sprite e nomi dei candidati; restituisce [(rect nella superficie, item)]."""
+    text_rects = []
+    try:
+        background = asset_manager.background(
+            background_key, area.size, tint=(32, 32, 32, 160)) if asset_manager and background_key else None
+        if background is not None:
+            surface.blit(background, area.topleft)
+        else:
+            pygame.draw.rect(surface, (32, 32, 32, 160), area)
+        pygame.draw.rect(surface, config.WHITE, area, 1)
+        display_items_visual = results_data[:12]
+        if display_items_visual:
+            num_columns = 3
+            col_width = area.width // num_columns
+            row_height_visual = small_font.get_linesize() + 4
+            start_x_visual, start_y_visual = area.left + 10, area.top + 10
+            for i, item in enumerate(display_items_visual):
+                cand_name_visual = item.get('name', 'N/A')
+                gender_visual = item.get('gender', 'unknown')
+                text_color_visual = config.PINK if gender_visual == "female" else config.LIGHT_BLUE if gender_visual == "male" else config.WHITE
+                col_idx = i % num_columns
+                row_idx = i // num_columns
+                text_x_visual = start_x_visual + col_idx * col_width
+                text_y_visual = start_y_visual + row_idx * row_height_visual
+                if text_y_visual + row_height_visual < area.bottom - 5:
+                    sprite = asset_manager.sprite(
+                        assets.candidate_sprite_name(item), (row_height_visual - 2, row_height_visual - 2)) if asset_manager else None
+                    if sprite is not None:
+                        surface.blit(sprite, (text_x_visual, text_y_visual - 2))
+                        text_x_visual += sprite.get_width() + 4
+                    _, text_rect_visual = render_text(
+                        small_font, cand_name_visual, text_color_visual, surface, text_x_visual, text_y_visual)
+                    text_rects.append((text_rect_visual, item))
+    except Exception as e:
+        if log.error:  # pragma: no cover
+            log.write(f"Error drawing Visual Area: {e}", simlog.ERROR)
+    return text_rects
+
+
+def draw_results_panel(surface, area, title_font, small_font, results_data, status_dict):
+    try:
+        pygame.draw.rect(surface, (48, 48, 48, 192), area)
+        pygame.draw.rect(surface, config.WHITE, area, 1)
+        render_text(title_font, "Latest Results:", config.WHITE,
+                    surface, area.left + 10, area.top + 5)
+        if results_data:
+            relevant_results = [item for item in results_data if isinstance(
+                item, dict) and item.get('votes', 0) > 0]
+            max_votes = max(
+                item['votes'] for item in relevant_results) if relevant_results else 1
+            bar_area_width_results = area.width - 20
+            bar_height_results = 15
+            bar_spacing_results = 5
+            bar_start_y_results = area.top + 5 + title_font.get_linesize() + 10
+            total_votes_this_round = sum(
+                item['votes'] for item in relevant_results) if relevant_results else 0
+            for i, item_res in enumerate(sorted(relevant_results, key=lambda x: x.get('votes', 0), reverse=True)):
+                if bar_start_y_results + i * (bar_height_results + bar_spacing_results) + bar_height_results > area.bottom - 5:
+                    render_text(small_font, "...", config.WHITE, surface, area.left +
+                                10, bar_start_y_results + i * (bar_height_results + bar_spacing_results))
+                    break
+                cand_name_res, votes_res = item_res['name'], item_res['votes']
+                is_overall_elected = (status_dict.get(
+                    "governor") == cand_name_res and status_dict.get("status") == "Simulation Complete")
+                vote_percentage = (
+                    votes_res / total_votes_this_round * 100) if total_votes_this_round > 0 else 0
+                bar_width_val = max(
+                    1, (votes_res / max_votes) * bar_area_width_results) if votes_res > 0 and max_votes > 0 else 0
+                bar_color_val = config.GREEN if is_overall_elected else config.GRAY
+                bar_rect_item = pygame.Rect(area.left + 10, bar_start_y_results + i * (
+                    bar_height_results + bar_spacing_results), bar_width_val, bar_height_results)
+                pygame.draw.rect(
+                    surface, bar_color_val, bar_rect_item)
+                pygame.draw.rect(
+                    surface, config.WHITE, bar_rect_item, 1)
+                name_text_res = f"{cand_name_res}: {votes_res} ({vote_percentage:.1f}%)"
+                name_surface_res = text_cache.render(
+                    small_font, name_text_res, config.WHITE)
+                text_x_res = bar_rect_item.left + 5
+                text_y_res = bar_rect_item.centery - name_surface_res.get_height() // 2
+                if bar_width_val < name_surface_res.get_width() + 10:
+                    text_x_res = bar_rect_item.right + 5
+                text_x_res = min(
+                    text_x_res, area.right - 10 - name_surface_res.get_width())
+                surface.blit(name_surface_res,
+                             (text_x_res, text_y_res))
+    except Exception as e:
+        if log.error:  # pragma: no cover
+            log.write(f"Error drawing Results Area: {e}", simlog.ERROR)
+
+
+def draw_log_panel(surface, area, title_font, small_font, log_messages, max_lines, line_height):
+    try:
+        pygame.draw.rect(surface, (48, 48, 48, 192), area)
+        pygame.draw.rect(surface, config.WHITE, area, 1)
+        render_text(title_font, "Log:", config.WHITE,
+                    surface, area.left + 10, area.top + 5)
+        log_y_start = area.top + 5 + title_font.get_linesize() + 5
+        # Disegna messaggi dal basso verso l'alto (o alto verso basso, ma solo i più recenti)
+        start_index = max(0, len(log_messages) - max_lines)
+        for i, msg_log in enumerate(log_messages[start_index:]):
+            current_y = log_y_start + i * line_height
+            if current_y + line_height > area.bottom - 5:
+                break  # Non entra più
+
+            # Word wrap semplice (righe in cache, converti a str per sicurezza)
+            lines_for_msg = text_cache.wrap(
+                small_font, str(msg_log), area.width - 20)
+
+            # Renderizza linee wrappate
+            temp_y_log = current_y
+            for line_log in lines_for_msg:
+                if temp_y_log + line_height <= area.bottom - 5:
+                    render_text(small_font, line_log, config.WHITE,
+                                surface, area.left + 10, temp_y_log)
+                    temp_y_log += line_height
+                else:
+                    break  # Spazio finito nel box per questo messaggio
+    except Exception as e:
+        if log.error:  # pragma: no cover
+            log.write(f"Error drawing Log Area: {e}", simlog.ERROR)
+
+
+def draw_button_panel(surface, area, font, step_by_step_mode, start_button_enabled, next_round_button_enabled):
+    try:
+        BUTTON_WIDTH, BUTTON_HEIGHT = 150, area.height - 10
+        button_padding = 20
+        visible_buttons_count = 2 + (1 if step_by_step_mode else 0)
+        total_visible_buttons_width = BUTTON_WIDTH * visible_buttons_count + \
+            button_padding * \
+            (visible_buttons_count -
+             1 if visible_buttons_count > 1 else 0)
+        button_start_x = area.left + \
+            max(0, (area.width - total_visible_buttons_width) // 2)
+        button_y_pos = area.top + 5
+
+        # Disegna Start
+        start_button_rect = pygame.Rect(
+            button_start_x, button_y_pos, BUTTON_WIDTH, BUTTON_HEIGHT)
+        draw_button(surface, start_button_rect, config.GREEN, "Start Election",
+                    font, config.WHITE, enabled=start_button_enabled)
+        current_button_x_draw = start_button_rect.right + button_padding
+
+        # Disegna Next
+        if step_by_step_mode:
+            next_round_button_rect = pygame.Rect(
+                current_button_x_draw, button_y_pos, BUTTON_WIDTH, BUTTON_HEIGHT)
+            draw_button(surface, next_round_button_rect, config.BLUE, "Next Round",
+                        font, config.WHITE, enabled=next_round_button_enabled)
+            current_button_x_draw = next_round_button_rect.right + button_padding
+
+        # Disegna Quit
+        quit_button_rect = pygame.Rect(
+            current_button_x_draw, button_y_pos, BUTTON_WIDTH, BUTTON_HEIGHT)
+        draw_button(surface, quit_button_rect, config.RED,
+                    "Quit", font, config.WHITE, enabled=True)
+    except Exception as e:
+        if log.error:  # pragma: no cover
+            log.write(
+                f"Error drawing Button Area: {e}", simlog.ERROR)
+
 # --- Funzione Principale GUI ---
 
 
@@ -125,6 +439,8 @@ def main_pygame_gui():
         pygame.quit()
         sys.exit(1)
     pygame.display.set_caption(config.WINDOW_TITLE)
+    # Immagini caricate al primo uso (dopo set_mode, per convert/convert_alpha)
+    asset_manager = assets.AssetManager()
 
     font, small_font, title_font = None, None, None
     try:
@@ -133,7 +449,8 @@ def main_pygame_gui():
             "DejaVu Sans", config.PIXEL_FONT_SIZE - 4)
         title_font = pygame.font.SysFont(
             "DejaVu Sans", config.PIXEL_FONT_SIZE + 2, bold=True)
-        print("DEBUG: Custom font loaded.")
+        if log.debug:
+            log.write("DEBUG: Custom font loaded.")
     except Exception:
         try:
             font = pygame.font.SysFont("monospace", config.PIXEL_FONT_SIZE)
@@ -141,7 +458,8 @@ def main_pygame_gui():
                 "monospace", config.PIXEL_FONT_SIZE - 2)
             title_font = pygame.font.SysFont(
                 "monospace", config.PIXEL_FONT_SIZE + 2, bold=True)
-            print("DEBUG: Monospace font loaded.")
+            if log.debug:
+                log.write("DEBUG: Monospace font loaded.")
         except Exception as e_font_fallback:
             print(f"FATAL ERROR: Could not load any font: {e_font_fallback}")
             pygame.quit()
@@ -167,6 +485,12 @@ def main_pygame_gui():
     flag_state = None
     simulation_thread = None
     step_by_step_mode = config.STEP_BY_STEP_MODE_DEFAULT
+    # Versioni dei dati disegnati: un pannello si ridisegna solo se cambiano
+    results_version, log_version = 0, 0
+    panels = PanelSurfaces()
+    full_redraw = True
+
+    utils.update_channel.attach()  # Da qui la simulazione invia aggiornamenti
 
     # --- CICLO PRINCIPALE ---
     running = True
@@ -190,9 +514,17 @@ def main_pygame_gui():
                             (SCREEN_WIDTH, SCREEN_HEIGHT), pygame.RESIZABLE | pygame.SRCALPHA)
                         STATUS_AREA, VISUAL_AREA, RESULTS_AREA, LOG_AREA, BUTTON_AREA, max_log_lines = calculate_ui_areas(
                             SCREEN_WIDTH, SCREEN_HEIGHT, log_line_height)
+                        text_cache.clear()  # Nuove larghezze di wrap (e font eventualmente ricreati)
+                        asset_manager.on_resize()  # Riscalate una volta al prossimo ridisegno
+                        panels.reset()
+                        full_redraw = True
                     except pygame.error as e_resize:
-                        print(
-                            f"Warning: Could not resize screen: {e_resize}")  # pragma: no cover
+                        if log.warning:  # pragma: no cover
+                            log.write(
+                                f"Warning: Could not resize screen: {e_resize}", simlog.WARNING)
+
+                if event.type == getattr(pygame, "WINDOWEXPOSED", None):
+                    full_redraw = True  # Contenuto della finestra da ricomporre
 
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     # Calcola Rects bottoni per click handling
@@ -223,14 +555,17 @@ def main_pygame_gui():
                         # Controllo Click
                         if _start_rect_click and _start_rect_click.collidepoint(event.pos):
                             # DEBUG
-                            print("\nDEBUG: Start Button Click Detected!")
+                            if log.debug:
+                                log.write("\nDEBUG: Start Button Click Detected!")
                             # DEBUG
-                            print(
-                                f"DEBUG: Checking simulation_running_event.is_set(): {simulation_running_event.is_set()}")
+                            if log.debug:
+                                log.write(
+                                    f"DEBUG: Checking simulation_running_event.is_set(): {simulation_running_event.is_set()}")
                             if not simulation_running_event.is_set():
                                 # DEBUG
-                                print(
-                                    "DEBUG: Event not set, proceeding to start simulation...")
+                                if log.debug:
+                                    log.write(
+                                        "DEBUG: Event not set, proceeding to start simulation...")
                                 current_simulation_attempt += 1
                                 if current_simulation_attempt > config.MAX_ELECTION_ATTEMPTS:
                                     utils.send_pygame_update(
@@ -243,13 +578,16 @@ def main_pygame_gui():
                                 current_results_data = []
                                 log_messages = [
                                     f"Attempt {current_simulation_attempt} starting..."]
+                                results_version += 1
+                                log_version += 1
                                 flag_state = None
                                 simulation_waiting_for_next = False
                                 displayed_candidate_text_rects = []
                                 simulation_continue_event.clear()
                                 simulation_running_event.clear()
                                 # DEBUG
-                                print("DEBUG: Creating simulation thread...")
+                                if log.debug:
+                                    log.write("DEBUG: Creating simulation thread...")
                                 simulation_thread = threading.Thread(target=election.run_election_simulation, kwargs={
                                     'election_attempt': current_simulation_attempt, 'preselected_candidates_info_gui': preselected_candidates_for_next_attempt,
                                     'runoff_carryover_winner_name': runoff_winner_for_next_attempt, 'continue_event': simulation_continue_event,
@@ -257,35 +595,45 @@ def main_pygame_gui():
                                 simulation_thread.daemon = True
                                 simulation_thread.start()
                                 # DEBUG
-                                print("DEBUG: Simulation thread start() called.")
+                                if log.debug:
+                                    log.write("DEBUG: Simulation thread start() called.")
                                 if not step_by_step_mode:
                                     simulation_continue_event.set()
                                 preselected_candidates_for_next_attempt = None
                                 runoff_winner_for_next_attempt = None
                             else:
                                 # DEBUG
-                                print(
-                                    "DEBUG: Simulation already running (event was set), start button ignored.")
+                                if log.debug:
+                                    log.write(
+                                        "DEBUG: Simulation already running (event was set), start button ignored.")
 
                         elif _next_rect_click and _next_rect_click.collidepoint(event.pos):
                             if simulation_running_event.is_set() and simulation_waiting_for_next:
                                 # DEBUG
-                                print(
-                                    "DEBUG: Next Round Button Clicked and condition met.")
+                                if log.debug:
+                                    log.write(
+                                        "DEBUG: Next Round Button Clicked and condition met.")
                                 simulation_continue_event.set()
                                 simulation_waiting_for_next = False
                             else:
                                 # DEBUG
-                                print(
-                                    "DEBUG: Next Round Button Clicked but conditions not met.")
+                                if log.debug:
+                                    log.write(
+                                        "DEBUG: Next Round Button Clicked but conditions not met.")
                         elif _quit_rect_click and _quit_rect_click.collidepoint(event.pos):
-                            print("DEBUG: Quit Button Clicked.")  # DEBUG
+                            if log.debug:  # DEBUG
+                                log.write("DEBUG: Quit Button Clicked.")
                             running = False
 
-            # --- Processa Coda Aggiornamenti ---
-            while not utils.pygame_update_queue.empty():
+            # --- Processa Coda Aggiornamenti (un solo drain per frame) ---
+            pending_updates, dropped_messages = utils.update_channel.drain()
+            if dropped_messages:
+                log_messages.append(
+                    f"... {dropped_messages} log messages skipped (GUI behind) ...")
+                log_version += 1
+            for update_type, update_data in pending_updates:
                 try:
-                    update_type, update_data = utils.pygame_update_queue.get_nowait()
+                    log_count_before = len(log_messages)
                     # print(f"DEBUG: Received update from queue: Type={update_type}") # DEBUG intensivo coda
                     if update_type == utils.UPDATE_TYPE_STATUS:
                         current_status_dict.update(update_data)
@@ -294,6 +642,7 @@ def main_pygame_gui():
                     elif update_type == utils.UPDATE_TYPE_RESULTS:
                         current_results_data = update_data.get(
                             "results", []) if isinstance(update_data, dict) else []
+                        results_version += 1
                     elif update_type == utils.UPDATE_TYPE_FLAG:
                         flag_state = update_data
                     elif update_type == utils.UPDATE_TYPE_MESSAGE:
@@ -346,226 +695,83 @@ def main_pygame_gui():
                                         f"  ...and {len(update_data) - 5} more.")
                                     break
                         # else: log messaggio 'nessun elettore chiave'? Opzionale
+                    if len(log_messages) != log_count_before:
+                        log_version += 1
                     # Tronca log
                     if len(log_messages) > max_log_lines:
                         log_messages = log_messages[-max_log_lines:]
-                except queue.Empty:
-                    break
                 except Exception as e_queue:
                     # Debug
-                    print(
-                        f"Error processing queue item {update_type}: {e_queue}")
+                    if log.error:
+                        log.write(
+                            f"Error processing queue item {update_type}: {e_queue}", simlog.ERROR)
 
-            # --- Disegno Interfaccia ---
-            screen.fill(config.BG_COLOR)
-
-            # Aree (con controlli base per esistenza)
+            # --- Disegno Interfaccia (solo pannelli cambiati) ---
             if STATUS_AREA:
-                try:
-                    # Semplice rect senza Surface
-                    pygame.draw.rect(screen, (64, 64, 64, 192), STATUS_AREA)
-                    pygame.draw.rect(screen, config.WHITE, STATUS_AREA, 1)
-                    status_y = STATUS_AREA.top + 5
-                    status_x_left = STATUS_AREA.left + 10
-                    status_x_right = STATUS_AREA.right - 250
-                    h1, _ = render_text(
-                        font, f"Attempt: {current_status_dict.get('attempt', '-')}/{config.MAX_ELECTION_ATTEMPTS}", config.WHITE, screen, status_x_left, status_y)
-                    h2, _ = render_text(
-                        font, f"Phase: {current_status_dict.get('phase', 'N/A')}", config.WHITE, screen, status_x_left, status_y + h1 + 2)
-                    render_text(font, f"Round: {current_status_dict.get('round', '-')}",
-                                config.WHITE, screen, status_x_right, status_y)
-                    status_text_val = current_status_dict.get("status", "")
-                    render_text(font, f"Status: {status_text_val}", config.WHITE,
-                                screen, status_x_left, status_y + h1 + h2 + 4)
-                    if current_status_dict.get("governor"):
-                        render_text(
-                            font, f"Governor: {current_status_dict['governor']}", config.GREEN, screen, status_x_right, status_y + h1 + 2)
-                    mode_text = "Mode: Step-by-Step" if step_by_step_mode else "Mode: Continuous"
-                    render_text(
-                        small_font, mode_text, config.WHITE, screen, status_x_left, STATUS_AREA.bottom - small_font.get_linesize() - 5)
-                except Exception as e:
-                    print(
-                        f"Error drawing Status Area: {e}")  # pragma: no cover
+                panel_surface = panels.begin("status", STATUS_AREA, (tuple(
+                    current_status_dict.items()), step_by_step_mode))
+                if panel_surface:
+                    draw_status_panel(panel_surface, panel_surface.get_rect(),
+                                      font, small_font, current_status_dict, step_by_step_mode)
 
             if VISUAL_AREA:
-                try:
-                    pygame.draw.rect(screen, (32, 32, 32, 160), VISUAL_AREA)
-                    pygame.draw.rect(screen, config.WHITE, VISUAL_AREA, 1)
-                    displayed_candidate_text_rects.clear()
-                    display_items_visual = current_results_data[:12]
-                    if display_items_visual:
-                        num_columns = 3
-                        col_width = VISUAL_AREA.width // num_columns
-                        row_height_visual = small_font.get_linesize() + 4
-                        start_x_visual, start_y_visual = VISUAL_AREA.left + 10, VISUAL_AREA.top + 10
-                        for i, item in enumerate(display_items_visual):
-                            cand_name_visual = item.get('name', 'N/A')
-                            gender_visual = item.get('gender', 'unknown')
-                            text_color_visual = config.PINK if gender_visual == "female" else config.LIGHT_BLUE if gender_visual == "male" else config.WHITE
-                            col_idx = i % num_columns
-                            row_idx = i // num_columns
-                            text_x_visual = start_x_visual + col_idx * col_width
-                            text_y_visual = start_y_visual + row_idx * row_height_visual
-                            if text_y_visual + row_height_visual < VISUAL_AREA.bottom - 5:
-                                _, text_rect_visual = render_text(
-                                    small_font, cand_name_visual, text_color_visual, screen, text_x_visual, text_y_visual)
-                                displayed_candidate_text_rects.append(
-                                    (text_rect_visual, item))
-                                if text_rect_visual.collidepoint(mouse_pos):
-                                    attrs_visual = item.get(
-                                        'attributes', {})
-                                    attrs_str_visual = ", ".join(
-                                        [f"{k.replace('_',' ').title()}: {v}" for k, v in attrs_visual.items()])
-                                    tooltip_text = (f"{cand_name_visual} ({item.get('party_id','N/A')})\n" +
-                                                    f"Age: {item.get('age','N/A')}, Gender: {gender_visual.title()}\n" + f"Attributes: {attrs_str_visual if attrs_str_visual else 'N/A'}")
-                except Exception as e:
-                    print(
-                        f"Error drawing Visual Area: {e}")  # pragma: no cover
+                background_key = visual_background_key(current_status_dict)
+                panel_surface = panels.begin("visual", VISUAL_AREA, (results_version, background_key))
+                if panel_surface:
+                    # Rect in coordinate schermo per l'hover
+                    displayed_candidate_text_rects = [
+                        (text_rect.move(VISUAL_AREA.topleft), item) for text_rect, item in
+                        draw_visual_panel(panel_surface, panel_surface.get_rect(), small_font, current_results_data,
+                                          asset_manager, background_key)]
 
             if RESULTS_AREA:
-                try:
-                    pygame.draw.rect(screen, (48, 48, 48, 192), RESULTS_AREA)
-                    pygame.draw.rect(screen, config.WHITE, RESULTS_AREA, 1)
-                    render_text(title_font, "Latest Results:", config.WHITE,
-                                screen, RESULTS_AREA.left + 10, RESULTS_AREA.top + 5)
-                    if current_results_data:
-                        relevant_results = [item for item in current_results_data if isinstance(
-                            item, dict) and item.get('votes', 0) > 0]
-                        max_votes = max(
-                            item['votes'] for item in relevant_results) if relevant_results else 1
-                        bar_area_width_results = RESULTS_AREA.width - 20
-                        bar_height_results = 15
-                        bar_spacing_results = 5
-                        bar_start_y_results = RESULTS_AREA.top + 5 + title_font.get_linesize() + 10
-                        total_votes_this_round = sum(
-                            item['votes'] for item in relevant_results) if relevant_results else 0
-                        for i, item_res in enumerate(sorted(relevant_results, key=lambda x: x.get('votes', 0), reverse=True)):
-                            if bar_start_y_results + i * (bar_height_results + bar_spacing_results) + bar_height_results > RESULTS_AREA.bottom - 5:
-                                render_text(small_font, "...", config.WHITE, screen, RESULTS_AREA.left +
-                                            10, bar_start_y_results + i * (bar_height_results + bar_spacing_results))
-                            break
-                            cand_name_res, votes_res = item_res['name'], item_res['votes']
-                            is_overall_elected = (current_status_dict.get(
-                                "governor") == cand_name_res and current_status_dict.get("status") == "Simulation Complete")
-                            vote_percentage = (
-                                votes_res / total_votes_this_round * 100) if total_votes_this_round > 0 else 0
-                            bar_width_val = max(
-                                1, (votes_res / max_votes) * bar_area_width_results) if votes_res > 0 and max_votes > 0 else 0
-                            bar_color_val = config.GREEN if is_overall_elected else config.GRAY
-                            bar_rect_item = pygame.Rect(RESULTS_AREA.left + 10, bar_start_y_results + i * (
-                                bar_height_results + bar_spacing_results), bar_width_val, bar_height_results)
-                            pygame.draw.rect(
-                                screen, bar_color_val, bar_rect_item)
-                            pygame.draw.rect(
-                                screen, config.WHITE, bar_rect_item, 1)
-                            name_text_res = f"{cand_name_res}: {votes_res} ({vote_percentage:.1f}%)"
-                            name_surface_res = small_font.render(
-                                name_text_res, True, config.WHITE)
-                            text_x_res = bar_rect_item.left + 5
-                            text_y_res = bar_rect_item.centery - name_surface_res.get_height() // 2
-                            if bar_width_val < name_surface_res.get_width() + 10:
-                                text_x_res = bar_rect_item.right + 5
-                            text_x_res = min(
-                                text_x_res, RESULTS_AREA.right - 10 - name_surface_res.get_width())
-                            screen.blit(name_surface_res,
-                                        (text_x_res, text_y_res))
-                except Exception as e:
-                    print(
-                        f"Error drawing Results Area: {e}")  # pragma: no cover
+                panel_surface = panels.begin("results", RESULTS_AREA, (
+                    results_version, current_status_dict.get("governor"), current_status_dict.get("status")))
+                if panel_surface:
+                    draw_results_panel(panel_surface, panel_surface.get_rect(), title_font,
+                                       small_font, current_results_data, current_status_dict)
 
             if LOG_AREA:
-                try:
-                    pygame.draw.rect(screen, (48, 48, 48, 192), LOG_AREA)
-                    pygame.draw.rect(screen, config.WHITE, LOG_AREA, 1)
-                    render_text(title_font, "Log:", config.WHITE,
-                                screen, LOG_AREA.left + 10, LOG_AREA.top + 5)
-                    log_y_start = LOG_AREA.top + 5 + title_font.get_linesize() + 5
-                    # Disegna messaggi dal basso verso l'alto (o alto verso basso, ma solo i più recenti)
-                    start_index = max(0, len(log_messages) - max_log_lines)
-                    for i, msg_log in enumerate(log_messages[start_index:]):
-                        current_y = log_y_start + i * log_line_height
-                        if current_y + log_line_height > LOG_AREA.bottom - 5:
-                            break  # Non entra più
-
-                        # Word wrap semplice (potrebbe essere migliorato)
-                        # Converti a str per sicurezza
-                        words = str(msg_log).split(' ')
-                        lines_for_msg = []
-                        current_line_log = ""
-                        max_width_log = LOG_AREA.width - 20
-                        for word_log in words:
-                            test_line_log = current_line_log + word_log + " "
-                            if small_font.size(test_line_log)[0] < max_width_log:
-                                current_line_log = test_line_log
-                            else:
-                                lines_for_msg.append(current_line_log)
-                                current_line_log = word_log + " "
-                        lines_for_msg.append(current_line_log)
-
-                        # Renderizza linee wrappate
-                        temp_y_log = current_y
-                        for line_log in lines_for_msg:
-                            if temp_y_log + log_line_height <= LOG_AREA.bottom - 5:
-                                render_text(small_font, line_log.strip(
-                                ), config.WHITE, screen, LOG_AREA.left + 10, temp_y_log)
-                                temp_y_log += log_line_height
-                            else:
-                                break  # Spazio finito nel box per questo messaggio
-                except Exception as e:
-                    print(f"Error drawing Log Area: {e}")  # pragma: no cover
+                panel_surface = panels.begin("log", LOG_AREA, (log_version, max_log_lines))
+                if panel_surface:
+                    draw_log_panel(panel_surface, panel_surface.get_rect(), title_font, small_font,
+                                   log_messages, max_log_lines, log_line_height)
 
-            # Button Area
-            # Resetta per disegno
-            start_button_rect, next_round_button_rect, quit_button_rect = None, None, None
             if BUTTON_AREA:
-                try:
-                    BUTTON_WIDTH, BUTTON_HEIGHT = 150, BUTTON_AREA.height - 10
-                    button_padding = 20
-                    visible_buttons_count = 2 + (1 if step_by_step_mode else 0)
-                    total_visible_buttons_width = BUTTON_WIDTH * visible_buttons_count + \
-                        button_padding * \
-                        (visible_buttons_count -
-                         1 if visible_buttons_count > 1 else 0)
-                    button_start_x = BUTTON_AREA.left + \
-                        max(0, (BUTTON_AREA.width - total_visible_buttons_width) // 2)
-                    button_y_pos = BUTTON_AREA.top + 5
-
-                    # Disegna Start
-                    start_button_enabled = not simulation_running_event.is_set()
-                    start_button_rect = pygame.Rect(
-                        button_start_x, button_y_pos, BUTTON_WIDTH, BUTTON_HEIGHT)
-                    draw_button(screen, start_button_rect, config.GREEN, "Start Election",
-                                font, config.WHITE, enabled=start_button_enabled)
-                    current_button_x_draw = start_button_rect.right + button_padding
-
-                    # Disegna Next
-                    if step_by_step_mode:
-                        next_round_button_enabled = simulation_running_event.is_set(
-                        ) and simulation_waiting_for_next
-                        next_round_button_rect = pygame.Rect(
-                            current_button_x_draw, button_y_pos, BUTTON_WIDTH, BUTTON_HEIGHT)
-                        draw_button(screen, next_round_button_rect, config.BLUE, "Next Round",
-                                    font, config.WHITE, enabled=next_round_button_enabled)
-                        current_button_x_draw = next_round_button_rect.right + button_padding
-
-                    # Disegna Quit
-                    quit_button_rect = pygame.Rect(
-                        current_button_x_draw, button_y_pos, BUTTON_WIDTH, BUTTON_HEIGHT)
-                    draw_button(screen, quit_button_rect, config.RED,
-                                "Quit", font, config.WHITE, enabled=True)
-                except Exception as e:
-                    print(
-                        f"Error drawing Button Area: {e}")  # pragma: no cover
+                start_button_enabled = not simulation_running_event.is_set()
+                next_round_button_enabled = simulation_running_event.is_set() and simulation_waiting_for_next
+                panel_surface = panels.begin("buttons", BUTTON_AREA, (
+                    step_by_step_mode, start_button_enabled, next_round_button_enabled))
+                if panel_surface:
+                    draw_button_panel(panel_surface, panel_surface.get_rect(), font, step_by_step_mode,
+                                      start_button_enabled, next_round_button_enabled)
 
             # Tooltip
+            for text_rect_visual, item in displayed_candidate_text_rects:
+                if text_rect_visual.collidepoint(mouse_pos):
+                    attrs_visual = item.get('attributes', {})
+                    attrs_str_visual = ", ".join(
+                        [f"{k.replace('_',' ').title()}: {v}" for k, v in attrs_visual.items()])
+                    tooltip_text = (f"{item.get('name', 'N/A')} ({item.get('party_id','N/A')})\n" +
+                                    f"Age: {item.get('age','N/A')}, Gender: {item.get('gender', 'unknown').title()}\n" + f"Attributes: {attrs_str_visual if attrs_str_visual else 'N/A'}")
+                    break
             if tooltip_text:
                 try:
                     # ... (Codice disegno tooltip come prima) ...
                     pass
                 except Exception as e:
-                    print(f"Error drawing Tooltip: {e}")  # pragma: no cover
-
-            pygame.display.flip()
+                    if log.error:  # pragma: no cover
+                        log.write(f"Error drawing Tooltip: {e}", simlog.ERROR)
+
+            if full_redraw:
+                screen.fill(config.BG_COLOR)
+                panels.present(screen, full=True)
+                pygame.display.flip()
+                full_redraw = False
+            else:
+                dirty_rects = panels.present(screen)
+                if dirty_rects:
+                    pygame.display.update(dirty_rects)
             clock.tick(30)
 
         # Gestione Errore Loop Principale
@@ -581,28 +787,44 @@ def main_pygame_gui():
 
     # --- Pulizia Uscita ---
     if simulation_running_event.is_set():
-        print("GUI closing, signaling simulation thread to stop...")
+        if log.info:
+            log.write("GUI closing, signaling simulation thread to stop...", simlog.INFO)
         simulation_running_event.clear()
         if simulation_thread and simulation_thread.is_alive():
             simulation_continue_event.set()
             simulation_thread.join(2.0)
             if simulation_thread.is_alive():
-                print("Warning: Simulation thread did not terminate gracefully.")
+                if log.warning:
+                    log.write("Warning: Simulation thread did not terminate gracefully.", simlog.WARNING)
             else:
-                print("DEBUG: Simulation thread joined.")
+                if log.debug:
+                    log.write("DEBUG: Simulation thread joined.")
+    utils.update_channel.detach()
+    db_writer.shutdown()  # Scrive i salvataggi ancora in coda
+    db_manager.close_all_connections()
     pygame.quit()
-    print("Pygame GUI closed.")
+    if log.info:
+        log.write("Pygame GUI closed.", simlog.INFO)
 
 
 # --- Punto di Ingresso Principale ---
 if __name__ == "__main__":
-    print("Application starting...")
+    arg_parser = argparse.ArgumentParser(description="Pygame GUI of the election simulation.")
+    arg_parser.add_argument("--log-level", default=None, choices=sorted(simlog.LEVEL_NAMES),
+                            type=str.upper, help="Simulation log level (default: config.LOG_LEVEL).")
+    gui_args = arg_parser.parse_args()
+    if gui_args.log_level:
+        simlog.configure(level=gui_args.log_level)
+    if log.info:
+        log.write("Application starting...", simlog.INFO)
     try:
         db_manager.create_tables()
-        print(f"Database tables ensured in '{config.DATABASE_FILE}'")
+        if log.info:
+            log.write(f"Database tables ensured in '{config.DATABASE_FILE}'", simlog.INFO)
     except Exception as e_db_init:
         print(f"FATAL ERROR: Could not ensure database tables: {e_db_init}")
         sys.exit(1)  # pragma: no cover
     main_pygame_gui()
-    print("Application finished.")
+    if log.info:
+        log.write("Application finished.", simlog.INFO)
     sys.exit(0)
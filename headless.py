@@ -0,0 +1,151 @@
+# headless.py
+"""
+Runner batch senza interfaccia grafica.
+
+    python -m headless --attempts 1000 --seed 42 --output results.jsonl
+
+Esegue N tentativi di elezione uno dopo l'altro nel thread principale:
+niente pygame, niente coda di aggiornamenti GUI, niente pause
+GOVERNOR_PAUSE_SECONDS. Ogni tentativo produce una riga JSON con l'esito.
+I tentativi seguono la stessa numerazione della GUI: si riparte da 1 dopo
+un'elezione riuscita o dopo MAX_ELECTION_ATTEMPTS.
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+
+import config
+import db_manager
+import election
+import export
+import simlog
+import utils
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m headless",
+        description="Run election simulations back-to-back without the GUI.")
+    parser.add_argument("--attempts", type=int, default=1,
+                        help="Number of election attempts to run (default: 1).")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for a reproducible batch (simulation parameters and runs).")
+    parser.add_argument("--output", default="-",
+                        help="JSON Lines output file ('-' = stdout, default).")
+    parser.add_argument("--db", default=None,
+                        help="SQLite database file (default: config.DATABASE_FILE).")
+    parser.add_argument("--snapshots", default=None, metavar="DIR",
+                        help="Write per-round elector state snapshots (snapshots.py) to DIR.")
+    parser.add_argument("--export", default=None, metavar="DIR",
+                        help="Export candidates, round tallies, key electors and final leanings "
+                             "as columnar files (NPZ, plus Parquet if pyarrow is installed) to DIR.")
+    parser.add_argument("--quiet", action="store_true",
+                        help="Disable the simulation's log output (nothing is formatted or written).")
+    parser.add_argument("--log-level", default=None, choices=sorted(simlog.LEVEL_NAMES),
+                        type=str.upper, help="Simulation log level (default: config.LOG_LEVEL).")
+    parser.add_argument("--log-file", default=None, metavar="PATH",
+                        help="Append the simulation log to PATH instead of stderr.")
+    return parser.parse_args(argv)
+
+
+def run_batch(num_attempts, seed=None, on_result=None, sim_config=None, run_id=None,
+              snapshot_dir=None, exporter=None):
+    """
+    Esegue `num_attempts` tentativi e restituisce la lista dei risultati
+    (dict di run_election_simulation, con il tempo impiegato in `elapsed`).
+    Tutti i tentativi condividono `run_id` nello storico round_results
+    (default: un nuovo identificativo per batch).
+    Con `snapshot_dir` ogni tentativo salva le istantanee per round; con
+    `exporter` (export.ResultsExporter) ogni tentativo viene esportato.
+    Con `seed` (e senza sim_config) anche i parametri vengono estratti da
+    quel seed, quindi l'intero batch è riproducibile.
+    `on_result` viene chiamato dopo ogni tentativo (per lo streaming su file).
+    """
+    utils.HEADLESS = True
+    run_id = run_id or uuid.uuid4().hex
+    if sim_config is None:
+        sim_config = config.SimulationConfig.from_seed(seed) if seed is not None \
+            else config.DEFAULT_CONFIG
+    if seed is not None:
+        random.seed(seed)
+
+    # Un solo evento per tutto il batch (utils conserva il primo che riceve)
+    running_event = threading.Event()
+    continue_event = threading.Event()
+    continue_event.set()
+    utils.simulation_running_event = running_event
+
+    results = []
+    attempt = 0
+    for run_index in range(1, num_attempts + 1):
+        attempt += 1
+        if attempt > sim_config.MAX_ELECTION_ATTEMPTS:
+            attempt = 1
+        running_event.clear()
+        started = time.perf_counter()
+        record = export.AttemptRecord(run_id, attempt) if exporter is not None else None
+        outcome = election.run_election_simulation(
+            election_attempt=attempt, preselected_candidates_info_gui=None,
+            runoff_carryover_winner_name=None, continue_event=continue_event,
+            running_event=running_event, step_by_step_mode=False, pause_seconds=0,
+            sim_config=sim_config, run_id=run_id, snapshot_dir=snapshot_dir,
+            export_record=record)
+        if outcome is None:
+            outcome = {"run_id": run_id, "attempt": attempt, "config_seed": sim_config.seed, "elected": False, "governor": None,
+                       "reason": "Error", "rounds": 0, "candidates": [], "final_results": {}}
+        outcome["run"] = run_index
+        outcome["elapsed"] = round(time.perf_counter() - started, 4)
+        if record is not None:
+            exporter.write_attempt(record)
+        if outcome.get("elected"):
+            attempt = 0  # Come la GUI: nuovo ciclo di tentativi
+        results.append(outcome)
+        if on_result is not None:
+            on_result(outcome)
+    return results
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.attempts < 1:
+        print("Error: --attempts must be at least 1.", file=sys.stderr)
+        return 2
+    if args.db:
+        db_manager.DATABASE_FILE = args.db
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    # Il log della simulazione va su stderr (o --log-file): stdout resta JSON
+    saved_log_settings = simlog.current_settings()
+    if args.quiet:
+        simlog.disable()
+    else:
+        simlog.configure(level=args.log_level, sink=args.log_file or "stderr")
+
+    def write_result(outcome):
+        out.write(json.dumps(outcome, ensure_ascii=False) + "\n")
+        out.flush()
+
+    exporter = export.ResultsExporter(args.export) if args.export else None
+    try:
+        db_manager.create_tables()
+        results = run_batch(args.attempts, seed=args.seed, on_result=write_result,
+                            snapshot_dir=args.snapshots, exporter=exporter)
+    finally:
+        if exporter is not None:
+            exporter.close()
+        if out is not sys.stdout:
+            out.close()
+        simlog.configure(**saved_log_settings)
+
+    elected = sum(1 for r in results if r.get("elected"))
+    print(f"Completed {len(results)} attempts: {elected} elected, "
+          f"{len(results) - elected} without a governor.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
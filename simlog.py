@@ -0,0 +1,147 @@
+# simlog.py
+"""
+Log a livelli per categoria, a costo nullo quando disattivato.
+
+Ogni modulo prende il logger della propria categoria e protegge i messaggi
+con il flag del livello:
+
+    log = simlog.get("election")
+    ...
+    if log.debug:
+        log.write(f"DEBUG Rd {round_num}: Results: {counter.most_common(3)}")
+
+Con il livello disattivato il costo è la lettura di un attributo: nessuna
+chiamata e nessuna formattazione della f-string, anche nei cicli per
+elettore. I flag (debug, info, warning, error) vengono ricalcolati da
+configure().
+
+Destinazioni (argomento `sink` di configure):
+- "stdout" / "stderr": stampa sul flusso corrente (rispetta redirect_stdout);
+- "gui": messaggi nel canale verso la GUI (utils.send_pygame_update);
+- un percorso: file in append, una riga con ora, livello e categoria;
+- None: nessuna uscita (tutti i flag spenti, es. worker dell'ensemble).
+I valori iniziali vengono da config.LOG_LEVEL, config.LOG_CATEGORY_LEVELS e
+config.LOG_SINK.
+"""
+import sys
+import threading
+import time
+
+import config
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+LEVEL_NAMES = {"DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR, "OFF": OFF}
+_NAMES_BY_LEVEL = {level: name for name, level in LEVEL_NAMES.items()}
+
+
+def parse_level(level):
+    """Livello da nome ("debug", "INFO", ...) o numero."""
+    if isinstance(level, str):
+        try:
+            return LEVEL_NAMES[level.strip().upper()]
+        except KeyError:
+            raise ValueError(f"Unknown log level '{level}'") from None
+    return int(level)
+
+
+class CategoryLogger:
+    """Logger di una categoria: flag per livello più write()."""
+
+    __slots__ = ("name", "level", "debug", "info", "warning", "error")
+
+    def __init__(self, name):
+        self.name = name
+        self._set_level(OFF)
+
+    def _set_level(self, level):
+        self.level = level
+        self.debug = level <= DEBUG
+        self.info = level <= INFO
+        self.warning = level <= WARNING
+        self.error = level <= ERROR
+
+    def write(self, message, level=DEBUG):
+        """Scrive il messaggio (il chiamante ha già controllato il flag)."""
+        if level >= self.level:
+            _emit(self.name, level, message)
+
+
+_loggers = {}
+_lock = threading.Lock()
+_settings = {"level": DEBUG, "levels": {}, "sink": "stdout"}
+_sink_file = None
+
+
+def _emit(category, level, message):
+    sink = _settings["sink"]
+    if sink == "stdout":
+        print(message)
+    elif sink == "stderr":
+        print(message, file=sys.stderr)
+    elif sink == "gui":
+        import utils  # Import ritardato: utils non dipende da questo modulo
+        utils.send_pygame_update(
+            utils.UPDATE_TYPE_WARNING if level >= WARNING else utils.UPDATE_TYPE_MESSAGE,
+            str(message).strip())
+    elif _sink_file is not None:
+        line = (f"{time.strftime('%H:%M:%S')} {_NAMES_BY_LEVEL.get(level, level)} "
+                f"[{category}] {str(message).strip()}\n")
+        with _lock:
+            _sink_file.write(line)
+            _sink_file.flush()
+
+
+def _apply(logger):
+    level = _settings["levels"].get(logger.name, _settings["level"])
+    logger._set_level(OFF if _settings["sink"] is None else level)
+
+
+def get(category):
+    """Logger condiviso della categoria (creato al primo uso)."""
+    with _lock:
+        logger = _loggers.get(category)
+        if logger is None:
+            logger = _loggers[category] = CategoryLogger(category)
+            _apply(logger)
+        return logger
+
+
+def configure(level=None, sink="", levels=None):
+    """
+    Cambia livello globale, livelli per categoria ({categoria: livello}) e/o
+    destinazione; i parametri omessi restano invariati (sink=None = silenzio).
+    """
+    global _sink_file
+    with _lock:
+        if level is not None:
+            _settings["level"] = parse_level(level)
+        if levels is not None:
+            _settings["levels"] = {name: parse_level(value) for name, value in levels.items()}
+        if sink != "" and sink != _settings["sink"]:
+            if _sink_file is not None:
+                _sink_file.close()
+                _sink_file = None
+            if sink not in (None, "stdout", "stderr", "gui"):
+                _sink_file = open(sink, "a", encoding="utf-8")
+            _settings["sink"] = sink
+        for logger in _loggers.values():
+            _apply(logger)
+
+
+def disable():
+    """Nessuna uscita da nessuna categoria."""
+    configure(sink=None)
+
+
+def current_settings():
+    """Impostazioni correnti, da ripassare a configure() per ripristinarle."""
+    with _lock:
+        return {"level": _settings["level"], "levels": dict(_settings["levels"]),
+                "sink": _settings["sink"]}
+
+
+configure(level=config.LOG_LEVEL, sink=config.LOG_SINK, levels=config.LOG_CATEGORY_LEVELS)
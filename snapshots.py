@@ -0,0 +1,171 @@
+# snapshots.py
+"""
+Istantanee binarie per round dello stato degli elettori.
+
+Un file per tentativo, preallocato per MAX_TOTAL_ROUNDS round e scritto
+tramite np.memmap: dopo ogni round SnapshotRecorder copia nel record del
+round la matrice leanings (elettori x candidati) e i vettori
+identity_weight / policy_weight, senza pickle né JSON.
+
+Formato del file:
+    [0:8]    magic b"SIMSNAP1"
+    [8:12]   lunghezza dell'intestazione JSON (uint32 little-endian)
+    [12:16]  round registrati finora (uint32 little-endian)
+    [16:..]  intestazione JSON (forme, ordine di candidati ed elettori, dtype)
+    [DATA_OFFSET:]  un record per round (dtype strutturato, vedi round_dtype)
+
+SnapshotReader apre il file in sola lettura: ogni round è una vista
+zero-copy sul memmap.
+"""
+import json
+import os
+from collections import namedtuple
+
+import numpy as np
+
+import simlog
+
+log = simlog.get("snapshots")
+
+MAGIC = b"SIMSNAP1"
+FORMAT_VERSION = 1
+# I dati partono da un offset allineato (l'intestazione JSON sta prima)
+_ALIGNMENT = 4096
+_COUNTERS_OFFSET = len(MAGIC)
+_HEADER_OFFSET = _COUNTERS_OFFSET + 8
+
+RoundSnapshot = namedtuple("RoundSnapshot", ["round", "leanings", "identity_weight", "policy_weight"])
+
+
+def round_dtype(num_electors, num_candidates):
+    """Record di un round: matrice leanings e vettori dei pesi (float64 little-endian)."""
+    return np.dtype([
+        ("leanings", "<f8", (num_electors, num_candidates)),
+        ("identity_weight", "<f8", (num_electors,)),
+        ("policy_weight", "<f8", (num_electors,)),
+    ])
+
+
+def snapshot_path(directory, run_id, attempt):
+    """Percorso libero per il tentativo (non sovrascrive istantanee precedenti)."""
+    base = os.path.join(directory, f"{run_id}_attempt{int(attempt):03d}")
+    path, suffix = f"{base}.snap", 1
+    while os.path.exists(path):
+        suffix += 1
+        path = f"{base}-{suffix}.snap"
+    return path
+
+
+class SnapshotRecorder:
+    """Scrive le istantanee di un tentativo in un file memmap preallocato."""
+
+    def __init__(self, path, state, max_rounds, run_id=None, attempt=None):
+        self.path = path
+        self.max_rounds = max(1, int(max_rounds))
+        self.num_electors = state.num_electors
+        self.num_candidates = state.num_candidates
+        self.dtype = round_dtype(self.num_electors, self.num_candidates)
+        header = json.dumps({
+            "version": FORMAT_VERSION,
+            "run_id": run_id,
+            "attempt": attempt,
+            "num_electors": self.num_electors,
+            "num_candidates": self.num_candidates,
+            "max_rounds": self.max_rounds,
+            "candidate_names": list(state.candidate_names),
+            "elector_ids": [str(e_id) for e_id in state.elector_ids],
+            "fields": list(self.dtype.names),
+            "dtype": "<f8",
+        }).encode("utf-8")
+        self.data_offset = -(-(_HEADER_OFFSET + len(header)) // _ALIGNMENT) * _ALIGNMENT
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(np.array([len(header), 0], dtype="<u4").tobytes())
+            f.write(header)
+            # Preallocazione (file sparso dove supportato)
+            f.truncate(self.data_offset + self.max_rounds * self.dtype.itemsize)
+        self._counters = np.memmap(path, dtype="<u4", mode="r+",
+                                   offset=_COUNTERS_OFFSET, shape=(2,))
+        self._records = np.memmap(path, dtype=self.dtype, mode="r+",
+                                  offset=self.data_offset, shape=(self.max_rounds,))
+        self.rounds_recorded = 0
+
+    def record(self, round_num, state):
+        """Copia lo stato di fine round `round_num` (1-based) nel suo record."""
+        if self._records is None:
+            return
+        index = int(round_num) - 1
+        if not 0 <= index < self.max_rounds:
+            if log.warning:
+                log.write(f"Warning: snapshot round {round_num} outside 1..{self.max_rounds}, skipped.", simlog.WARNING)
+            return
+        record = self._records[index]
+        record["leanings"] = state.leanings
+        record["identity_weight"] = state.identity_weight
+        record["policy_weight"] = state.policy_weight
+        self.rounds_recorded = max(self.rounds_recorded, index + 1)
+        self._counters[1] = self.rounds_recorded
+
+    def close(self):
+        if self._records is None:
+            return
+        self._records.flush()
+        self._counters.flush()
+        # Rilascia i memmap (necessario per cancellare/spostare il file su alcuni OS)
+        self._records = self._counters = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SnapshotReader:
+    """Accesso in sola lettura alle istantanee di un tentativo (viste zero-copy)."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a snapshot file")
+            header_len, rounds_recorded = np.frombuffer(f.read(8), dtype="<u4")
+            self.header = json.loads(f.read(int(header_len)).decode("utf-8"))
+        if self.header.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {self.header.get('version')} in {path}")
+        self.num_rounds = int(rounds_recorded)
+        self.candidate_names = self.header["candidate_names"]
+        self.elector_ids = self.header["elector_ids"]
+        self.candidate_index = {name: i for i, name in enumerate(self.candidate_names)}
+        self.dtype = round_dtype(self.header["num_electors"], self.header["num_candidates"])
+        data_offset = -(-(_HEADER_OFFSET + int(header_len)) // _ALIGNMENT) * _ALIGNMENT
+        self._records = np.memmap(path, dtype=self.dtype, mode="r", offset=data_offset,
+                                  shape=(self.header["max_rounds"],))
+
+    def __len__(self):
+        return self.num_rounds
+
+    def __iter__(self):
+        return (self.round(r) for r in range(1, self.num_rounds + 1))
+
+    def round(self, round_num):
+        """RoundSnapshot del round `round_num` (1-based); gli array sono viste sul file."""
+        index = int(round_num) - 1
+        if not 0 <= index < self.num_rounds:
+            raise IndexError(f"round {round_num} not recorded (1..{self.num_rounds})")
+        record = self._records[index]
+        return RoundSnapshot(round_num, record["leanings"], record["identity_weight"],
+                             record["policy_weight"])
+
+    def leanings(self, round_num):
+        return self.round(round_num).leanings
+
+    def candidate_leanings(self, candidate_name):
+        """Leanings di un candidato in tutti i round: vista (round, elettori) con stride."""
+        return self._records["leanings"][:self.num_rounds, :, self.candidate_index[candidate_name]]
+
+
+def open_snapshot(path):
+    return SnapshotReader(path)
@@ -0,0 +1,106 @@
+# social_influence.py
+"""
+Motore di influenza sociale su matrice sparsa.
+
+Il grafo Watts-Strogatz di generation.create_elector_network viene convertito
+una sola volta in adiacenza CSR (righe normalizzate = media dei vicini).
+Ogni iterazione è quindi un prodotto matrice sparsa x matrice densa sulla
+matrice dei leanings dell'ElectorState, senza copie degli oggetti Python.
+"""
+import numpy as np
+
+import config
+
+# Import opzionale scipy (più veloce per grafi grandi)
+try:
+    import scipy.sparse as sp
+    HAS_SCIPY = True
+except ImportError:  # pragma: no cover
+    HAS_SCIPY = False
+
+
+class SocialInfluenceEngine:
+    """Adiacenza CSR normalizzata per riga, allineata all'ordine degli elettori."""
+
+    def __init__(self, network_graph, elector_ids, sim_config=None):
+        self.config = config.resolve(sim_config)
+        self.elector_ids = list(elector_ids)
+        index = {e_id: i for i, e_id in enumerate(self.elector_ids)}
+        n = len(self.elector_ids)
+
+        src, dst = [], []
+        if network_graph is not None:
+            for u, v in network_graph.edges():
+                iu, iv = index.get(u), index.get(v)
+                if iu is None or iv is None or iu == iv:
+                    continue
+                src.extend((iu, iv))
+                dst.extend((iv, iu))
+        src = np.asarray(src, dtype=np.int64)
+        dst = np.asarray(dst, dtype=np.int64)
+
+        order = np.lexsort((dst, src))
+        self.rows = src[order]
+        self.indices = dst[order]
+        self.degree = np.bincount(self.rows, minlength=n)
+        self.indptr = np.concatenate(([0], np.cumsum(self.degree)))
+        # Peso di ogni arco = 1/grado della riga -> prodotto = media dei vicini
+        self.data = 1.0 / self.degree[self.rows] if self.rows.size else np.zeros(0)
+        self.has_neighbors = self.degree > 0
+        self._matrix = sp.csr_matrix((self.data, self.indices, self.indptr), shape=(n, n)) \
+            if HAS_SCIPY else None
+
+    @property
+    def num_edges(self):
+        return self.indices.size // 2
+
+    def neighbor_mean(self, values):
+        """Media dei vicini per ogni riga di `values` (vettore (E,) o matrice (E, C))."""
+        if self._matrix is not None:
+            return self._matrix @ values
+        out = np.zeros(values.shape, dtype=np.float64)
+        weighted = values[self.indices] * (self.data if values.ndim == 1 else self.data[:, None])
+        np.add.at(out, self.rows, weighted)
+        return out
+
+    def susceptibility(self, elector_state):
+        """Forza di blending per elettore (tratti Easily Influenced / Loyal)."""
+        cfg = self.config
+        alpha = np.full(elector_state.num_electors,
+                        cfg.SOCIAL_INFLUENCE_STRENGTH, dtype=np.float64)
+        alpha[elector_state.has_trait("Easily Influenced")] *= \
+            cfg.INFLUENCE_TRAIT_MULTIPLIER_EASILY_INFLUENCED
+        alpha[elector_state.has_trait("Loyal")] *= cfg.INFLUENCE_TRAIT_MULTIPLIER_LOYAL
+        alpha[~self.has_neighbors] = 0.0
+        return np.clip(alpha, 0.0, 1.0)
+
+    def step(self, elector_state, alpha=None):
+        """Una iterazione sincrona (tutti leggono lo stato precedente), in-place."""
+        if alpha is None:
+            alpha = self.susceptibility(elector_state)
+        # Leanings: media pesata tra proprio valore e media dei vicini
+        neighbor_leanings = self.neighbor_mean(elector_state.leanings)
+        elector_state.leanings += alpha[:, None] * \
+            (neighbor_leanings - elector_state.leanings)
+        np.maximum(0.1, elector_state.leanings, out=elector_state.leanings)
+
+        # Apprendimento Agente: identity_weight si avvicina a quello dei vicini
+        learning_rate = self.config.ELECTOR_LEARNING_RATE * self.config.SOCIAL_INFLUENCE_LEARNING_EFFECT
+        neighbor_identity = self.neighbor_mean(elector_state.identity_weight)
+        elector_state.identity_weight += np.where(
+            self.has_neighbors, learning_rate * (neighbor_identity - elector_state.identity_weight), 0.0)
+        np.clip(elector_state.identity_weight, 0.05, 0.95, out=elector_state.identity_weight)
+        elector_state.policy_weight[:] = 1.0 - elector_state.identity_weight
+
+    def run(self, elector_state, iterations, should_continue=None):
+        """Esegue fino a `iterations` passi; ritorna il numero di passi completati."""
+        if elector_state.elector_ids != self.elector_ids:
+            raise ValueError("ElectorState rows do not match the engine's elector order.")
+        alpha = self.susceptibility(elector_state)
+        done = 0
+        for _ in range(iterations):
+            if should_continue is not None and not should_continue():
+                break
+            self.step(elector_state, alpha)
+            done += 1
+        return done
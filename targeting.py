@@ -0,0 +1,60 @@
+# targeting.py
+"""
+Selezione degli elettori target della campagna.
+
+Campionamento pesato SENZA reinserimento esatto (Efraimidis-Spirakis):
+ogni elettore riceve la chiave log(u) / w e si prendono le k chiavi più
+grandi. La distribuzione coincide con k estrazioni pesate successive
+senza reinserimento, ma costa una sola chiamata vettoriale, senza i
+cicli di "riempimento" con random.choices.
+"""
+import numpy as np
+
+
+class TargetingPlan:
+    """
+    Pesi di allocazione normalizzati per un round, riutilizzati da tutti i candidati.
+    `population` sono gli ID elettore, `probabilities` i pesi normalizzati (somma 1).
+    """
+
+    def __init__(self, population, weights):
+        self.population = list(population)
+        weights = np.asarray(weights, dtype=np.float64)
+        if weights.shape != (len(self.population),):
+            raise ValueError("weights must have one entry per elector.")
+        weights = np.where(np.isfinite(weights) & (weights > 0), weights, 0.0)
+        total = weights.sum()
+        if total <= 0 and weights.size:
+            weights = np.full(weights.size, 1.0)  # Fallback uniforme
+            total = float(weights.size)
+        self.probabilities = weights / total if weights.size else weights
+        self._positive = self.probabilities > 0
+        self._num_positive = int(self._positive.sum())
+        # 1/w precalcolato una volta per round
+        self._inv_weights = np.zeros_like(self.probabilities)
+        self._inv_weights[self._positive] = 1.0 / self.probabilities[self._positive]
+
+    def __len__(self):
+        return len(self.population)
+
+    def sample_indices(self, k, rng):
+        """Indici (nell'ordine di estrazione) di k elettori distinti."""
+        n = len(self.population)
+        k = max(0, min(int(k), n))
+        if k == 0:
+            return np.zeros(0, dtype=np.intp)
+        # log(u) <= 0, diviso per w: le chiavi più grandi vincono
+        keys = np.full(n, -np.inf)
+        keys[self._positive] = np.log(rng.random(self._num_positive)) * \
+            self._inv_weights[self._positive]
+        if k > self._num_positive:
+            # Elettori a peso zero solo per completare k, in ordine casuale
+            zero_idx = np.flatnonzero(~self._positive)
+            keys[zero_idx[rng.permutation(zero_idx.size)[:k - self._num_positive]]] = \
+                -np.finfo(np.float64).max
+        chosen = np.argpartition(keys, n - k)[n - k:]
+        return chosen[np.argsort(-keys[chosen], kind="stable")]
+
+    def sample(self, k, rng):
+        """ID di k elettori distinti estratti con probabilità proporzionale al peso."""
+        return [self.population[i] for i in self.sample_indices(k, rng)]
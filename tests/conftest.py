@@ -0,0 +1,20 @@
+# conftest.py
+import os
+import sys
+
+import pytest
+
+# I moduli del progetto stanno nella cartella principale (import assoluti)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_manager  # noqa: E402
+
+
+@pytest.fixture()
+def temp_db(tmp_path, monkeypatch):
+    """Database vuoto in una cartella temporanea, con le tabelle create."""
+    database_file = str(tmp_path / "test.db")
+    monkeypatch.setattr(db_manager, "DATABASE_FILE", database_file)
+    db_manager.create_tables()
+    yield database_file
+    db_manager.close_all_connections()
@@ -0,0 +1,67 @@
+# test_assets.py
+"""AssetManager: caricamento al primo uso e cache delle versioni scalate."""
+import os
+
+import pytest
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+pygame = pytest.importorskip("pygame")
+
+import assets  # noqa: E402
+
+
+@pytest.fixture()
+def manager(tmp_path):
+    sheet = pygame.Surface((128, 64), pygame.SRCALPHA)
+    sheet.fill((200, 10, 10, 255))
+    background = pygame.Surface((40, 30))
+    background.fill((10, 10, 200))
+    pygame.image.save(sheet, str(tmp_path / "sheet.png"))
+    pygame.image.save(background, str(tmp_path / "city.png"))
+    return assets.AssetManager(
+        image_paths={"people": str(tmp_path / "sheet.png")},
+        background_paths={"city": str(tmp_path / "city.png"),
+                          "missing": str(tmp_path / "missing.png")},
+        sprite_mapping={"default_standing": ("people", 0, 0), "second": ("people", 0, 1),
+                        "outside": ("people", 3, 3)},
+        frame_size=64)
+
+
+def test_nothing_is_loaded_until_first_use(manager):
+    assert manager.loads == 0
+    first = manager.sprite("default_standing", (32, 32))
+    assert first.get_size() == (32, 32)
+    assert manager.sprite("second", (32, 32)) is not first
+    assert manager.loads == 1  # Un solo foglio per entrambi gli sprite
+    assert manager.sprite("default_standing", (32, 32)) is first
+    assert manager.rescales == 2
+
+
+def test_on_resize_invalidates_only_scaled_images(manager):
+    small = manager.background("city", (80, 60), tint=(0, 0, 0, 100))
+    assert manager.background("city", (80, 60), tint=(0, 0, 0, 100)) is small
+    assert manager.background("city", (80, 60)) is not small  # Tinta diversa, voce diversa
+    assert (manager.loads, manager.rescales) == (1, 2)
+
+    manager.on_resize()
+    large = manager.background("city", (160, 120))
+    assert large.get_size() == (160, 120)
+    assert manager.background("city", (80, 60), tint=(0, 0, 0, 100)) is not small
+    assert (manager.loads, manager.rescales) == (1, 4)  # Riscalate, non ricaricate
+
+
+def test_missing_images_are_not_retried(manager):
+    assert manager.background("missing", (10, 10)) is None
+    assert manager.background("missing", (10, 10)) is None
+    assert manager.background("unknown", (10, 10)) is None
+    assert manager.sprite("outside", (10, 10)) is None
+    assert manager.loads == 1  # Solo il foglio: i file mancanti non contano
+    assert ("background", "missing") in manager._images
+
+
+def test_candidate_sprites_are_stable():
+    candidate = {"name": "Ada Rossi", "gender": "female"}
+    name = assets.candidate_sprite_name(candidate)
+    assert name.startswith("female_")
+    assert assets.candidate_sprite_name(dict(candidate)) == name
+    assert assets.candidate_sprite_name({"name": "X", "gender": None}) == "default_standing"
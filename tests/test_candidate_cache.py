@@ -0,0 +1,62 @@
+# test_candidate_cache.py
+"""Cache LRU read-through dei record candidato in db_manager."""
+import db_manager
+import election
+
+
+def _candidate(name, c_uuid, budget=100.0):
+    return {"uuid": c_uuid, "name": name, "gender": "female", "age": 40, "party_id": "Reds",
+            "initial_budget": 100.0, "current_budget": budget,
+            "attributes": {"administrative_experience": 3}, "traits": [], "stats": {}}
+
+
+def _cache_counts():
+    stats = db_manager.candidate_cache_stats()
+    return stats["hits"], stats["misses"]
+
+
+def test_repeated_lookups_hit_the_cache(temp_db):
+    db_manager.save_candidate(_candidate("Ada Rossi", "u-1"))
+    db_manager.clear_candidate_cache()
+    hits, misses = _cache_counts()
+
+    first = db_manager.get_candidate_by_uuid("u-1")
+    second = db_manager.get_candidate_by_uuid("u-1")
+    by_name = db_manager.get_candidate_by_name("ADA ROSSI")
+    assert first == second == by_name
+    assert _cache_counts() == (hits + 2, misses + 1)
+    assert db_manager.candidate_exists("ada rossi")
+
+    # Le copie restituite non toccano la cache
+    first["attributes"]["administrative_experience"] = 99
+    assert db_manager.get_candidate_by_uuid("u-1")["attributes"]["administrative_experience"] == 3
+
+
+def test_writes_invalidate_cached_records(temp_db):
+    db_manager.save_candidate(_candidate("Ada Rossi", "u-1"))
+    assert db_manager.get_candidate_by_uuid("u-1")["current_budget"] == 100.0
+
+    db_manager.save_candidate(_candidate("Ada Rossi", "u-1", budget=40.0))
+    assert db_manager.get_candidate_by_uuid("u-1")["current_budget"] == 40.0
+
+    db_manager.update_candidate_stats_batch({"u-1": {"governor_wins": 1}})
+    assert db_manager.get_candidate_by_uuid("u-1")["stats"]["governor_wins"] == 1
+
+    db_manager.write_batch(field_updates={"u-1": {"current_budget": 5.0}})
+    assert db_manager.get_candidate_by_uuid("u-1")["current_budget"] == 5.0
+
+
+def test_carryover_candidates_read_each_record_once(temp_db):
+    db_manager.save_candidates([_candidate("Ada Rossi", "u-1", budget=30.0),
+                                _candidate("Bea Verdi", "u-2", budget=60.0)])
+    db_manager.clear_candidate_cache()
+    _, misses = _cache_counts()
+    preselected = [dict(_candidate("Ada Rossi", "u-1"), campaign_budget=100.0)]
+
+    for _ in range(3):
+        carried = election.load_carryover_candidates(preselected, "Bea Verdi")
+        assert [c["name"] for c in carried] == ["Ada Rossi", "Bea Verdi"]
+        assert [c["campaign_budget"] for c in carried] == [30.0, 60.0]
+    assert preselected[0]["campaign_budget"] == 100.0
+    # Due record, letti dal disco una volta sola
+    assert _cache_counts()[1] == misses + 2
@@ -0,0 +1,36 @@
+# test_candidate_index.py
+"""Indice in memoria dei candidati (caricamento in blocco in generation)."""
+import db_manager
+
+
+def _candidate(name, c_uuid):
+    return {"uuid": c_uuid, "name": name, "gender": "female", "age": 45, "party_id": "Greens",
+            "initial_budget": 100.0, "current_budget": 70.0,
+            "attributes": {"social_vision": 4}, "traits": ["Pragmatic"],
+            "stats": dict(dict.fromkeys(db_manager.STAT_COLUMNS, 0), governor_wins=1)}
+
+
+def test_preloaded_lookups_match_single_queries(temp_db):
+    db_manager.save_candidates([_candidate("Ada Rossi", "u-1"), _candidate("Bruno Verdi", "u-2")])
+    index = db_manager.load_all_candidates()
+    assert len(index) == 2
+    for name, c_uuid in (("Ada Rossi", "u-1"), ("Bruno Verdi", "u-2")):
+        assert index.get(name) == db_manager.get_candidate_by_uuid(c_uuid)
+        assert index.get(name.upper()) == db_manager.get_candidate_by_name(name.lower())
+    assert "ada rossi" in index
+    assert index.get("Nessuno") is None and "Nessuno" not in index
+
+    # Copie indipendenti: modificarle non altera l'indice
+    index.get("Ada Rossi")["stats"]["governor_wins"] = 9
+    assert index.get("Ada Rossi")["stats"]["governor_wins"] == 1
+
+
+def test_added_candidates_are_saved_on_flush(temp_db):
+    index = db_manager.load_all_candidates()
+    index.add(_candidate("Carla Blu", "u-3"))
+    assert "carla blu" in index
+    assert db_manager.get_candidate_by_uuid("u-3") is None
+
+    index.flush()
+    assert db_manager.get_candidate_by_uuid("u-3") == index.get("Carla Blu")
+    assert db_manager.load_all_candidates().get("Carla Blu") == index.get("Carla Blu")
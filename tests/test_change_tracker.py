@@ -0,0 +1,57 @@
+# test_change_tracker.py
+"""CandidateChangeTracker: diff() senza effetti collaterali e mark_written()."""
+import db_manager
+
+
+def _candidate(**changes):
+    candidate = {"uuid": "u-1", "name": "Ada Rossi", "gender": "female", "age": 40,
+                 "party_id": "Reds", "initial_budget": 100.0, "current_budget": 100.0,
+                 "attributes": {"social_vision": 3}, "traits": []}
+    candidate.update(changes)
+    return candidate
+
+
+def test_new_candidate_is_a_full_row_until_written():
+    tracker = db_manager.CandidateChangeTracker()
+    kind, fields = tracker.diff(_candidate())
+    assert kind == "rows"
+    assert set(fields) == set(db_manager.CANDIDATE_FIELDS)
+    # diff() non registra nulla: senza mark_written resta da scrivere
+    assert tracker.diff(_candidate()) == ("rows", fields)
+    assert len(tracker) == 0
+
+    tracker.mark_written("u-1", fields)
+    assert tracker.diff(_candidate()) == (None, None)
+
+
+def test_changed_columns_only():
+    tracker = db_manager.CandidateChangeTracker()
+    tracker.mark_written("u-1", tracker.diff(_candidate())[1])
+    candidate = _candidate(current_budget=40.0)
+    candidate["attributes"]["social_vision"] = 5
+    kind, fields = tracker.diff(candidate)
+    assert kind == "fields"
+    assert fields == {"current_budget": 40.0, "attributes": {"social_vision": 5}}
+    assert db_manager.encode_candidate_fields(fields)["attributes"] == '{"social_vision": 5}'
+
+    # I valori restituiti sono copie: modificare il candidato non li altera
+    candidate["attributes"]["social_vision"] = 1
+    assert fields["attributes"] == {"social_vision": 5}
+
+
+def test_pending_values_take_precedence_over_snapshot():
+    tracker = db_manager.CandidateChangeTracker()
+    tracker.mark_written("u-1", tracker.diff(_candidate())[1])
+    # 40 già in coda: salvare di nuovo 40 non serve, tornare a 100 sì
+    assert tracker.diff(_candidate(current_budget=40.0), pending={"current_budget": 40.0}) == (None, None)
+    assert tracker.diff(_candidate(), pending={"current_budget": 40.0}) == (
+        "fields", {"current_budget": 100.0})
+
+
+def test_partial_write_of_unknown_candidate_is_not_recorded():
+    tracker = db_manager.CandidateChangeTracker()
+    tracker.mark_written("u-1", {"current_budget": 10.0})
+    assert tracker.diff(_candidate())[0] == "rows"
+    tracker.mark_written("u-1", tracker.diff(_candidate())[1])
+    tracker.forget("u-1")
+    assert tracker.diff(_candidate())[0] == "rows"
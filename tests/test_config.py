@@ -0,0 +1,51 @@
+# test_config.py
+"""SimulationConfig: estrazione riproducibile dal seed e copie immutabili."""
+import dataclasses
+
+import pytest
+
+import config
+
+
+def test_same_seed_draws_the_same_parameters():
+    first = config.SimulationConfig.from_seed(123)
+    assert first == config.SimulationConfig.from_seed(123)
+    assert first.seed == 123
+    assert first.as_dict() != config.SimulationConfig.from_seed(124).as_dict()
+
+
+def test_overrides_keep_the_other_drawn_parameters():
+    base = config.SimulationConfig.from_seed(7)
+    tuned = config.SimulationConfig.from_seed(7, MAX_ELECTION_ATTEMPTS=2)
+    assert tuned.MAX_ELECTION_ATTEMPTS == 2
+    assert {k: v for k, v in tuned.as_dict().items() if k != "MAX_ELECTION_ATTEMPTS"} == \
+        {k: v for k, v in base.as_dict().items() if k != "MAX_ELECTION_ATTEMPTS"}
+    with pytest.raises(ValueError):
+        config.SimulationConfig.from_seed(7, NOT_A_PARAMETER=1)
+
+
+def test_config_is_frozen_and_replace_returns_a_copy():
+    cfg = config.SimulationConfig.from_seed(11)
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        cfg.MAX_ELECTION_ATTEMPTS = 1
+    copy = cfg.replace(MAX_ELECTION_ATTEMPTS=1)
+    assert copy.MAX_ELECTION_ATTEMPTS == 1
+    assert cfg == config.SimulationConfig.from_seed(11)  # Originale invariato
+    assert copy.seed == cfg.seed
+    with pytest.raises(ValueError):
+        cfg.replace(NOT_A_PARAMETER=1)
+
+
+def test_as_dict_lists_every_parameter_but_the_seed():
+    cfg = config.SimulationConfig.from_seed(5)
+    params = cfg.as_dict()
+    assert tuple(params) == config.SimulationConfig.parameter_names()
+    assert "seed" not in params
+    # I parametri bastano a ricostruire la configurazione (a meno del seed)
+    assert config.SimulationConfig(seed=cfg.seed, **params) == cfg
+
+
+def test_module_level_names_mirror_the_default_config():
+    assert config.resolve() is config.DEFAULT_CONFIG
+    for name, value in config.DEFAULT_CONFIG.as_dict().items():
+        assert getattr(config, name) == value
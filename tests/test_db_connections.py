@@ -0,0 +1,51 @@
+# test_db_connections.py
+"""Connessioni persistenti per thread (WAL) di db_manager."""
+import threading
+
+import pytest
+
+import db_manager
+
+
+def _connection_in_thread():
+    result = {}
+
+    def worker():
+        result["conn"] = db_manager.get_db_connection()
+        result["same"] = db_manager.get_db_connection() is result["conn"]
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+    return result
+
+
+def test_each_thread_reuses_its_own_connection(temp_db):
+    conn = db_manager.get_db_connection()
+    assert db_manager.get_db_connection() is conn
+    other = _connection_in_thread()
+    assert other["same"]
+    assert other["conn"] is not conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_changing_database_file_reopens_the_connection(temp_db, tmp_path, monkeypatch):
+    conn = db_manager.get_db_connection()
+    monkeypatch.setattr(db_manager, "DATABASE_FILE", str(tmp_path / "other.db"))
+    other = db_manager.get_db_connection()
+    assert other is not conn
+    with pytest.raises(db_manager.sqlite3.ProgrammingError):
+        conn.execute("SELECT 1")  # La vecchia connessione è stata chiusa
+
+
+def test_close_all_connections_closes_every_thread(temp_db):
+    conn = db_manager.get_db_connection()
+    other = _connection_in_thread()["conn"]
+    db_manager.close_all_connections()
+    for closed in (conn, other):
+        with pytest.raises(db_manager.sqlite3.ProgrammingError):
+            closed.execute("SELECT 1")
+    # Il thread chiamante ne riapre una nuova alla richiesta successiva
+    reopened = db_manager.get_db_connection()
+    assert reopened is not conn
+    assert reopened.execute("SELECT 1").fetchone()[0] == 1
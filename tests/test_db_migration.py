@@ -0,0 +1,91 @@
+# test_db_migration.py
+"""Migrazione v0 -> v1 dei contatori dal JSON 'stats' alle colonne INTEGER."""
+import json
+import sqlite3
+
+import pytest
+
+import db_manager
+
+BASELINE_SCHEMA = '''
+    CREATE TABLE candidates (
+        uuid TEXT PRIMARY KEY,
+        name TEXT UNIQUE NOT NULL COLLATE NOCASE,
+        gender TEXT,
+        age INTEGER,
+        party_id TEXT,
+        initial_budget REAL DEFAULT 0,
+        current_budget REAL DEFAULT 0,
+        attributes TEXT,
+        traits TEXT,
+        stats TEXT
+    )
+'''
+STATS = {
+    "u-1": {"total_elections_participated": 4, "governor_wins": 1, "election_losses": 3,
+            "total_votes_received_all_time": 250, "rounds_participated_all_time": 12,
+            "favourite_topic": "transport"},
+    "u-2": {"governor_wins": 2},
+}
+
+
+@pytest.fixture()
+def baseline_db(tmp_path, monkeypatch):
+    database_file = str(tmp_path / "baseline.db")
+    conn = sqlite3.connect(database_file)
+    conn.execute(BASELINE_SCHEMA)
+    conn.executemany(
+        "INSERT INTO candidates VALUES (?, ?, 'female', 40, 'Reds', 100, 100, '{}', '[]', ?)",
+        [(c_uuid, f"Candidate {c_uuid}", json.dumps(stats)) for c_uuid, stats in STATS.items()])
+    conn.commit()
+    conn.close()
+    monkeypatch.setattr(db_manager, "DATABASE_FILE", database_file)
+    yield database_file
+    db_manager.close_all_connections()
+
+
+def _stored(database_file):
+    conn = sqlite3.connect(database_file)
+    conn.row_factory = sqlite3.Row
+    rows = {row["uuid"]: dict(row) for row in conn.execute("SELECT * FROM candidates")}
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    conn.close()
+    return rows, version
+
+
+def test_counters_are_copied_once_and_extras_kept(baseline_db):
+    db_manager.create_tables()
+    db_manager.create_tables()  # Secondo avvio: nessuna nuova copia
+    rows, version = _stored(baseline_db)
+    assert version == db_manager.SCHEMA_VERSION == 1
+    for c_uuid, stats in STATS.items():
+        for col in db_manager.STAT_COLUMNS:
+            assert rows[c_uuid][col] == stats.get(col, 0)
+    assert json.loads(rows["u-1"]["stats"]) == {"favourite_topic": "transport"}
+    assert json.loads(rows["u-2"]["stats"]) == {}
+    # Letti tramite il modulo i contatori tornano nel dict 'stats'
+    assert db_manager.get_candidate_by_uuid("u-1")["stats"] == STATS["u-1"]
+
+
+def test_failed_migration_leaves_the_database_untouched(baseline_db):
+    conn = sqlite3.connect(baseline_db)
+    conn.execute("CREATE TRIGGER block_updates BEFORE UPDATE ON candidates "
+                 "BEGIN SELECT RAISE(ABORT, 'blocked'); END")
+    conn.commit()
+    conn.close()
+
+    db_manager.create_tables()
+    rows, version = _stored(baseline_db)
+    assert version == 0
+    assert "governor_wins" not in rows["u-1"]  # Anche ALTER TABLE annullato
+    assert json.loads(rows["u-1"]["stats"]) == STATS["u-1"]
+
+    db_manager.close_all_connections()
+    conn = sqlite3.connect(baseline_db)
+    conn.execute("DROP TRIGGER block_updates")
+    conn.commit()
+    conn.close()
+    db_manager.create_tables()
+    rows, version = _stored(baseline_db)
+    assert version == 1
+    assert rows["u-1"]["governor_wins"] == 1 and rows["u-2"]["governor_wins"] == 2
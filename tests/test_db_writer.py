@@ -0,0 +1,129 @@
+# test_db_writer.py
+"""WriteBehindWriter: fusione per UUID, flush, fine tentativo, chiusura ed errori di scrittura."""
+import pytest
+
+import db_manager
+import db_writer
+import simlog
+
+
+def _candidate(c_uuid="u-1", name="Ada Rossi", budget=100.0):
+    return {"uuid": c_uuid, "name": name, "gender": "female", "age": 40, "party_id": "Reds",
+            "initial_budget": 100.0, "current_budget": budget,
+            "attributes": {"social_vision": 3}, "traits": [], "stats": {}}
+
+
+@pytest.fixture()
+def writer(temp_db):
+    # Intervallo lungo: lo scrittore scrive solo su flush()/shutdown()
+    writer = db_writer.WriteBehindWriter(flush_interval=30)
+    yield writer
+    writer.shutdown(5)
+
+
+@pytest.fixture()
+def recorded_batches(monkeypatch):
+    calls = []
+    write_batch = db_manager.write_batch
+
+    def recording_write_batch(candidate_rows=(), stats_increments=None, **kwargs):
+        candidate_rows = list(candidate_rows)
+        calls.append({"rows": candidate_rows, "stats": dict(stats_increments or {}),
+                      "fields": dict(kwargs.get("field_updates") or {})})
+        return write_batch(candidate_rows, stats_increments, **kwargs)
+
+    monkeypatch.setattr(db_manager, "write_batch", recording_write_batch)
+    return calls
+
+
+def _stored_budget(c_uuid="u-1"):
+    row = db_manager.get_db_connection().execute(
+        "SELECT current_budget FROM candidates WHERE uuid = ?", (c_uuid, )).fetchone()
+    return row[0] if row else None
+
+
+def test_saves_and_increments_coalesce_until_flush(writer, recorded_batches):
+    for budget in (90.0, 80.0, 70.0):
+        writer.save_candidate(_candidate(budget=budget))
+    writer.update_candidate_stats_batch({"u-1": {"governor_wins": 1}})
+    writer.update_candidate_stats_batch({"u-1": {"governor_wins": 2}})
+    assert _stored_budget() is None  # Ancora in coda
+
+    assert writer.flush(5)
+    assert len(recorded_batches) == 1
+    assert len(recorded_batches[0]["rows"]) == 1
+    assert recorded_batches[0]["stats"] == {"u-1": {"governor_wins": 3}}
+    assert _stored_budget() == 70.0
+    assert db_manager.get_candidate_by_uuid("u-1")["stats"]["governor_wins"] == 3
+
+
+def test_only_changed_columns_follow_a_written_row(writer, recorded_batches):
+    writer.save_candidate(_candidate())
+    writer.flush(5)
+    writer.save_candidate(_candidate())  # Invariato: niente in coda
+    writer.save_candidate(_candidate(budget=10.0))
+    writer.flush(5)
+    assert len(recorded_batches) == 2
+    assert recorded_batches[1]["rows"] == []
+    assert recorded_batches[1]["fields"] == {"u-1": {"current_budget": 10.0}}
+    assert _stored_budget() == 10.0
+
+
+def test_end_attempt_forgets_snapshots(temp_db, monkeypatch, recorded_batches):
+    writer = db_writer.WriteBehindWriter(flush_interval=30)
+    monkeypatch.setattr(db_writer, "_writer", writer)
+    try:
+        writer.save_candidate(_candidate())
+        assert db_writer.end_attempt(5)
+        assert _stored_budget() == 100.0
+        writer.save_candidate(_candidate())  # Snapshot azzerato: riga completa
+        writer.flush(5)
+        assert len(recorded_batches) == 2 and len(recorded_batches[1]["rows"]) == 1
+    finally:
+        writer.shutdown(5)
+
+
+def test_shutdown_writes_pending_changes_and_stops(temp_db):
+    writer = db_writer.WriteBehindWriter(flush_interval=30)
+    writer.save_candidate(_candidate(budget=55.0))
+    writer.shutdown(5)
+    assert not writer._thread.is_alive()
+    assert _stored_budget() == 55.0
+    # Scrittore fermo: salvataggio diretto
+    writer.save_candidate(_candidate(budget=33.0))
+    assert _stored_budget() == 33.0
+
+
+def test_failed_batch_is_rewritten_on_next_save(writer, monkeypatch, capsys):
+    simlog_settings = simlog.current_settings()
+    simlog.configure(level="INFO", sink="stdout")
+    write_batch = db_manager.write_batch
+    monkeypatch.setattr(db_manager, "write_batch", lambda *args, **kwargs: False)
+    try:
+        writer.save_candidate(_candidate(budget=42.0))
+        writer.flush(5)
+    finally:
+        simlog.configure(**simlog_settings)
+    assert writer.failed_batches == 1
+    assert _stored_budget() is None
+    assert "1 candidates will be rewritten" in capsys.readouterr().out
+
+    monkeypatch.setattr(db_manager, "write_batch", write_batch)
+    writer.save_candidate(_candidate(budget=42.0))  # Stessi valori: va comunque riscritto
+    writer.flush(5)
+    assert _stored_budget() == 42.0
+
+
+def test_failed_field_update_is_not_lost(writer, monkeypatch):
+    writer.save_candidate(_candidate())
+    writer.flush(5)
+    write_batch = db_manager.write_batch
+    monkeypatch.setattr(db_manager, "write_batch", lambda *args, **kwargs: False)
+    writer.save_candidate(_candidate(budget=5.0))
+    writer.flush(5)
+    assert _stored_budget() == 100.0
+
+    monkeypatch.setattr(db_manager, "write_batch", write_batch)
+    writer.save_candidate(_candidate(budget=5.0))
+    writer.flush(5)
+    assert _stored_budget() == 5.0
@@ -0,0 +1,44 @@
+# test_district_scheduler.py
+"""Scelta seriale/pool e riproducibilità delle elezioni distrettuali."""
+import os
+
+import config
+import district_scheduler
+
+CANDIDATES = [{"name": f"Cand {i}", "attributes": {"administrative_experience": 1 + i % 5,
+                                                  "social_vision": 1 + (i * 2) % 5,
+                                                  "mediation_ability": 3, "ethical_integrity": 2}}
+              for i in range(12)]
+
+
+def test_worker_count_defaults_to_serial_for_small_work(monkeypatch):
+    monkeypatch.setattr(config, "DISTRICT_WORKERS", None)
+    monkeypatch.setattr(config, "DISTRICT_PARALLEL_MIN_WORK", 1000)
+    assert district_scheduler.resolve_worker_count(work=999) == 1
+    assert district_scheduler.resolve_worker_count(work=1000) == (os.cpu_count() or 1)
+    assert district_scheduler.resolve_worker_count(3, work=10) == 3  # Esplicito: opt-in
+    monkeypatch.setattr(config, "DISTRICT_WORKERS", 2)
+    assert district_scheduler.resolve_worker_count(work=10) == 2
+
+
+def test_small_phase_does_not_start_a_pool(monkeypatch):
+    monkeypatch.setattr(config, "DISTRICT_WORKERS", None)
+
+    def no_pool(workers):
+        raise AssertionError("process pool started for a small district phase")
+
+    monkeypatch.setattr(district_scheduler, "get_executor", no_pool)
+    districts = [CANDIDATES[:4], CANDIDATES[4:8], CANDIDATES[8:]]
+    results = district_scheduler.run_district_elections(districts, 200, seed=1)
+    assert [r["district"] for r in results] == [1, 2, 3]
+
+
+def test_pool_matches_serial_run():
+    districts = [CANDIDATES[:4], CANDIDATES[4:8], CANDIDATES[8:]]
+    serial = district_scheduler.run_district_elections(districts, 500, seed=9, max_workers=1)
+    try:
+        pooled = district_scheduler.run_district_elections(districts, 500, seed=9, max_workers=2)
+    finally:
+        district_scheduler.shutdown_executor()
+    assert [(r["results"], r["winner"]["name"]) for r in pooled] == \
+        [(r["results"], r["winner"]["name"]) for r in serial]
@@ -0,0 +1,84 @@
+# test_district_voting.py
+"""Voto distrettuale vettoriale contro voting.simulate_citizen_vote."""
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import config
+import district_voting
+import voting
+
+NUM_CITIZENS = 5000
+# Stesso ordine di elector_state.ATTRIBUTE_KEYS
+PREFERENCE_KEYS = ("preference_experience", "preference_social_vision",
+                   "preference_mediation", "preference_integrity")
+CANDIDATES = [
+    {"name": "Alpha", "attributes": {"administrative_experience": 5, "social_vision": 1,
+                                     "mediation_ability": 4, "ethical_integrity": 2}},
+    {"name": "Beta", "attributes": {"administrative_experience": 1, "social_vision": 5,
+                                    "mediation_ability": 2, "ethical_integrity": 5}},
+    {"name": "Gamma", "attributes": {"administrative_experience": 3, "social_vision": 3,
+                                     "mediation_ability": 3, "ethical_integrity": 3}},
+]
+
+
+@pytest.fixture(scope="module")
+def citizens():
+    return district_voting.initialize_citizen_population(NUM_CITIZENS, np.random.default_rng(2))
+
+
+def _as_citizen_dicts(population):
+    """Stessa popolazione nel formato di voting.initialize_citizen_preferences."""
+    return [dict(zip(PREFERENCE_KEYS, row.tolist()),
+                 traits=[t for t, on in zip(population.trait_names, mask) if on])
+            for row, mask in zip(population.preferences, population.trait_mask)]
+
+
+def test_population_has_distinct_traits_within_range(citizens):
+    cfg = config.resolve(None)
+    k_traits = min(cfg.CITIZEN_TRAIT_COUNT, len(cfg.CITIZEN_TRAITS))
+    assert len(citizens) == NUM_CITIZENS
+    assert (citizens.trait_mask.sum(axis=1) == k_traits).all()
+    low, high = cfg.CITIZEN_IDEAL_PREFERENCE_RANGE
+    assert citizens.preferences.min() >= low and citizens.preferences.max() <= high
+
+
+def test_batch_vote_matches_per_citizen_vote(citizens):
+    batch = district_voting.simulate_district_vote_batch(
+        citizens, CANDIDATES, np.random.default_rng(4))
+    random.seed(4)
+    reference = Counter(voting.simulate_citizen_vote(f"Citizen_{i+1}", CANDIDATES, data)
+                        for i, data in enumerate(_as_citizen_dicts(citizens)))
+
+    assert sum(batch.values()) == NUM_CITIZENS
+    # Generatori diversi: si confrontano le quote, non i singoli voti
+    names = [c["name"] for c in CANDIDATES]
+    np.testing.assert_allclose([batch[n] / NUM_CITIZENS for n in names],
+                               [reference[n] / NUM_CITIZENS for n in names], atol=0.03)
+
+
+def test_batch_vote_handles_empty_inputs(citizens):
+    rng = np.random.default_rng(0)
+    assert district_voting.simulate_district_vote_batch(citizens, [], rng) == Counter()
+    empty = district_voting.initialize_citizen_population(0, rng)
+    assert district_voting.simulate_district_vote_batch(empty, CANDIDATES, rng) == Counter()
+
+
+def test_run_district_election_reports_the_winner():
+    result = district_voting.run_district_election(1, CANDIDATES, 300, np.random.default_rng(8))
+    assert result["num_citizens"] == 300
+    assert sum(result["results"].values()) == 300
+    assert result["winner"]["name"] == result["results"].most_common(1)[0][0]
+
+
+@pytest.mark.parametrize("num_candidates, num_districts", [(10, 3), (9, 3), (2, 4), (0, 2)])
+def test_split_into_districts_is_contiguous_and_balanced(num_candidates, num_districts):
+    candidates = list(range(num_candidates))
+    districts = district_voting.split_into_districts(candidates, num_districts)
+    assert len(districts) == num_districts
+    assert [c for d in districts for c in d] == candidates
+    sizes = [len(d) for d in districts]
+    assert max(sizes) - min(sizes) <= 1
+    assert district_voting.split_into_districts(candidates, 0) == []
@@ -0,0 +1,90 @@
+# test_elector_state.py
+"""ElectorState: vista dict write-through e conversione dal/al vecchio formato."""
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import generation
+import simlog
+import utils
+import voting
+from elector_state import ElectorState
+
+CANDIDATES = [{"name": name, "party_id": party,
+               "attributes": {"administrative_experience": a, "social_vision": b,
+                              "mediation_ability": 3, "ethical_integrity": 3}}
+              for name, party, a, b in (("Alpha", "Reds", 5, 1), ("Beta", "Blues", 1, 5),
+                                        ("Gamma", "Greens", 3, 3))]
+
+
+@pytest.fixture()
+def state():
+    random.seed(4)
+    electors = generation.generate_grand_electors(40)
+    return voting.initialize_elector_preferences(electors, CANDIDATES, rng=utils.make_numpy_rng(4))
+
+
+def test_view_writes_through_to_arrays(state):
+    e_id = state.elector_ids[3]
+    view = state[e_id]
+    view["leanings"]["Beta"] = 7.5
+    view["identity_weight"] = 0.25
+    view["preference_social_vision"] = 2
+    view["weights"] = {"ethical_integrity": 4}
+    view["traits"] = ["Loyal"]
+
+    assert state.leanings[3, state.candidate_index["Beta"]] == 7.5
+    assert state.identity_weight[3] == 0.25
+    assert state.ideal_preferences[3, state.attribute_index["social_vision"]] == 2
+    assert state.weights[3, state.attribute_index["ethical_integrity"]] == 4
+    assert state.has_trait("Loyal")[3] and state.has_trait_at(3, "Loyal")
+    assert view["leanings"]["Beta"] == 7.5 and view["traits"] == ["Loyal"]
+    with pytest.raises(KeyError):
+        view["leanings"]["Nobody"] = 1.0
+    with pytest.raises(KeyError):
+        view["unknown_field"] = 1
+
+
+def test_copy_is_independent(state):
+    clone = state.copy()
+    clone.leanings[:] = 0.0
+    clone.traits[0].append("Extra")
+    assert state.leanings.any()
+    assert "Extra" not in state.traits[0]
+
+
+def test_to_dict_from_dict_round_trip(state):
+    snapshot = state.to_dict()
+    rebuilt = ElectorState.from_dict(snapshot)
+    assert rebuilt.elector_ids == state.elector_ids
+    assert rebuilt.candidate_names == state.candidate_names
+    for name in ("leanings", "initial_leanings", "weights", "ideal_preferences",
+                 "identity_weight", "policy_weight", "media_literacy",
+                 "media_preference_bias", "party_preference", "trait_mask"):
+        np.testing.assert_array_equal(getattr(rebuilt, name), getattr(state, name))
+    assert rebuilt.to_dict() == snapshot
+
+
+def test_from_dict_skips_unknown_keys_and_logs_bad_values(capsys):
+    settings = simlog.current_settings()
+    simlog.configure(level="WARNING", sink="stdout")
+    try:
+        state = ElectorState.from_dict({"GE_1": {
+            "leanings": {"Alpha": 2.0}, "identity_weight": "not a number",
+            "legacy_field": 123, "traits": []}})
+    finally:
+        simlog.configure(**settings)
+    output = capsys.readouterr().out
+    assert "identity_weight='not a number'" in output
+    assert "legacy_field" not in output
+    assert state.leanings[0, 0] == 2.0 and state.identity_weight[0] == 0.0
+
+
+def test_identify_key_electors_accepts_dicts_and_ignores_other_input(state):
+    results = Counter({"Alpha": 20, "Beta": 15, "Gamma": 5})
+    from_state = voting.identify_key_electors(state, results)
+    assert voting.identify_key_electors(state.to_dict(), results) == from_state
+    assert voting.identify_key_electors(None, results) == []
+    assert voting.identify_key_electors([1, 2], results) == []
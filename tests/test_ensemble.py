@@ -0,0 +1,31 @@
+# test_ensemble.py
+"""Ensemble Monte Carlo: il risultato dipende solo dal seed, non dai processi."""
+import config
+import ensemble
+
+SCENARIO = config.SimulationConfig.from_seed(3)
+
+
+def _run(max_workers, database_dir):
+    database_dir.mkdir()
+    results = []
+    aggregator = ensemble.run_ensemble(4, sim_config=SCENARIO, seed=99, max_workers=max_workers,
+                                       database_dir=str(database_dir), on_result=results.append)
+    return aggregator, sorted(results, key=lambda r: r["replicate"])
+
+
+def test_serial_and_parallel_runs_agree(tmp_path):
+    serial, serial_results = _run(1, tmp_path / "serial")
+    parallel, parallel_results = _run(2, tmp_path / "parallel")
+    assert serial.summary()["replicates"] == 4
+    assert serial.summary()["errors"] == 0
+    assert serial.summary() == parallel.summary()
+    assert serial_results == parallel_results
+    # DB temporanei delle repliche rimossi
+    assert not list((tmp_path / "serial").iterdir())
+
+
+def test_serial_run_restores_process_settings(tmp_path):
+    saved = (config.DISTRICT_WORKERS, ensemble.db_manager.DATABASE_FILE, ensemble.utils.HEADLESS)
+    ensemble.run_ensemble(1, sim_config=SCENARIO, seed=1, max_workers=1, database_dir=str(tmp_path))
+    assert (config.DISTRICT_WORKERS, ensemble.db_manager.DATABASE_FILE, ensemble.utils.HEADLESS) == saved
@@ -0,0 +1,85 @@
+# test_export.py
+"""Esportazione colonnare a blocchi: ResultsExporter e read_table."""
+import glob
+import json
+import os
+
+import numpy as np
+import pytest
+
+import export
+from elector_state import ElectorState
+
+CANDIDATES = [
+    {"uuid": "u-1", "name": "Alpha", "party_id": "Reds", "gender": "male", "age": 50,
+     "initial_budget": 100.0, "campaign_budget": 40.0},
+    {"uuid": "u-2", "name": "Beta", "party_id": "Blues", "gender": "female", "age": 44,
+     "initial_budget": 100.0, "campaign_budget": 65.5},
+]
+
+
+def _record(attempt):
+    record = export.AttemptRecord("run-a", attempt)
+    record.set_candidates(CANDIDATES)
+    for round_num in (1, 2):
+        record.add_round([("run-a", attempt, round_num, "u-1", 2 + round_num, 0.6, 50.0),
+                          ("run-a", attempt, round_num, "u-2", 2, 0.4, None)])
+    record.add_key_electors(1, [{"id": "Elector_2", "reasons": ["Is a Swing Voter",
+                                                                 "Swing b/w Alpha & Beta"]}])
+    state = ElectorState(["Elector_1", "Elector_2", "Elector_3"], ["Alpha", "Beta"])
+    state.leanings[:] = np.arange(6, dtype=float).reshape(3, 2) + attempt
+    record.finish(state, CANDIDATES, {"Alpha": 4, "Beta": 2}, governor="Alpha")
+    return record
+
+
+def _export(directory, formats, chunk_rows=3, attempts=3):
+    with export.ResultsExporter(str(directory), chunk_rows=chunk_rows, formats=formats) as exporter:
+        for attempt in range(1, attempts + 1):
+            exporter.write_attempt(_record(attempt))
+
+
+def test_npz_chunks_are_reassembled_in_order(tmp_path):
+    _export(tmp_path, ("npz",))
+    assert len(glob.glob(os.path.join(str(tmp_path), "rounds-*.npz"))) > 1
+
+    rounds = export.read_table(str(tmp_path), "rounds")
+    assert rounds["attempt"].tolist() == [1, 1, 1, 1, 2, 2, 2, 2, 3, 3, 3, 3]
+    assert rounds["round"].tolist() == [1, 1, 2, 2] * 3
+    assert rounds["votes"].tolist() == [3, 2, 4, 2] * 3
+    assert np.isnan(rounds["budget_remaining"][1])  # None -> NaN
+
+    candidates = export.read_table(str(tmp_path), "candidates")
+    assert candidates["name"].tolist() == ["Alpha", "Beta"] * 3
+    assert candidates["final_budget"].tolist() == [40.0, 65.5] * 3
+    assert candidates["elected"].tolist() == [True, False] * 3
+
+    key_electors = export.read_table(str(tmp_path), "key_electors")
+    assert key_electors["swing_voter"].all() and key_electors["swing_between"].all()
+    assert not key_electors["easily_influenced"].any()
+
+    leanings = export.read_table(str(tmp_path), "leanings")
+    assert leanings["elector_id"][:4].tolist() == ["Elector_1", "Elector_1", "Elector_2", "Elector_2"]
+    assert leanings["candidate_uuid"][:4].tolist() == ["u-1", "u-2", "u-1", "u-2"]
+    assert leanings["leaning"].tolist() == [float(v) for a in (1, 2, 3) for v in range(a, a + 6)]
+
+    with open(os.path.join(str(tmp_path), "manifest.json"), encoding="utf-8") as f:
+        manifest = json.load(f)
+    assert manifest["attempts"] == 3
+    assert manifest["tables"]["rounds"]["rows"] == 12
+    assert manifest["tables"]["rounds"]["npz_chunks"] > 1
+
+
+def test_read_table_of_missing_data_is_empty(tmp_path):
+    empty = export.read_table(str(tmp_path), "rounds")
+    assert all(len(values) == 0 for values in empty.values())
+    with pytest.raises(ValueError):
+        export.read_table(str(tmp_path), "unknown")
+
+
+def test_parquet_matches_npz(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    _export(tmp_path, ("npz", "parquet"))
+    parquet_rounds = pq.read_table(os.path.join(str(tmp_path), "rounds.parquet")).to_pydict()
+    npz_rounds = export.read_table(str(tmp_path), "rounds")
+    for col in ("attempt", "round", "candidate_uuid", "votes"):
+        assert parquet_rounds[col] == npz_rounds[col].tolist()
@@ -0,0 +1,46 @@
+# test_headless.py
+"""Runner batch: stesso --seed, stesso output JSON Lines."""
+import json
+
+import pytest
+
+import db_manager
+import headless
+
+# Dipendono dal tempo e da uuid4, non dal seed
+VOLATILE_KEYS = ("run_id", "elapsed")
+
+
+@pytest.fixture()
+def run_main(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_manager, "DATABASE_FILE", db_manager.DATABASE_FILE)
+
+    def run(name, *extra_args):
+        output = tmp_path / f"{name}.jsonl"
+        # Database nuovo per ogni batch: nessun candidato già salvato
+        assert headless.main(["--attempts", "2", "--db", str(tmp_path / f"{name}.db"),
+                              "--output", str(output), *extra_args]) == 0
+        db_manager.close_all_connections()
+        with open(output, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    return run
+
+
+def _stable(results):
+    return [{k: v for k, v in r.items() if k not in VOLATILE_KEYS} for r in results]
+
+
+def test_same_seed_gives_identical_results(run_main):
+    first = run_main("first", "--seed", "42")
+    second = run_main("second", "--seed", "42")
+    assert len(first) == 2
+    assert [r["run"] for r in first] == [1, 2]
+    assert len({r["run_id"] for r in first}) == 1  # Un run_id per batch
+    assert _stable(first) == _stable(second)
+    assert all(r["config_seed"] == 42 for r in first)  # Parametri estratti dal seed
+
+
+def test_invalid_attempts_is_rejected(capsys):
+    assert headless.main(["--attempts", "0"]) == 2
+    assert "--attempts" in capsys.readouterr().err
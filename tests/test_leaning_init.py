@@ -0,0 +1,115 @@
+# test_leaning_init.py
+"""Inizializzazione vettoriale delle preferenze: stessi intervalli ed effetti del vecchio loop."""
+import random
+
+import numpy as np
+import pytest
+
+import config
+import generation
+import utils
+import voting
+
+CANDIDATES = [
+    {"name": "Alpha", "party_id": "Reds",
+     "attributes": {"administrative_experience": 5, "social_vision": 1,
+                    "mediation_ability": 4, "ethical_integrity": 1}},
+    {"name": "Beta", "party_id": "Blues",
+     "attributes": {"administrative_experience": 2, "social_vision": 5,
+                    "mediation_ability": 3, "ethical_integrity": 5}},
+    {"name": "Gamma", "party_id": "Independent",
+     "attributes": {"administrative_experience": 3, "social_vision": 3,
+                    "mediation_ability": 3, "ethical_integrity": 2}},
+]
+PARTY_BIAS = {'Reds': -0.6, 'Blues': 0.7, 'Greens': -0.3, 'Golds': 0.4, 'Independent': 0.0}
+
+
+def _initialize(sim_config, num_electors=300, seed=8, preselected=None):
+    random.seed(seed)
+    electors = generation.generate_grand_electors(num_electors, sim_config=sim_config)
+    return voting.initialize_elector_preferences(
+        electors, CANDIDATES, preselected_candidates_info=preselected,
+        rng=utils.make_numpy_rng(seed), sim_config=sim_config)
+
+
+def _reference_leaning(cfg, elector, cand, preselected_names):
+    """Formula del vecchio loop per elettore (senza la componente casuale)."""
+    attrs = cand["attributes"]
+    w_dist_sum = sum(abs(attrs.get(attr, cfg.ATTRIBUTE_RANGE[0]) - elector[f"preference_{attr}"]) * weight
+                     for attr, weight in elector["weights"].items())
+    lean_policy = max(0.1, cfg.MAX_ELECTOR_LEANING_BASE
+                      - w_dist_sum * cfg.ELECTOR_ATTRIBUTE_MISMATCH_PENALTY_FACTOR)
+    id_score = 0.0
+    if elector["party_preference"] != "Independent" and cand["party_id"] == elector["party_preference"]:
+        id_score = cfg.MAX_ELECTOR_LEANING_BASE * cfg.IDENTITY_MATCH_BONUS_FACTOR
+    lean = lean_policy * elector["policy_weight"] + id_score * elector["identity_weight"]
+    if "Idealistic" in elector["traits"] and attrs.get("ethical_integrity", cfg.ATTRIBUTE_RANGE[0]) <= 2:
+        lean -= cfg.MAX_ELECTOR_LEANING_BASE * 0.2 * cfg.STRATEGIC_VOTING_TRAIT_PENALTY_IDEALISTIC_INTEGRITY
+    if cand["name"] in preselected_names:
+        lean += cfg.PRESELECTED_CANDIDATE_BOOST
+    return lean
+
+
+@pytest.fixture()
+def cfg():
+    return config.SimulationConfig.from_seed(21)
+
+
+def test_drawn_values_stay_in_the_baseline_ranges(cfg):
+    state = _initialize(cfg)
+    low, high = cfg.IDENTITY_WEIGHT_RANGE
+    partisan = state.has_trait("Strong Partisan")
+    assert np.all((state.identity_weight[~partisan] >= low) & (state.identity_weight[~partisan] <= high))
+    assert np.all(state.identity_weight[partisan] <= 0.95)
+    np.testing.assert_allclose(state.policy_weight, 1.0 - state.identity_weight)
+    for values, (low, high) in ((state.weights, cfg.ELECTOR_ATTRIBUTE_WEIGHT_RANGE),
+                                (state.ideal_preferences, cfg.ELECTOR_IDEAL_PREFERENCE_RANGE),
+                                (state.media_literacy, cfg.MEDIA_LITERACY_RANGE)):
+        assert values.min() >= low and values.max() <= high
+        assert values.max() > values.min()  # Non costanti
+    party_bias = np.array([PARTY_BIAS[p] for p in np.asarray(state.party_ids)[state.party_preference]])
+    assert np.all(np.abs(state.media_preference_bias - party_bias) <= 0.15)
+    assert set(np.asarray(state.party_ids)[state.party_preference]) <= set(cfg.PARTY_IDS)
+    assert state.leanings.min() >= 0.1
+    np.testing.assert_array_equal(state.leanings, state.initial_leanings)
+
+
+def test_leanings_follow_the_scalar_formula(cfg):
+    preselected = [CANDIDATES[1]]
+    state = _initialize(cfg, preselected=preselected)
+    variance = cfg.ELECTOR_RANDOM_LEANING_VARIANCE
+    for row, e_id in enumerate(state.elector_ids):
+        elector = state[e_id]
+        for col, cand in enumerate(CANDIDATES):
+            expected = _reference_leaning(cfg, elector, cand, {"Beta"})
+            # Il rumore uniforme è l'unica differenza, poi il minimo a 0.1
+            assert max(0.1, expected - variance) - 1e-9 <= state.leanings[row, col] \
+                <= max(0.1, expected + variance) + 1e-9
+
+
+def test_without_noise_the_formula_is_exact(cfg):
+    cfg = cfg.replace(ELECTOR_RANDOM_LEANING_VARIANCE=0.0)
+    state = _initialize(cfg, num_electors=120, preselected=[CANDIDATES[2]])
+    expected = np.array([[max(0.1, _reference_leaning(cfg, state[e_id], cand, {"Gamma"}))
+                          for cand in CANDIDATES] for e_id in state.elector_ids])
+    np.testing.assert_allclose(state.leanings, expected)
+
+
+def test_party_and_trait_effects_show_in_the_averages(cfg):
+    state = _initialize(cfg, num_electors=2000)
+    parties = np.asarray(state.party_ids)[state.party_preference]
+    reds, blues = state.leanings[:, 0], state.leanings[:, 1]
+    # Elettori Reds preferiscono Alpha (Reds) più degli altri elettori, idem Blues con Beta
+    assert reds[parties == "Reds"].mean() > reds[parties != "Reds"].mean()
+    assert blues[parties == "Blues"].mean() > blues[parties != "Blues"].mean()
+    # Idealistic penalizza i candidati con integrità bassa (Alpha), non Beta
+    idealistic = state.has_trait("Idealistic")
+    assert reds[idealistic].mean() < reds[~idealistic].mean()
+    assert state.identity_weight[state.has_trait("Strong Partisan")].mean() > \
+        state.identity_weight[~state.has_trait("Strong Partisan")].mean()
+
+
+def test_same_rng_seed_gives_the_same_state(cfg):
+    first, second = _initialize(cfg, seed=5), _initialize(cfg, seed=5)
+    np.testing.assert_array_equal(first.leanings, second.leanings)
+    np.testing.assert_array_equal(first.weights, second.weights)
@@ -0,0 +1,46 @@
+# test_round_results.py
+"""Tabella round_results: righe per round e traiettorie dei voti."""
+from collections import Counter
+
+import db_manager
+
+CANDIDATES = [
+    {"uuid": "u-1", "name": "Ada Rossi", "campaign_budget": 80.0},
+    {"uuid": "u-2", "name": "Bruno Verdi", "campaign_budget": 60.0},
+    {"uuid": "u-3", "name": "Carla Blu", "campaign_budget": 20.0},
+]
+
+
+def test_round_result_rows_include_candidates_without_votes():
+    rows = db_manager.round_result_rows("run-a", 1, 2, CANDIDATES,
+                                        Counter({"Ada Rossi": 3, "Bruno Verdi": 1}))
+    assert rows == [
+        ("run-a", 1, 2, "u-1", 3, 0.75, 80.0),
+        ("run-a", 1, 2, "u-2", 1, 0.25, 60.0),
+        ("run-a", 1, 2, "u-3", 0, 0.0, 20.0),
+    ]
+    assert db_manager.round_result_rows("run-a", 1, 1, CANDIDATES, Counter())[0][5] == 0.0
+
+
+def test_trajectories_are_read_back_in_round_order(temp_db):
+    tallies = {1: Counter({"Ada Rossi": 2, "Bruno Verdi": 2}),
+               2: Counter({"Ada Rossi": 3, "Bruno Verdi": 1}),
+               3: Counter({"Ada Rossi": 4})}
+    # Inseriti in ordine sparso: la lettura li ordina per round
+    for round_num in (3, 1, 2):
+        assert db_manager.save_round_results(db_manager.round_result_rows(
+            "run-a", 1, round_num, CANDIDATES[:2], tallies[round_num]))
+    db_manager.save_round_results(db_manager.round_result_rows(
+        "run-b", 1, 1, CANDIDATES, Counter({"Carla Blu": 5})))
+
+    trajectories = db_manager.get_vote_trajectories(run_id="run-a")
+    assert set(trajectories) == {"u-1", "u-2"}
+    assert [p["round"] for p in trajectories["u-1"]] == [1, 2, 3]
+    assert [p["votes"] for p in trajectories["u-1"]] == [2, 3, 4]
+    assert [p["share"] for p in trajectories["u-2"]] == [0.5, 0.25, 0.0]
+    assert trajectories["u-1"][0] == {"run_id": "run-a", "attempt": 1, "round": 1, "votes": 2,
+                                      "share": 0.5, "budget_remaining": 80.0}
+
+    only_carla = db_manager.get_vote_trajectories(candidate_uuid="u-3")
+    assert [(p["run_id"], p["votes"]) for p in only_carla["u-3"]] == [("run-b", 5)]
+    assert len(db_manager.get_vote_trajectories()) == 3
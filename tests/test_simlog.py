@@ -0,0 +1,59 @@
+# test_simlog.py
+"""simlog: livelli per categoria, destinazioni e disable()."""
+import pytest
+
+import simlog
+
+
+@pytest.fixture(autouse=True)
+def restore_settings():
+    settings = simlog.current_settings()
+    yield
+    simlog.configure(**settings)
+
+
+def test_level_flags_gate_messages(capsys):
+    log = simlog.get("test_levels")
+    simlog.configure(level="INFO", sink="stdout", levels={})
+    assert not log.debug and log.info and log.warning and log.error
+    log.write("hidden debug")
+    log.write("shown info", simlog.INFO)
+    assert capsys.readouterr().out == "shown info\n"
+
+    simlog.configure(level="ERROR")
+    assert not log.info and not log.warning and log.error
+    log.write("hidden warning", simlog.WARNING)
+    assert capsys.readouterr().out == ""
+
+
+def test_category_levels_override_global_level(capsys):
+    quiet, loud = simlog.get("test_quiet"), simlog.get("test_loud")
+    simlog.configure(level="WARNING", sink="stdout", levels={"test_loud": "debug"})
+    assert loud.debug and not quiet.info
+    simlog.configure(levels={})
+    assert not loud.debug
+
+
+def test_disable_suppresses_every_category(capsys):
+    log = simlog.get("test_disable")
+    simlog.configure(level="DEBUG", sink="stdout")
+    simlog.disable()
+    assert not (log.debug or log.info or log.warning or log.error)
+    log.write("nothing", simlog.ERROR)
+    assert capsys.readouterr() == ("", "")
+    assert simlog.current_settings()["sink"] is None
+
+
+def test_file_sink_writes_level_and_category(tmp_path):
+    log_file = tmp_path / "sim.log"
+    log = simlog.get("test_file")
+    simlog.configure(level="DEBUG", sink=str(log_file))
+    log.write("to file", simlog.WARNING)
+    simlog.configure(sink="stdout")  # Chiude il file
+    line = log_file.read_text(encoding="utf-8").strip()
+    assert line.endswith("WARNING [test_file] to file")
+
+
+def test_unknown_level_is_rejected():
+    with pytest.raises(ValueError):
+        simlog.parse_level("verbose")
@@ -0,0 +1,60 @@
+# test_snapshots.py
+"""Istantanee per round su memmap: scrittura con SnapshotRecorder e rilettura."""
+import numpy as np
+import pytest
+
+import snapshots
+from elector_state import ElectorState
+
+
+@pytest.fixture()
+def state():
+    return ElectorState([f"Elector_{i}" for i in range(1, 6)], ["Alpha", "Beta", "Gamma"])
+
+
+def _fill(state, round_num):
+    state.leanings[:] = np.arange(15, dtype=float).reshape(5, 3) + 100 * round_num
+    state.identity_weight[:] = round_num / 10
+    state.policy_weight[:] = 1 - round_num / 10
+
+
+def test_recorded_rounds_are_read_back(tmp_path, state):
+    path = snapshots.snapshot_path(str(tmp_path), "run-a", 1)
+    with snapshots.SnapshotRecorder(path, state, max_rounds=4, run_id="run-a", attempt=1) as recorder:
+        for round_num in (1, 2, 3):
+            _fill(state, round_num)
+            recorder.record(round_num, state)
+        recorder.record(9, state)  # Oltre max_rounds: ignorato
+
+    reader = snapshots.open_snapshot(path)
+    assert len(reader) == 3
+    assert reader.header["run_id"] == "run-a" and reader.header["max_rounds"] == 4
+    assert reader.candidate_names == ["Alpha", "Beta", "Gamma"]
+    assert reader.elector_ids == list(state.elector_ids)
+    for snap in reader:
+        assert snap.leanings.shape == (5, 3) and snap.leanings.dtype == np.dtype("<f8")
+        assert snap.identity_weight.shape == snap.policy_weight.shape == (5,)
+        np.testing.assert_array_equal(
+            snap.leanings, np.arange(15, dtype=float).reshape(5, 3) + 100 * snap.round)
+        np.testing.assert_allclose(snap.identity_weight, snap.round / 10)
+        np.testing.assert_allclose(snap.policy_weight, 1 - snap.round / 10)
+    leanings = reader.leanings(2)  # Vista zero-copy in sola lettura sul file
+    assert not leanings.flags.owndata and not leanings.flags.writeable
+    np.testing.assert_array_equal(reader.candidate_leanings("Beta")[:, 0], [101, 201, 301])
+    with pytest.raises(IndexError):
+        reader.round(4)
+
+
+def test_snapshot_paths_do_not_overwrite(tmp_path, state):
+    first = snapshots.snapshot_path(str(tmp_path), "run-a", 2)
+    snapshots.SnapshotRecorder(first, state, max_rounds=1).close()
+    second = snapshots.snapshot_path(str(tmp_path), "run-a", 2)
+    assert first.endswith("run-a_attempt002.snap")
+    assert second.endswith("run-a_attempt002-2.snap")
+
+
+def test_reader_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_snapshot.snap"
+    path.write_bytes(b"NOTSNAP!" + bytes(16))
+    with pytest.raises(ValueError):
+        snapshots.SnapshotReader(str(path))
@@ -0,0 +1,94 @@
+# test_social_influence.py
+"""SocialInfluenceEngine.step contro un'iterazione per elettore sul grafo networkx."""
+import random
+
+import numpy as np
+import pytest
+
+import config
+import generation
+import social_influence
+import utils
+import voting
+
+CANDIDATES = [{"name": name, "party_id": "Independent",
+               "attributes": {"administrative_experience": 3, "social_vision": 3,
+                              "mediation_ability": 3, "ethical_integrity": 3}}
+              for name in ("Alpha", "Beta", "Gamma")]
+
+
+@pytest.fixture()
+def network_state():
+    random.seed(21)
+    electors = generation.generate_grand_electors(300)
+    state = voting.initialize_elector_preferences(electors, CANDIDATES, rng=utils.make_numpy_rng(21))
+    graph = generation.create_elector_network(state.elector_ids)
+    # Alcuni isolati: non devono muoversi
+    isolated = state.elector_ids[:5]
+    graph.remove_edges_from(list(graph.edges(isolated)))
+    return graph, state
+
+
+def _reference_step(graph, state, alpha):
+    """Versione per elettore: tutti leggono lo stato precedente (aggiornamento sincrono)."""
+    cfg = config.resolve(None)
+    learning_rate = cfg.ELECTOR_LEARNING_RATE * cfg.SOCIAL_INFLUENCE_LEARNING_EFFECT
+    old = state.copy()
+    expected = state.copy()
+    for row, e_id in enumerate(state.elector_ids):
+        neighbors = [old.elector_index[n] for n in graph.neighbors(e_id)]
+        if not neighbors:
+            continue
+        mean_leanings = old.leanings[neighbors].mean(axis=0)
+        blended = old.leanings[row] + alpha[row] * (mean_leanings - old.leanings[row])
+        expected.leanings[row] = np.maximum(0.1, blended)
+        identity = old.identity_weight[row]
+        identity += learning_rate * (old.identity_weight[neighbors].mean() - identity)
+        expected.identity_weight[row] = min(0.95, max(0.05, identity))
+    expected.policy_weight[:] = 1.0 - expected.identity_weight
+    return expected
+
+
+def _assert_same_state(actual, expected):
+    np.testing.assert_allclose(actual.leanings, expected.leanings, rtol=1e-12)
+    np.testing.assert_allclose(actual.identity_weight, expected.identity_weight, rtol=1e-12)
+    np.testing.assert_allclose(actual.policy_weight, expected.policy_weight, rtol=1e-12)
+
+
+def test_step_matches_per_elector_reference(network_state):
+    graph, state = network_state
+    engine = social_influence.SocialInfluenceEngine(graph, state.elector_ids)
+    alpha = engine.susceptibility(state)
+    expected = _reference_step(graph, state, alpha)
+
+    engine.step(state, alpha)
+    _assert_same_state(state, expected)
+
+
+def test_isolated_electors_are_unchanged(network_state):
+    graph, state = network_state
+    engine = social_influence.SocialInfluenceEngine(graph, state.elector_ids)
+    before = state.copy()
+    engine.run(state, 3)
+    assert not engine.has_neighbors[:5].any()
+    np.testing.assert_array_equal(state.leanings[:5], before.leanings[:5])
+    np.testing.assert_array_equal(state.identity_weight[:5], before.identity_weight[:5])
+
+
+def test_fallback_without_scipy_matches_sparse_path(network_state):
+    graph, state = network_state
+    fallback_state = state.copy()
+    engine = social_influence.SocialInfluenceEngine(graph, state.elector_ids)
+    fallback = social_influence.SocialInfluenceEngine(graph, state.elector_ids)
+    fallback._matrix = None  # Percorso np.add.at
+
+    engine.run(state, 4)
+    fallback.run(fallback_state, 4)
+    _assert_same_state(fallback_state, state)
+
+
+def test_run_rejects_mismatched_elector_order(network_state):
+    graph, state = network_state
+    engine = social_influence.SocialInfluenceEngine(graph, list(reversed(state.elector_ids)))
+    with pytest.raises(ValueError):
+        engine.run(state, 1)
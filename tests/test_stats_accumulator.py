@@ -0,0 +1,55 @@
+# test_stats_accumulator.py
+"""Incrementi delle statistiche accumulati e scritti in un'unica transazione."""
+import db_manager
+
+
+def _candidate(name, c_uuid):
+    return {"uuid": c_uuid, "name": name, "gender": "male", "age": 50, "party_id": "Blues",
+            "initial_budget": 100.0, "current_budget": 100.0,
+            "attributes": {}, "traits": [], "stats": {}}
+
+
+def test_accumulated_increments_are_summed_per_candidate():
+    batches = []
+    accumulator = db_manager.StatsAccumulator(sink=batches.append)
+    accumulator.add("u-1", {"rounds_participated_all_time": 1, "total_votes_received_all_time": 5})
+    accumulator.add("u-1", {"rounds_participated_all_time": 1, "total_votes_received_all_time": 7})
+    accumulator.add("u-2", {"rounds_participated_all_time": 1})
+    accumulator.add(None, {"rounds_participated_all_time": 1})  # Ignorato
+    assert len(accumulator) == 2
+
+    accumulator.flush()
+    accumulator.flush()  # Niente da scrivere: il sink non viene richiamato
+    assert batches == [{
+        "u-1": {"rounds_participated_all_time": 2, "total_votes_received_all_time": 12},
+        "u-2": {"rounds_participated_all_time": 1},
+    }]
+    assert len(accumulator) == 0
+
+
+def test_flush_writes_every_candidate_in_one_transaction(temp_db):
+    db_manager.save_candidates([_candidate("Ugo Neri", "u-1"), _candidate("Leo Bianchi", "u-2")])
+    accumulator = db_manager.StatsAccumulator()
+    for _ in range(3):
+        accumulator.add("u-1", {"rounds_participated_all_time": 1, "total_votes_received_all_time": 4})
+        accumulator.add("u-2", {"rounds_participated_all_time": 1, "total_votes_received_all_time": 2})
+    accumulator.add("u-2", {"governor_wins": 1})
+
+    statements = []
+    conn = db_manager.get_db_connection()
+    conn.set_trace_callback(statements.append)
+    try:
+        accumulator.flush()
+    finally:
+        conn.set_trace_callback(None)
+
+    assert sum(s.startswith("BEGIN") for s in statements) == 1
+    assert sum(s.startswith("COMMIT") for s in statements) == 1
+    # Un UPDATE per candidato (executemany), non uno per incremento
+    assert sum(s.lstrip().upper().startswith("UPDATE") for s in statements) == 2
+
+    first = db_manager.get_candidate_by_uuid("u-1")["stats"]
+    second = db_manager.get_candidate_by_uuid("u-2")["stats"]
+    assert (first["rounds_participated_all_time"], first["total_votes_received_all_time"]) == (3, 12)
+    assert (second["rounds_participated_all_time"], second["total_votes_received_all_time"]) == (3, 6)
+    assert (first["governor_wins"], second["governor_wins"]) == (0, 1)
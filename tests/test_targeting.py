@@ -0,0 +1,73 @@
+# test_targeting.py
+"""Campionamento pesato senza reinserimento di TargetingPlan."""
+import itertools
+
+import numpy as np
+import pytest
+
+from targeting import TargetingPlan
+
+TRIALS = 20000
+
+
+def _sequential_inclusion(weights, k):
+    """Probabilità esatta di inclusione con k estrazioni pesate successive."""
+    n = len(weights)
+    inclusion = np.zeros(n)
+    for order in itertools.permutations(range(n), k):
+        p, remaining = 1.0, float(sum(weights))
+        for i in order:
+            p *= weights[i] / remaining
+            remaining -= weights[i]
+        inclusion[list(order)] += p
+    return inclusion
+
+
+def test_samples_are_distinct_and_k_is_capped():
+    rng = np.random.default_rng(1)
+    plan = TargetingPlan(range(50), rng.random(50))
+    for k in (1, 10, 50, 80):
+        picked = plan.sample_indices(k, rng)
+        assert len(picked) == min(k, 50)
+        assert len(set(picked.tolist())) == len(picked)
+    assert plan.sample(0, rng) == []
+
+
+def test_first_pick_follows_weights():
+    weights = np.array([1.0, 2.0, 3.0, 4.0])
+    plan = TargetingPlan("abcd", weights)
+    rng = np.random.default_rng(7)
+    first = np.bincount([plan.sample_indices(2, rng)[0] for _ in range(TRIALS)], minlength=4)
+    np.testing.assert_allclose(first / TRIALS, weights / weights.sum(), atol=0.015)
+
+
+def test_inclusion_matches_successive_weighted_draws():
+    weights = [5.0, 1.0, 3.0, 0.5, 2.0]
+    plan = TargetingPlan(range(5), weights)
+    rng = np.random.default_rng(3)
+    counts = np.zeros(5)
+    for _ in range(TRIALS):
+        counts[plan.sample_indices(3, rng)] += 1
+    np.testing.assert_allclose(counts / TRIALS, _sequential_inclusion(weights, 3), atol=0.015)
+
+
+def test_zero_weights_only_fill_up_k():
+    weights = [0.0, 1.0, 0.0, 2.0, float("nan"), 3.0]
+    plan = TargetingPlan(range(6), weights)
+    rng = np.random.default_rng(5)
+    for _ in range(200):
+        assert set(plan.sample_indices(3, rng).tolist()) == {1, 3, 5}
+        picked = plan.sample_indices(5, rng).tolist()
+        assert set(picked[:3]) == {1, 3, 5}  # Prima i pesi positivi
+        assert len(set(picked)) == 5
+
+
+def test_all_zero_weights_fall_back_to_uniform():
+    plan = TargetingPlan(range(4), [0, 0, 0, 0])
+    np.testing.assert_allclose(plan.probabilities, 0.25)
+    assert len(plan.sample_indices(4, np.random.default_rng(0))) == 4
+
+
+def test_weights_must_match_population():
+    with pytest.raises(ValueError):
+        TargetingPlan(range(3), [1.0, 2.0])
@@ -0,0 +1,101 @@
+# test_update_channel.py
+"""Canale simulazione -> GUI: fusione dello stato, barriere e buffer circolare."""
+import utils
+from utils import (UPDATE_TYPE_COMPLETE, UPDATE_TYPE_ERROR, UPDATE_TYPE_FLAG,
+                   UPDATE_TYPE_MESSAGE, UPDATE_TYPE_RESULTS, UPDATE_TYPE_STATUS,
+                   UPDATE_TYPE_WARNING, UpdateChannel)
+
+
+def _attached(max_messages=10):
+    channel = UpdateChannel(max_messages)
+    channel.attach()
+    return channel
+
+
+def test_put_is_noop_without_consumer():
+    channel = UpdateChannel(10)
+    channel.put(UPDATE_TYPE_MESSAGE, "lost")
+    channel.put(UPDATE_TYPE_STATUS, {"round": 1})
+    assert channel.drain() == ([], 0)
+
+
+def test_state_updates_keep_only_latest_value():
+    channel = _attached()
+    channel.put(UPDATE_TYPE_STATUS, {"round": 1, "phase": "vote"})
+    channel.put(UPDATE_TYPE_RESULTS, ["r1"])
+    channel.put(UPDATE_TYPE_STATUS, {"round": 2})
+    channel.put(UPDATE_TYPE_RESULTS, ["r2"])
+    channel.put(UPDATE_TYPE_FLAG, False)
+    channel.put(UPDATE_TYPE_FLAG, True)
+    updates, dropped = channel.drain()
+    assert dropped == 0
+    assert sorted(updates) == sorted([(UPDATE_TYPE_STATUS, {"round": 2, "phase": "vote"}),
+                                      (UPDATE_TYPE_RESULTS, ["r2"]),
+                                      (UPDATE_TYPE_FLAG, True)])
+
+
+def test_updates_are_delivered_in_send_order():
+    channel = _attached()
+    channel.put(UPDATE_TYPE_STATUS, {"a": 1})
+    channel.put(UPDATE_TYPE_MESSAGE, "m1")
+    channel.put(UPDATE_TYPE_STATUS, {"b": 2})  # Sposta lo STATUS dopo m1
+    channel.put(UPDATE_TYPE_WARNING, "w1")
+    updates, _ = channel.drain()
+    assert updates == [(UPDATE_TYPE_MESSAGE, "m1"), (UPDATE_TYPE_STATUS, {"a": 1, "b": 2}),
+                       (UPDATE_TYPE_WARNING, "w1")]
+
+
+def test_barrier_closes_open_state():
+    channel = _attached()
+    channel.put(UPDATE_TYPE_STATUS, {"phase": "running"})
+    channel.put(UPDATE_TYPE_RESULTS, ["final"])
+    channel.put(UPDATE_TYPE_COMPLETE, "winner")
+    channel.put(UPDATE_TYPE_STATUS, {"phase": "done"})
+    channel.put(UPDATE_TYPE_ERROR, "boom")
+    channel.put(UPDATE_TYPE_STATUS, {"phase": "failed"})
+    updates, _ = channel.drain()
+    assert updates == [(UPDATE_TYPE_STATUS, {"phase": "running"}),
+                       (UPDATE_TYPE_RESULTS, ["final"]),
+                       (UPDATE_TYPE_COMPLETE, "winner"),
+                       (UPDATE_TYPE_STATUS, {"phase": "done"}),
+                       (UPDATE_TYPE_ERROR, "boom"),
+                       (UPDATE_TYPE_STATUS, {"phase": "failed"})]
+
+
+def test_log_overflow_drops_oldest_and_counts_them():
+    channel = _attached(max_messages=3)
+    for i in range(5):
+        channel.put(UPDATE_TYPE_MESSAGE, f"m{i}")
+    channel.put(UPDATE_TYPE_STATUS, {"round": 1})  # Lo stato non occupa il buffer
+    updates, dropped = channel.drain()
+    assert dropped == 2
+    assert updates == [(UPDATE_TYPE_MESSAGE, "m2"), (UPDATE_TYPE_MESSAGE, "m3"),
+                       (UPDATE_TYPE_MESSAGE, "m4"), (UPDATE_TYPE_STATUS, {"round": 1})]
+    # drain() azzera coda e contatore
+    assert channel.drain() == ([], 0)
+    channel.put(UPDATE_TYPE_MESSAGE, "again")
+    assert channel.drain() == ([(UPDATE_TYPE_MESSAGE, "again")], 0)
+
+
+def test_detach_discards_pending_updates():
+    channel = _attached(max_messages=1)
+    channel.put(UPDATE_TYPE_MESSAGE, "m0")
+    channel.put(UPDATE_TYPE_MESSAGE, "m1")
+    channel.put(UPDATE_TYPE_STATUS, {"round": 1})
+    channel.detach()
+    assert not channel.consumer_attached
+    assert channel.drain() == ([], 0)
+    channel.put(UPDATE_TYPE_MESSAGE, "after detach")
+    assert channel.drain() == ([], 0)
+
+
+def test_send_pygame_update_respects_consumer_and_headless(monkeypatch):
+    channel = UpdateChannel(10)
+    monkeypatch.setattr(utils, "update_channel", channel)
+    monkeypatch.setattr(utils, "HEADLESS", False)
+    utils.send_pygame_update(UPDATE_TYPE_MESSAGE, "no consumer")
+    channel.attach()
+    utils.send_pygame_update(UPDATE_TYPE_MESSAGE, "delivered")
+    monkeypatch.setattr(utils, "HEADLESS", True)
+    utils.send_pygame_update(UPDATE_TYPE_MESSAGE, "headless")
+    assert channel.drain() == ([(UPDATE_TYPE_MESSAGE, "delivered")], 0)
@@ -0,0 +1,76 @@
+# test_voting_batch.py
+"""simulate_college_vote_batch contro il voto per elettore (simulate_ai_vote)."""
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import generation
+import utils
+import voting
+
+NUM_ELECTORS = 4000
+CANDIDATES = [
+    {"name": "Alpha", "party_id": "Reds", "attributes": {
+        "administrative_experience": 5, "social_vision": 2, "mediation_ability": 4, "ethical_integrity": 3}},
+    {"name": "Beta", "party_id": "Blues", "attributes": {
+        "administrative_experience": 2, "social_vision": 5, "mediation_ability": 3, "ethical_integrity": 4}},
+    {"name": "Gamma", "party_id": "Greens", "attributes": {
+        "administrative_experience": 3, "social_vision": 3, "mediation_ability": 5, "ethical_integrity": 2}},
+    {"name": "Delta", "party_id": "Independent", "attributes": {
+        "administrative_experience": 1, "social_vision": 1, "mediation_ability": 1, "ethical_integrity": 5}},
+]
+
+
+@pytest.fixture(scope="module")
+def elector_state():
+    random.seed(11)
+    electors = generation.generate_grand_electors(NUM_ELECTORS)
+    return voting.initialize_elector_preferences(electors, CANDIDATES, rng=utils.make_numpy_rng(11))
+
+
+def _per_elector_tally(state, last_results, current_round, seed):
+    random.seed(seed)
+    votes = [voting.simulate_ai_vote(e_id, CANDIDATES, state[e_id], last_results,
+                                     current_round, CANDIDATES)
+             for e_id in state.elector_ids]
+    return Counter(votes)
+
+
+def _shares(tally, total):
+    return np.array([tally.get(c["name"], 0) / total for c in CANDIDATES])
+
+
+@pytest.mark.parametrize("last_results, current_round", [
+    (None, 0),                                                    # Solo leanings
+    (Counter({"Alpha": 2000, "Beta": 1200, "Gamma": 600, "Delta": 200}), 1),  # Bandwagon/underdog
+    (Counter({"Alpha": 2600, "Beta": 1000, "Gamma": 300, "Delta": 100}), 8),  # Voto strategico
+])
+def test_batch_vote_matches_per_elector_vote(elector_state, last_results, current_round):
+    batch = voting.simulate_college_vote_batch(
+        elector_state, CANDIDATES, last_results, current_round, rng=np.random.default_rng(5))
+    reference = _per_elector_tally(elector_state, last_results, current_round, seed=5)
+
+    assert sum(batch.values()) == NUM_ELECTORS
+    assert sum(reference.values()) == NUM_ELECTORS
+    # Generatori diversi (NumPy vs random): stessa distribuzione, non stessi voti.
+    # Scarto tipico delle quote ~0.01 con 4000 elettori.
+    np.testing.assert_allclose(_shares(batch, NUM_ELECTORS), _shares(reference, NUM_ELECTORS),
+                               atol=0.04)
+
+
+def test_batch_vote_is_reproducible_with_same_seed(elector_state):
+    first = voting.simulate_college_vote_batch(elector_state, CANDIDATES, rng=np.random.default_rng(3))
+    second = voting.simulate_college_vote_batch(elector_state, CANDIDATES, rng=np.random.default_rng(3))
+    assert first == second
+
+
+def test_batch_vote_only_counts_votable_candidates(elector_state):
+    tally = voting.simulate_college_vote_batch(
+        elector_state, CANDIDATES[:1], rng=np.random.default_rng(0))
+    assert tally == Counter({"Alpha": NUM_ELECTORS})
+
+
+def test_batch_vote_rejects_non_state_input():
+    assert voting.simulate_college_vote_batch({}, CANDIDATES) == Counter()
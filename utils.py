@@ -1,26 +1,10 @@
 # utils.py
-import queue
+import random
 import threading  # Importa threading se usi simulation_running_event qui
+from collections import deque
+from operator import itemgetter
 
-# --- Pygame Output Handling ---
-pygame_update_queue = queue.Queue()
-# Evento per segnalare se la simulazione è attiva (impostato da gui.py)
-# Rimosso: simulation_running_event = None # Viene gestito direttamente in gui.py
-
-
-def send_pygame_update(update_type, data=None):
-    """Sends an update message to the Pygame queue if Pygame display is active."""
-    try:
-        import pygame
-        # Controlla se Pygame e il suo modulo display sono inizializzati
-        if pygame.get_init() and pygame.display.get_init():
-            pygame_update_queue.put((update_type, data))
-    except (ImportError, pygame.error):  # pragma: no cover
-        # Pygame non disponibile o non inizializzato, ignora l'invio
-        pass
-    except Exception as e:  # pragma: no cover # Altre eccezioni impreviste
-        print(f"Error sending Pygame update ({update_type}): {e}")
-
+import config
 
 # Update types for Pygame queue
 UPDATE_TYPE_MESSAGE = "message"
@@ -31,3 +15,110 @@ UPDATE_TYPE_COMPLETE = "complete"
 UPDATE_TYPE_ERROR = "error"
 UPDATE_TYPE_WARNING = "warning"
 UPDATE_TYPE_KEY_ELECTORS = "key_electors"
+
+
+class UpdateChannel:
+    """
+    Canale simulazione -> GUI, limitato e non bloccante per il produttore.
+    - STATUS, RESULTS e FLAG sono stato: conta solo l'ultimo valore (STATUS
+      fonde i dict parziali), quindi non si accumulano.
+    - COMPLETE ed ERROR chiudono i valori aperti: uno STATUS inviato dopo
+      non si fonde con quelli precedenti e viene consegnato dopo di loro.
+    - Messaggi, warning ed elettori chiave finiscono in un buffer circolare
+      (config.GUI_LOG_BUFFER_SIZE): se la GUI resta indietro i più vecchi
+      vengono scartati e contati in `dropped`.
+    Senza consumatore collegato (attach()) put() ritorna subito.
+    drain() consegna tutto in un colpo, nell'ordine di invio.
+    """
+
+    LATEST_VALUE_TYPES = (UPDATE_TYPE_STATUS, UPDATE_TYPE_RESULTS, UPDATE_TYPE_FLAG)
+    BARRIER_TYPES = (UPDATE_TYPE_COMPLETE, UPDATE_TYPE_ERROR)
+
+    def __init__(self, max_messages=None):
+        self.max_messages = max(1, int(max_messages or config.GUI_LOG_BUFFER_SIZE))
+        self.consumer_attached = False
+        self._lock = threading.Lock()
+        self._sequence = 0
+        self._state = []    # [sequenza, tipo, dati] di stato e barriere
+        self._open = {}     # tipo -> voce di _state ancora fondibile
+        self._log = deque(maxlen=self.max_messages)  # (sequenza, tipo, dati)
+        self.dropped = 0
+
+    def attach(self):
+        """Collega il consumatore (GUI): da qui in poi put() accoda."""
+        with self._lock:
+            self.consumer_attached = True
+
+    def detach(self):
+        with self._lock:
+            self.consumer_attached = False
+            self._state, self._open, self.dropped = [], {}, 0
+            self._log.clear()
+
+    def put(self, update_type, data=None):
+        with self._lock:
+            if not self.consumer_attached:
+                return
+            self._sequence += 1
+            if update_type in self.LATEST_VALUE_TYPES:
+                entry = self._open.get(update_type)
+                if entry is None:
+                    entry = [self._sequence, update_type, data]
+                    self._state.append(entry)
+                    self._open[update_type] = entry
+                    return
+                entry[0] = self._sequence
+                if (update_type == UPDATE_TYPE_STATUS and isinstance(entry[2], dict)
+                        and isinstance(data, dict)):
+                    entry[2] = {**entry[2], **data}
+                else:
+                    entry[2] = data
+            elif update_type in self.BARRIER_TYPES:
+                self._state.append([self._sequence, update_type, data])
+                self._open.clear()
+            else:
+                if len(self._log) == self.max_messages:
+                    self.dropped += 1
+                self._log.append((self._sequence, update_type, data))
+
+    def drain(self):
+        """
+        Tutti gli aggiornamenti in attesa come [(tipo, dati)] nell'ordine di
+        invio, più il numero di messaggi di log scartati dall'ultimo drain.
+        """
+        with self._lock:
+            if not self._state and not self._log:
+                return [], 0
+            state, self._state, self._open = self._state, [], {}
+            log, self._log = self._log, deque(maxlen=self.max_messages)
+            dropped, self.dropped = self.dropped, 0
+        pending = sorted(state + list(log), key=itemgetter(0))
+        return [(update_type, data) for _, update_type, data in pending], dropped
+
+
+# --- Pygame Output Handling ---
+update_channel = UpdateChannel()
+# Modalità headless (batch/ensemble): nessun traffico nel canale
+HEADLESS = False
+# Evento per segnalare se la simulazione è attiva (impostato da gui.py)
+# Rimosso: simulation_running_event = None # Viene gestito direttamente in gui.py
+
+
+def send_pygame_update(update_type, data=None):
+    """Sends an update to the GUI channel (no-op without an attached consumer)."""
+    if HEADLESS or not update_channel.consumer_attached:
+        return
+    update_channel.put(update_type, data)
+
+
+def make_numpy_rng(seed=None):
+    """
+    Returns a NumPy Generator for the vectorized code paths.
+    Without an explicit seed it is derived from the `random` module state,
+    so random.seed() keeps whole simulations reproducible.
+    """
+    import numpy as np
+    if seed is None:
+        seed = random.getrandbits(64)
+    return np.random.default_rng(seed)
+
@@ -3,50 +3,50 @@
 import random
 import math
 from collections import Counter
-import copy
+from collections.abc import Mapping
 import networkx as nx
 import uuid
 import json
 import time
 import traceback
+import numpy as np  # Richiesto dallo stato colonnare degli elettori
 
 # Import moduli del progetto
 import config
 import utils
-import db_manager
-
-# Importa configurazioni specifiche se necessario (es. MEDIA_OUTLETS)
-try:
-    # Assumendo che MEDIA_OUTLETS sia definito in config.py
-    from config import MEDIA_OUTLETS
-except ImportError:  # pragma: no cover
-    MEDIA_OUTLETS = []
-    print("Warning: MEDIA_OUTLETS not found in config.py.")
-
-# Import opzionale numpy
-try:
-    import numpy as np
-    HAS_NUMPY = True
-except ImportError:  # pragma: no cover
-    HAS_NUMPY = False
+import db_writer
+import social_influence
+import targeting
+import simlog
+from elector_state import ElectorState, ATTRIBUTE_KEYS
 
 # --- NESSUNA Configurazione o Import LLM ---
 
+log = simlog.get("voting")
+
 # --- Funzioni Helper e di Logica ---
 
 
-def apply_elector_impact(elector_id, candidate_name, base_impact, elector_preferences_data):
+def apply_elector_impact(elector_id, candidate_name, base_impact, elector_preferences_data, sim_config=None):
     """
     Applica un impatto al leaning di un elettore verso un candidato,
     considerando tratti (Motivated Reasoning) e Media Literacy.
-    Modifica direttamente il dizionario elector_preferences_data.
+    Modifica direttamente lo stato (ElectorState o vecchio dict).
     """
-    if not isinstance(elector_preferences_data, dict):
+    cfg = config.resolve(sim_config)
+    if isinstance(elector_preferences_data, ElectorState):
+        row = elector_preferences_data.elector_index.get(elector_id)
+        col = elector_preferences_data.candidate_index.get(candidate_name)
+        if row is not None and col is not None:
+            apply_elector_impact_at(
+                elector_preferences_data, row, col, base_impact, sim_config=sim_config)
+        return
+    if not isinstance(elector_preferences_data, Mapping):
         return  # Safety check
 
     e_data = elector_preferences_data.get(elector_id)
-    if not e_data or not isinstance(e_data, dict) or \
-       'leanings' not in e_data or not isinstance(e_data['leanings'], dict) or \
+    if not e_data or not isinstance(e_data, Mapping) or \
+       'leanings' not in e_data or not isinstance(e_data['leanings'], Mapping) or \
        candidate_name not in e_data['leanings']:
         return
 
@@ -58,21 +58,21 @@ def apply_elector_impact(elector_id, candidate_name, base_impact, elector_prefer
     # Motivated Reasoning
     if "Motivated Reasoner" in traits:
         lean = e_data['leanings'][candidate_name]
-        mid_point = config.MAX_ELECTOR_LEANING_BASE / 2.0
+        mid_point = cfg.MAX_ELECTOR_LEANING_BASE / 2.0
         is_liked = lean > mid_point
         is_positive = base_impact > 0
         is_negative = base_impact < 0
         is_incongruent = (is_negative and is_liked) or (
             is_positive and not is_liked)
         if is_incongruent:
-            impact *= (1.0 - config.MOTIVATED_REASONING_FACTOR)
+            impact *= (1.0 - cfg.MOTIVATED_REASONING_FACTOR)
 
     # Media Literacy
-    lit_score = e_data.get('media_literacy', config.MEDIA_LITERACY_RANGE[0])
-    min_lit, max_lit = config.MEDIA_LITERACY_RANGE
+    lit_score = e_data.get('media_literacy', cfg.MEDIA_LITERACY_RANGE[0])
+    min_lit, max_lit = cfg.MEDIA_LITERACY_RANGE
     lit_range = max_lit - min_lit
     norm_lit = (lit_score - min_lit) / lit_range if lit_range > 0 else 0
-    lit_reduction = norm_lit * config.MEDIA_LITERACY_EFFECT_FACTOR
+    lit_reduction = norm_lit * cfg.MEDIA_LITERACY_EFFECT_FACTOR
     final_impact = impact * (1.0 - lit_reduction)
 
     # Applica impatto
@@ -84,74 +84,105 @@ def apply_elector_impact(elector_id, candidate_name, base_impact, elector_prefer
     # else: log warning?
 
 
-def identify_key_electors(elector_preferences_data, current_results, num_top_candidates_to_consider=3):
+def apply_elector_impact_at(elector_state, row, col, base_impact, sim_config=None):
+    """Come apply_elector_impact, ma per indici (riga elettore, colonna candidato)."""
+    cfg = config.resolve(sim_config)
+    current_leaning = elector_state.leanings[row, col]
+    impact = base_impact
+
+    # Motivated Reasoning
+    if elector_state.has_trait_at(row, "Motivated Reasoner"):
+        is_liked = current_leaning > cfg.MAX_ELECTOR_LEANING_BASE / 2.0
+        if (base_impact < 0 and is_liked) or (base_impact > 0 and not is_liked):
+            impact *= (1.0 - cfg.MOTIVATED_REASONING_FACTOR)
+
+    # Media Literacy
+    min_lit, max_lit = cfg.MEDIA_LITERACY_RANGE
+    lit_range = max_lit - min_lit
+    norm_lit = (elector_state.media_literacy[row] - min_lit) / \
+        lit_range if lit_range > 0 else 0
+    final_impact = impact * \
+        (1.0 - norm_lit * cfg.MEDIA_LITERACY_EFFECT_FACTOR)
+
+    elector_state.leanings[row, col] = max(
+        0.1, current_leaning + final_impact)
+
+
+def identify_key_electors(elector_preferences_data, current_results, num_top_candidates_to_consider=3, sim_config=None):
     """Identifica elettori chiave (swing, influenzabili)."""
+    cfg = config.resolve(sim_config)
     key_electors_summary = []
-    if not isinstance(elector_preferences_data, dict) or not isinstance(current_results, Counter):
+    if isinstance(elector_preferences_data, Mapping) and not isinstance(elector_preferences_data, ElectorState):
+        # Vecchio formato dict-of-dicts: stessa rappresentazione colonnare
+        elector_preferences_data = ElectorState.from_dict(elector_preferences_data, sim_config=cfg)
+    elif not isinstance(elector_preferences_data, ElectorState):
+        if log.warning:
+            log.write(f"Warning: identify_key_electors got {type(elector_preferences_data).__name__}, "
+                      "expected an ElectorState or a dict of electors.", simlog.WARNING)
+        return key_electors_summary
+    if not isinstance(current_results, Counter):
         return key_electors_summary
+    state = elector_preferences_data
 
     top_cand_names = [item[0] for item in current_results.most_common(
-        num_top_candidates_to_consider)]
-
-    for e_id, data in elector_preferences_data.items():
-        if not isinstance(data, dict):
-            continue
-        traits = data.get('traits', [])
-        leanings = data.get('leanings', {})
-        if not isinstance(traits, list) or not isinstance(leanings, dict):
-            continue
-
-        is_key = False
+        num_top_candidates_to_consider) if item[0] in state.candidate_index]
+
+    easily_influenced = state.has_trait("Easily Influenced")
+    swing_voter = state.has_trait("Swing Voter")
+    is_swing_between = np.zeros(state.num_electors, dtype=bool)
+    top_two_cols = None
+    if len(top_cand_names) >= 2 and state.num_electors > 0:
+        top_cols = state.candidate_columns(top_cand_names)
+        top_leans = state.leanings[:, top_cols]
+        # Ordinamento stabile decrescente (come sorted(..., reverse=True))
+        order = np.argsort(-top_leans, axis=1, kind="stable")[:, :2]
+        top_two_cols = top_cols[order]
+        top_two_leans = np.take_along_axis(top_leans, order, axis=1)
+        is_swing_between = np.abs(
+            top_two_leans[:, 0] - top_two_leans[:, 1]) < cfg.ELECTOR_SWING_THRESHOLD
+
+    for row in np.flatnonzero(easily_influenced | swing_voter | is_swing_between):
         reasons = []
-        if "Easily Influenced" in traits:
-            is_key = True
+        if easily_influenced[row]:
             reasons.append("Easily Influenced")
-        if "Swing Voter" in traits:
-            is_key = True; reasons.append("Is a Swing Voter")
-
-        if leanings and len(top_cand_names) >= 2:
-            top_leans_data = [{'name': cn, 'leaning': leanings[cn]}
-                              for cn in top_cand_names if cn in leanings and isinstance(leanings.get(cn), (int, float))]
-            top_leans_sorted = sorted(
-                top_leans_data, key=lambda x: x['leaning'], reverse=True)
-            if len(top_leans_sorted) >= 2:
-                diff = top_leans_sorted[0]['leaning'] - \
-                    top_leans_sorted[1]['leaning']
-                if abs(diff) < config.ELECTOR_SWING_THRESHOLD:
-                    is_key = True
-                    reasons.append(
-                        f"Swing b/w {top_leans_sorted[0]['name']} ({top_leans_sorted[0]['leaning']:.1f}) & {top_leans_sorted[1]['name']} ({top_leans_sorted[1]['leaning']:.1f})")
-        if is_key:
-            key_electors_summary.append(
-                {"id": e_id, "reasons": list(set(reasons))})
+        if swing_voter[row]:
+            reasons.append("Is a Swing Voter")
+        if is_swing_between[row]:
+            first_col, second_col = top_two_cols[row]
+            reasons.append(
+                f"Swing b/w {state.candidate_names[first_col]} ({state.leanings[row, first_col]:.1f}) & {state.candidate_names[second_col]} ({state.leanings[row, second_col]:.1f})")
+        key_electors_summary.append(
+            {"id": state.elector_ids[row], "reasons": reasons})
     return key_electors_summary
 
 
-def initialize_citizen_preferences(num_citizens, district_candidates):
+def initialize_citizen_preferences(num_citizens, district_candidates, sim_config=None):
     """Assegna preferenze e tratti casuali ai cittadini."""
+    cfg = config.resolve(sim_config)
     preferences = {}
     if num_citizens <= 0:
         return preferences
     for i in range(num_citizens):
         citizen_id = f"Citizen_{i+1}"
         assigned_traits = []
-        if config.CITIZEN_TRAITS:
-            k_traits = min(config.CITIZEN_TRAIT_COUNT,
-                           len(config.CITIZEN_TRAITS))
+        if cfg.CITIZEN_TRAITS:
+            k_traits = min(cfg.CITIZEN_TRAIT_COUNT,
+                           len(cfg.CITIZEN_TRAITS))
             if k_traits > 0:
                 assigned_traits = random.sample(
-                    config.CITIZEN_TRAITS, k_traits)
+                    cfg.CITIZEN_TRAITS, k_traits)
         preferences[citizen_id] = {
-            "preference_experience": random.randint(*config.CITIZEN_IDEAL_PREFERENCE_RANGE),
-            "preference_social_vision": random.randint(*config.CITIZEN_IDEAL_PREFERENCE_RANGE),
-            "preference_mediation": random.randint(*config.CITIZEN_IDEAL_PREFERENCE_RANGE),
-            "preference_integrity": random.randint(*config.CITIZEN_IDEAL_PREFERENCE_RANGE),
+            "preference_experience": random.randint(*cfg.CITIZEN_IDEAL_PREFERENCE_RANGE),
+            "preference_social_vision": random.randint(*cfg.CITIZEN_IDEAL_PREFERENCE_RANGE),
+            "preference_mediation": random.randint(*cfg.CITIZEN_IDEAL_PREFERENCE_RANGE),
+            "preference_integrity": random.randint(*cfg.CITIZEN_IDEAL_PREFERENCE_RANGE),
             "traits": assigned_traits}
     return preferences
 
 
-def simulate_citizen_vote(citizen_id, district_candidates_info, citizen_data):
+def simulate_citizen_vote(citizen_id, district_candidates_info, citizen_data, sim_config=None):
     """Simula il voto di un cittadino."""
+    cfg = config.resolve(sim_config)
     if not isinstance(district_candidates_info, list) or not district_candidates_info:
         return None
     candidates_dict = {c["name"]: c for c in district_candidates_info if isinstance(
@@ -175,24 +206,24 @@ def simulate_citizen_vote(citizen_id, district_candidates_info, citizen_data):
             continue
         candidate_attrs = candidate["attributes"]
         total_distance = 0
-        default_attr_val = config.ATTRIBUTE_RANGE[0]
-        default_pref_val = config.CITIZEN_IDEAL_PREFERENCE_RANGE[0]
+        default_attr_val = cfg.ATTRIBUTE_RANGE[0]
+        default_pref_val = cfg.CITIZEN_IDEAL_PREFERENCE_RANGE[0]
         attr_map = {"preference_experience": "administrative_experience", "preference_social_vision": "social_vision",
                     "preference_mediation": "mediation_ability", "preference_integrity": "ethical_integrity"}
         for pref_key, attr_key in attr_map.items():
             distance = abs(candidate_attrs.get(attr_key, default_attr_val) -
                            citizen_preferences.get(pref_key, default_pref_val))
             total_distance += distance
-        score = max(0.1, config.MAX_CITIZEN_LEANING_BASE - total_distance *
-                    config.CITIZEN_ATTRIBUTE_MISMATCH_PENALTY_FACTOR)
+        score = max(0.1, cfg.MAX_CITIZEN_LEANING_BASE - total_distance *
+                    cfg.CITIZEN_ATTRIBUTE_MISMATCH_PENALTY_FACTOR)
         trait_multiplier = 1.0
         random_bias = random.uniform(-0.5, 0.5)
         if "Attribute Focused" in citizen_traits:
-            trait_multiplier *= config.CITIZEN_TRAIT_MULTIPLIER_ATTRIBUTE_FOCUSED
+            trait_multiplier *= cfg.CITIZEN_TRAIT_MULTIPLIER_ATTRIBUTE_FOCUSED
             random_bias *= 0.5
         if "Random Inclined" in citizen_traits:
-            random_bias += random.uniform(-config.CITIZEN_TRAIT_RANDOM_INCLINED_BIAS,
-                                          config.CITIZEN_TRAIT_RANDOM_INCLINED_BIAS)
+            random_bias += random.uniform(-cfg.CITIZEN_TRAIT_RANDOM_INCLINED_BIAS,
+                                          cfg.CITIZEN_TRAIT_RANDOM_INCLINED_BIAS)
         final_score = (score * trait_multiplier) + random_bias
         attraction_scores[candidate_name] = max(0.01, final_score)
 
@@ -206,93 +237,109 @@ def simulate_citizen_vote(citizen_id, district_candidates_info, citizen_data):
         return random.choice(candidate_names) if candidate_names else None
 
 
-def initialize_elector_preferences(electors_with_traits, candidates, preselected_candidates_info=None):
-    """Inizializza preferenze Grand Electors (con media_preference_bias). SENZA LLM flag."""
-    elector_full_preferences_data = {}
+def initialize_elector_preferences(electors_with_traits, candidates, preselected_candidates_info=None, rng=None, sim_config=None):
+    """
+    Inizializza preferenze Grand Electors (con media_preference_bias). SENZA LLM flag.
+    Calcolo vettoriale: l'intera matrice elettori x candidati viene prodotta
+    in un colpo solo (distanza L1 pesata + maschere partito/tratti).
+    Restituisce un ElectorState (vista dict compatibile tramite state[elector_id]).
+    """
+    cfg = config.resolve(sim_config)
     if not isinstance(electors_with_traits, list) or not isinstance(candidates, list):
-        return elector_full_preferences_data
+        return ElectorState([], [], sim_config=cfg)
+    valid_electors = [e for e in electors_with_traits if isinstance(
+        e, dict) and 'id' in e]
     candidates_dict = {
         c["name"]: c for c in candidates if isinstance(c, dict) and 'name' in c}
     preselected_names = {c["name"] for c in preselected_candidates_info if isinstance(
         c, dict) and 'name' in c} if preselected_candidates_info else set()
 
-    for elector_data in electors_with_traits:
-        if not isinstance(elector_data, dict) or 'id' not in elector_data:
-            continue
-        elector_id = elector_data['id']
-        elector_traits = elector_data.get('traits', [])
-        if not isinstance(elector_traits, list):
-            elector_traits = []
-
-        identity_weight = random.uniform(*config.IDENTITY_WEIGHT_RANGE)
-        if "Strong Partisan" in elector_traits:
-            identity_weight = min(0.95, identity_weight * 1.5)
-        policy_weight = 1.0 - identity_weight
-        party_pref = random.choices(
-            config.PARTY_IDS, weights=config.PARTY_ID_ASSIGNMENT_WEIGHTS, k=1)[0]
-
-        elector_prefs = {
-            'id': elector_id,
-            'weights': {attr: random.randint(*config.ELECTOR_ATTRIBUTE_WEIGHT_RANGE)
-                        for attr in ["administrative_experience", "social_vision", "mediation_ability", "ethical_integrity"]},
-            'leanings': {}, 'initial_leanings': {}, 'traits': elector_traits,
-            'party_preference': party_pref,
-            'identity_weight': identity_weight, 'policy_weight': policy_weight,
-            'media_literacy': random.randint(*config.MEDIA_LITERACY_RANGE),
-            'media_preference_bias': {'Reds': -0.6, 'Blues': 0.7, 'Greens': -0.3, 'Golds': 0.4, 'Independent': 0.0}.get(party_pref, 0.0) + random.uniform(-0.15, 0.15)
-        }
-        elector_ideal_prefs = {f"preference_{attr}": random.randint(
-            *config.ELECTOR_IDEAL_PREFERENCE_RANGE) for attr in elector_prefs['weights']}
-        elector_prefs.update(elector_ideal_prefs)
-
-        # Calcola leaning iniziale
-        for cand_name, cand in candidates_dict.items():
-            cand_attrs = cand.get("attributes", {})
-            cand_party = cand.get('party_id', 'Unknown')
-            # Policy Score
-            w_dist_sum = 0
-            if elector_prefs['weights']:
-                w_dist_sum = sum(abs(cand_attrs.get(attr, config.ATTRIBUTE_RANGE[0]) - elector_ideal_prefs.get(f"preference_{attr}", config.ELECTOR_IDEAL_PREFERENCE_RANGE[0])) * weight
-                                  for attr, weight in elector_prefs['weights'].items())
-            penalty = w_dist_sum * config.ELECTOR_ATTRIBUTE_MISMATCH_PENALTY_FACTOR
-            lean_policy = max(0.1, config.MAX_ELECTOR_LEANING_BASE - penalty)
-            # Identity Score
-            id_score = 0.0
-            if elector_prefs['party_preference'] != "Independent" and cand_party == elector_prefs['party_preference']:
-                id_score = config.MAX_ELECTOR_LEANING_BASE * config.IDENTITY_MATCH_BONUS_FACTOR
-            # Combine
-            lean_base = (lean_policy * elector_prefs['policy_weight']) + (
-                id_score * elector_prefs['identity_weight'])
-            # Traits Effect
-            if "Idealistic" in elector_traits and cand_attrs.get("ethical_integrity", config.ATTRIBUTE_RANGE[0]) <= 2:
-                penalty_f = getattr(
-                    config, "STRATEGIC_VOTING_TRAIT_PENALTY_IDEALISTIC_INTEGRITY", 1.5)
-                lean_base -= config.MAX_ELECTOR_LEANING_BASE * 0.2 * penalty_f
-            # Final Leaning
-            init_lean = lean_base + \
-                random.uniform(-config.ELECTOR_RANDOM_LEANING_VARIANCE,
-                               config.ELECTOR_RANDOM_LEANING_VARIANCE)
-            if cand_name in preselected_names:
-                init_lean += config.PRESELECTED_CANDIDATE_BOOST
-            final_lean = max(0.1, init_lean)
-            elector_prefs['leanings'][cand_name] = final_lean
-            elector_prefs['initial_leanings'][cand_name] = final_lean
-
-        elector_full_preferences_data[elector_id] = elector_prefs
-    return elector_full_preferences_data
+    state = ElectorState([e['id'] for e in valid_electors], list(candidates_dict.keys()),
+                         traits=[e.get('traits', []) for e in valid_electors], sim_config=cfg)
+    if rng is None:
+        rng = utils.make_numpy_rng()
+    n_electors, n_attrs = state.num_electors, len(ATTRIBUTE_KEYS)
+    max_lean = cfg.MAX_ELECTOR_LEANING_BASE
+
+    # --- Vettori per elettore (stesse distribuzioni del vecchio loop) ---
+    identity_weight = rng.uniform(*cfg.IDENTITY_WEIGHT_RANGE, size=n_electors)
+    identity_weight = np.where(state.has_trait("Strong Partisan"),
+                               np.minimum(0.95, identity_weight * 1.5), identity_weight)
+    party_probs = np.asarray(cfg.PARTY_ID_ASSIGNMENT_WEIGHTS, dtype=np.float64)
+    party_codes = rng.choice(len(state.party_ids), size=n_electors,
+                             p=party_probs / party_probs.sum())
+    party_bias_map = {'Reds': -0.6, 'Blues': 0.7,
+                      'Greens': -0.3, 'Golds': 0.4, 'Independent': 0.0}
+    party_bias = np.array([party_bias_map.get(p, 0.0)
+                          for p in state.party_ids], dtype=np.float64)
+
+    state.identity_weight[:] = identity_weight
+    state.policy_weight[:] = 1.0 - identity_weight
+    state.party_preference[:] = party_codes
+    state.weights[:] = rng.integers(*cfg.ELECTOR_ATTRIBUTE_WEIGHT_RANGE,
+                                    size=(n_electors, n_attrs), endpoint=True)
+    state.media_literacy[:] = rng.integers(
+        *cfg.MEDIA_LITERACY_RANGE, size=n_electors, endpoint=True)
+    state.media_preference_bias[:] = party_bias[party_codes] + \
+        rng.uniform(-0.15, 0.15, size=n_electors)
+    state.ideal_preferences[:] = rng.integers(*cfg.ELECTOR_IDEAL_PREFERENCE_RANGE,
+                                              size=(n_electors, n_attrs), endpoint=True)
+    if state.num_candidates == 0 or n_electors == 0:
+        return state
+
+    # --- Matrici candidati (C, A) ---
+    cand_list = list(candidates_dict.values())
+    cand_attrs = np.array([[c.get("attributes", {}).get(attr, cfg.ATTRIBUTE_RANGE[0])
+                            for attr in ATTRIBUTE_KEYS] for c in cand_list], dtype=np.float64)
+    party_code_map = {p: i for i, p in enumerate(state.party_ids)}
+    cand_party_codes = np.array([party_code_map.get(c.get('party_id', 'Unknown'), -1)
+                                 for c in cand_list], dtype=np.int64)
+
+    # Policy Score: distanza L1 pesata (E, C)
+    w_dist_sum = np.einsum('eca,ea->ec',
+                           np.abs(cand_attrs[None, :, :] - state.ideal_preferences[:, None, :]),
+                           state.weights.astype(np.float64))
+    lean_policy = np.maximum(
+        0.1, max_lean - w_dist_sum * cfg.ELECTOR_ATTRIBUTE_MISMATCH_PENALTY_FACTOR)
+    # Identity Score: stesso partito (gli Independent non hanno bonus)
+    independent_code = party_code_map.get("Independent", -1)
+    party_match = (party_codes[:, None] == cand_party_codes[None, :]) & \
+        (party_codes[:, None] != independent_code)
+    id_score = np.where(
+        party_match, max_lean * cfg.IDENTITY_MATCH_BONUS_FACTOR, 0.0)
+    # Combine
+    lean_base = lean_policy * state.policy_weight[:, None] + \
+        id_score * state.identity_weight[:, None]
+    # Traits Effect (Idealistic vs integrità bassa)
+    penalty_f = cfg.STRATEGIC_VOTING_TRAIT_PENALTY_IDEALISTIC_INTEGRITY
+    low_integrity = cand_attrs[:, state.attribute_index["ethical_integrity"]] <= 2
+    lean_base -= np.where(state.has_trait("Idealistic")[:, None] & low_integrity[None, :],
+                          max_lean * 0.2 * penalty_f, 0.0)
+    # Final Leaning
+    lean_base += rng.uniform(-cfg.ELECTOR_RANDOM_LEANING_VARIANCE,
+                             cfg.ELECTOR_RANDOM_LEANING_VARIANCE,
+                             size=lean_base.shape)
+    preselected_cols = state.candidate_columns(preselected_names)
+    if preselected_cols.size:
+        lean_base[:, preselected_cols] += cfg.PRESELECTED_CANDIDATE_BOOST
+
+    np.maximum(0.1, lean_base, out=state.leanings)
+    state.initial_leanings[:] = state.leanings
+    return state
 
 
 def simulate_ai_vote(elector_id, votable_candidates_info, elector_data,
-                     last_round_results=None, current_round=0, all_candidates_info=None):
+                     last_round_results=None, current_round=0, all_candidates_info=None, sim_config=None):
     """Simula voto elettore rule-based (unica funzione di voto)."""
+    cfg = config.resolve(sim_config)
     # Verifica input
-    if not isinstance(elector_data, dict) or not isinstance(votable_candidates_info, list):
+    if not isinstance(elector_data, Mapping) or not isinstance(votable_candidates_info, list):
         return None
 
     elector_leanings = elector_data.get('leanings', {})
     elector_initial_leanings = elector_data.get('initial_leanings', {})
     elector_traits = elector_data.get('traits', [])
-    if not isinstance(elector_leanings, dict) or not isinstance(elector_initial_leanings, dict) or not isinstance(elector_traits, list):
+    if not isinstance(elector_leanings, Mapping) or not isinstance(elector_initial_leanings, Mapping) or not isinstance(elector_traits, list):
         return None
 
     votable_names = {c["name"] for c in votable_candidates_info if isinstance(
@@ -321,13 +368,13 @@ def simulate_ai_vote(elector_id, votable_candidates_info, elector_data,
                 share = last_round_results.get(name, 0) / total_votes_prev
                 adj = 0.0
                 if is_band and share > avg_share * 1.1:
-                    adj += (share - avg_share) * config.BANDWAGON_EFFECT_FACTOR * \
-                            config.MAX_ELECTOR_LEANING_BASE
+                    adj += (share - avg_share) * cfg.BANDWAGON_EFFECT_FACTOR * \
+                            cfg.MAX_ELECTOR_LEANING_BASE
                 if is_under and share < avg_share * 0.75:
-                    adj += (avg_share - share) * config.UNDERDOG_EFFECT_FACTOR * \
-                            config.MAX_ELECTOR_LEANING_BASE
-                adj = min(adj, config.MAX_BIAS_LEANING_ADJUSTMENT) if adj > 0 else max(
-                    adj, -config.MAX_BIAS_LEANING_ADJUSTMENT)
+                    adj += (avg_share - share) * cfg.UNDERDOG_EFFECT_FACTOR * \
+                            cfg.MAX_ELECTOR_LEANING_BASE
+                adj = min(adj, cfg.MAX_BIAS_LEANING_ADJUSTMENT) if adj > 0 else max(
+                    adj, -cfg.MAX_BIAS_LEANING_ADJUSTMENT)
                 final_leanings[name] = max(0.1, final_leanings[name] + adj)
 
     if not final_leanings:
@@ -336,16 +383,16 @@ def simulate_ai_vote(elector_id, votable_candidates_info, elector_data,
 
     # Logica Voto Strategico
     strategic_vote = None
-    if current_round >= config.STRATEGIC_VOTING_START_ROUND and isinstance(last_round_results, Counter) and total_votes_prev > 0 and isinstance(all_candidates_info, list):
+    if current_round >= cfg.STRATEGIC_VOTING_START_ROUND and isinstance(last_round_results, Counter) and total_votes_prev > 0 and isinstance(all_candidates_info, list):
         pref_votes = last_round_results.get(most_preferred, 0)
         pref_share = pref_votes / total_votes_prev
-        is_unlikely_to_win = pref_share < config.UNLIKELY_TO_WIN_THRESHOLD
+        is_unlikely_to_win = pref_share < cfg.UNLIKELY_TO_WIN_THRESHOLD
         if is_unlikely_to_win:
             mod = 1.0
             if "Pragmatic" in elector_traits:
-                mod *= config.STRATEGIC_VOTING_TRAIT_MULTIPLIER_PRAGMATIC
+                mod *= cfg.STRATEGIC_VOTING_TRAIT_MULTIPLIER_PRAGMATIC
             if "Idealistic" in elector_traits:
-                mod *= config.STRATEGIC_VOTING_TRAIT_MULTIPLIER_IDEALISTIC
+                mod *= cfg.STRATEGIC_VOTING_TRAIT_MULTIPLIER_IDEALISTIC
             if elector_initial_leanings:
                 votable_initial = {n: l for n, l in elector_initial_leanings.items(
                 ) if n in votable_names and isinstance(l, (int, float))}
@@ -353,9 +400,9 @@ def simulate_ai_vote(elector_id, votable_candidates_info, elector_data,
                     disliked_init = min(
                         votable_initial, key=votable_initial.get)
                     disliked_lean_init = votable_initial.get(
-                        disliked_init, config.MAX_ELECTOR_LEANING_BASE)
-                    is_disliked = disliked_lean_init < config.MAX_ELECTOR_LEANING_BASE * \
-                        config.STRONGLY_DISLIKED_THRESHOLD_FACTOR
+                        disliked_init, cfg.MAX_ELECTOR_LEANING_BASE)
+                    is_disliked = disliked_lean_init < cfg.MAX_ELECTOR_LEANING_BASE * \
+                        cfg.STRONGLY_DISLIKED_THRESHOLD_FACTOR
                     if is_disliked and disliked_init in votable_names:
                         options = {n: l for n, l in final_leanings.items(
                         ) if n != disliked_init and n != most_preferred}
@@ -383,8 +430,92 @@ def simulate_ai_vote(elector_id, votable_candidates_info, elector_data,
             return random.choice(list(votable_names)) if votable_names else None
 
 
-def analyze_competition_and_adapt_strategy(candidate_info, all_candidates_info, last_round_results, current_round):
+def simulate_college_vote_batch(elector_state, votable_candidates_info, last_round_results=None,
+                                current_round=0, rng=None, sim_config=None):
+    """
+    Versione vettoriale di simulate_ai_vote per tutto il Collegio.
+    Applica bandwagon/underdog, voto strategico e campionamento pesato a
+    tutti gli elettori insieme e restituisce direttamente il conteggio (Counter).
+    """
+    cfg = config.resolve(sim_config)
+    if not isinstance(elector_state, ElectorState) or not isinstance(votable_candidates_info, list):
+        return Counter()
+    votable_names = list(dict.fromkeys(c["name"] for c in votable_candidates_info if isinstance(
+        c, dict) and c.get('name') in elector_state.candidate_index))
+    if not votable_names or elector_state.num_electors == 0:
+        return Counter()
+    if rng is None:
+        rng = utils.make_numpy_rng()
+
+    cols = elector_state.candidate_columns(votable_names)
+    final_leanings = elector_state.leanings[:, cols]  # Copia (fancy indexing)
+    n_electors, n_votable = final_leanings.shape
+    max_lean = cfg.MAX_ELECTOR_LEANING_BASE
+
+    has_results = isinstance(last_round_results, Counter)
+    total_votes_prev = sum(last_round_results.values()) if has_results else 0
+    prev_shares = np.zeros(n_votable)
+    if total_votes_prev > 0:
+        prev_shares = np.array([last_round_results.get(n, 0)
+                               for n in votable_names], dtype=np.float64) / total_votes_prev
+
+    # Applica Bias (Bandwagon/Underdog)
+    if has_results and total_votes_prev > 0 and current_round > 0:
+        is_band = elector_state.has_trait("Bandwagoner")
+        is_under = elector_state.has_trait(
+            "Underdog Supporter") | elector_state.has_trait("Contrarian")
+        avg_share = 1.0 / n_votable
+        band_adj = np.where(prev_shares > avg_share * 1.1,
+                            (prev_shares - avg_share) * cfg.BANDWAGON_EFFECT_FACTOR * max_lean, 0.0)
+        under_adj = np.where(prev_shares < avg_share * 0.75,
+                             (avg_share - prev_shares) * cfg.UNDERDOG_EFFECT_FACTOR * max_lean, 0.0)
+        adj = np.clip(is_band[:, None] * band_adj[None, :] + is_under[:, None] * under_adj[None, :],
+                      -cfg.MAX_BIAS_LEANING_ADJUSTMENT, cfg.MAX_BIAS_LEANING_ADJUSTMENT)
+        in_results = np.array(
+            [n in last_round_results for n in votable_names], dtype=bool)
+        affected = (is_band | is_under)[:, None] & in_results[None, :]
+        final_leanings = np.where(affected, np.maximum(
+            0.1, final_leanings + adj), final_leanings)
+
+    rows = np.arange(n_electors)
+    most_preferred = np.argmax(final_leanings, axis=1)
+
+    # Logica Voto Strategico
+    strategic = np.zeros(n_electors, dtype=bool)
+    potential_choice = most_preferred
+    if current_round >= cfg.STRATEGIC_VOTING_START_ROUND and has_results and total_votes_prev > 0:
+        pref_share = prev_shares[most_preferred]
+        mod = np.ones(n_electors)
+        mod[elector_state.has_trait("Pragmatic")] *= cfg.STRATEGIC_VOTING_TRAIT_MULTIPLIER_PRAGMATIC
+        mod[elector_state.has_trait("Idealistic")] *= cfg.STRATEGIC_VOTING_TRAIT_MULTIPLIER_IDEALISTIC
+        initial_votable = elector_state.initial_leanings[:, cols]
+        disliked = np.argmin(initial_votable, axis=1)
+        is_disliked = initial_votable[rows, disliked] < max_lean * \
+            cfg.STRONGLY_DISLIKED_THRESHOLD_FACTOR
+        # Opzioni: tutti tranne il più odiato e il preferito
+        options = final_leanings.copy()
+        options[rows, disliked] = -np.inf
+        options[rows, most_preferred] = -np.inf
+        potential_choice = np.argmax(options, axis=1)
+        has_option = np.isfinite(options[rows, potential_choice])
+        chance = (prev_shares[disliked] * 0.6 +
+                  (1.0 - pref_share) * 0.4) * mod
+        strategic = (pref_share < cfg.UNLIKELY_TO_WIN_THRESHOLD) & is_disliked & has_option & \
+            (rng.random(n_electors) < chance)
+
+    # Decisione Finale: campionamento pesato per riga (inversione della CDF)
+    cumulative = np.cumsum(np.maximum(0.01, final_leanings), axis=1)
+    targets = rng.random(n_electors) * cumulative[:, -1]
+    sampled = np.minimum((cumulative <= targets[:, None]).sum(axis=1), n_votable - 1)
+    votes = np.where(strategic, potential_choice, sampled)
+
+    tally = np.bincount(votes, minlength=n_votable)
+    return Counter({votable_names[i]: int(tally[i]) for i in np.flatnonzero(tally)})
+
+
+def analyze_competition_and_adapt_strategy(candidate_info, all_candidates_info, last_round_results, current_round, sim_config=None):
     """Analizza competizione e adatta temi campagna."""
+    cfg = config.resolve(sim_config)
     if not isinstance(candidate_info, dict) or not isinstance(all_candidates_info, list):
         return
     cand_name = candidate_info.get('name')
@@ -411,8 +542,8 @@ def analyze_competition_and_adapt_strategy(candidate_info, all_candidates_info,
     sorted_results_tuples = last_round_results.most_common()
     own_rank = next((i + 1 for i, (name, votes) in enumerate(sorted_results_tuples)
                     if name == cand_name), len(sorted_results_tuples) + 1)
-    top_opponents_data = [(name, votes) for name, votes in sorted_results_tuples[:config.COMPETITIVE_ADAPTATION_TOP_OPPONENTS + 1]
-                          if name != cand_name][:config.COMPETITIVE_ADAPTATION_TOP_OPPONENTS]
+    top_opponents_data = [(name, votes) for name, votes in sorted_results_tuples[:cfg.COMPETITIVE_ADAPTATION_TOP_OPPONENTS + 1]
+                          if name != cand_name][:cfg.COMPETITIVE_ADAPTATION_TOP_OPPONENTS]
     top_opponent_names = [name for name, votes in top_opponents_data]
     utils.send_pygame_update(utils.UPDATE_TYPE_MESSAGE,
                              f"    Rank: {own_rank}/{len(sorted_results_tuples)}. Top opps: {top_opponent_names}")
@@ -437,18 +568,18 @@ def analyze_competition_and_adapt_strategy(candidate_info, all_candidates_info,
     num_themes_to_pick = random.randint(1, 2)
     picked_count = 0
     for theme in strength_themes:
-        if picked_count < num_themes_to_pick and random.random() < config.COMPETITIVE_ADAPTATION_SELF_FOCUS_FACTOR:
+        if picked_count < num_themes_to_pick and random.random() < cfg.COMPETITIVE_ADAPTATION_SELF_FOCUS_FACTOR:
             if theme not in new_themes:
                 new_themes.append(theme)
                 picked_count += 1
     if picked_count < num_themes_to_pick:
         for theme in counter_themes_pool:
-            if picked_count < num_themes_to_pick and random.random() < (1.0 - config.COMPETITIVE_ADAPTATION_SELF_FOCUS_FACTOR):
+            if picked_count < num_themes_to_pick and random.random() < (1.0 - cfg.COMPETITIVE_ADAPTATION_SELF_FOCUS_FACTOR):
                 if theme not in new_themes:
                     new_themes.append(theme)
                     picked_count += 1
     if picked_count < num_themes_to_pick and available_attrs_list:
-        fallback_pool = list(set(strength_themes + available_attrs_list))
+        fallback_pool = sorted(set(strength_themes + available_attrs_list))  # Ordine indipendente dall'hash
         random.shuffle(fallback_pool)
         for theme in fallback_pool:
             if picked_count < num_themes_to_pick and theme not in new_themes:
@@ -468,44 +599,35 @@ def analyze_competition_and_adapt_strategy(candidate_info, all_candidates_info,
                              f"    Adapted themes: {', '.join(t.replace('_',' ').title() for t in final_themes if t)}")
 
 
-def simulate_campaigning(candidates_info, electors, elector_full_preferences_data, last_round_results):
+def simulate_campaigning(candidates_info, electors, elector_full_preferences_data, last_round_results, rng=None, sim_config=None):
     """Simula campagna con rendimenti decrescenti e apprendimento agenti."""
+    cfg = config.resolve(sim_config)
     utils.send_pygame_update(utils.UPDATE_TYPE_MESSAGE,
                              "\n--- Simulating Candidate Campaigning (with Diminishing Returns) ---")
-    if not candidates_info or not electors:
+    if not candidates_info or not electors or not isinstance(elector_full_preferences_data, ElectorState):
         return
+    state = elector_full_preferences_data
 
-    elector_map = {e['id']: e for e in electors if isinstance(
-        e, dict) and 'id' in e}
-    elector_ids = list(elector_map.keys())
-    if not elector_ids:
+    if state.num_electors == 0:
         return  # No electors
+    if rng is None:
+        rng = utils.make_numpy_rng()
 
     key_electors_summary = identify_key_electors(
-        elector_full_preferences_data, last_round_results)
-    key_elector_ids = {ke['id'] for ke in key_electors_summary}
-
-    # Calcola potenziali e pesi elettori
-    elector_potentials = {}
-    for e_obj in electors:
-        if not isinstance(e_obj, dict) or 'id' not in e_obj:
-            continue
-        e_id = e_obj['id']; e_traits = e_obj.get('traits', [])
-        elector_potential_score = config.ELECTOR_SUSCEPTIBILITY_BASE
-        if "Easily Influenced" in e_traits:
-            elector_potential_score *= config.INFLUENCE_TRAIT_MULTIPLIER_EASILY_INFLUENCED
-        if e_id in key_elector_ids:
-            elector_potential_score *= config.TARGETING_KEY_ELECTOR_BONUS_FACTOR
-        elector_potentials[e_id] = max(0.05, min(5.0, elector_potential_score))
-    total_potential_sum = sum(elector_potentials.values())
-    num_electors_calc = len(elector_potentials)
-    elector_allocation_weights = {}
-    if total_potential_sum > 0:
-        elector_allocation_weights = {
-            e_id: pot / total_potential_sum for e_id, pot in elector_potentials.items()}
-    elif num_electors_calc > 0:
-        equal_weight = 1.0 / num_electors_calc; elector_allocation_weights = {
-            e_id: equal_weight for e_id in elector_potentials.keys()}
+        elector_full_preferences_data, last_round_results, sim_config=cfg)
+    is_key_elector = np.zeros(state.num_electors, dtype=bool)
+    is_key_elector[[state.elector_index[ke['id']]
+                    for ke in key_electors_summary]] = True
+
+    # Calcola potenziali e pesi elettori (un piano di targeting per round)
+    elector_potentials = np.full(
+        state.num_electors, cfg.ELECTOR_SUSCEPTIBILITY_BASE)
+    elector_potentials[state.has_trait("Easily Influenced")] *= \
+        cfg.INFLUENCE_TRAIT_MULTIPLIER_EASILY_INFLUENCED
+    elector_potentials[is_key_elector] *= cfg.TARGETING_KEY_ELECTOR_BONUS_FACTOR
+    targeting_plan = targeting.TargetingPlan(
+        state.elector_ids, np.clip(elector_potentials, 0.05, 5.0))
+    elector_allocation_weights = targeting_plan.probabilities
 
     # Ciclo sui candidati
     for cand_idx, cand_data_ref in enumerate(candidates_info):
@@ -517,72 +639,39 @@ def simulate_campaigning(candidates_info, electors, elector_full_preferences_dat
         cand_name = cand_data_ref.get('name', f'Unknown_{cand_idx}')
         cand_attrs = cand_data_ref.get("attributes", {})
         cand_med = cand_attrs.get(
-            'mediation_ability', config.ATTRIBUTE_RANGE[0])
+            'mediation_ability', cfg.ATTRIBUTE_RANGE[0])
         themes = cand_data_ref.get('current_campaign_themes', [])
         current_candidate_budget = float(
             cand_data_ref.get('campaign_budget', 0.0))
         min_cost_per_elector = float(
-            config.CAMPAIGN_ALLOCATION_PER_ATTEMPT_RANGE[0])
+            cfg.CAMPAIGN_ALLOCATION_PER_ATTEMPT_RANGE[0])
         max_alloc_per_attempt = float(
-            config.CAMPAIGN_ALLOCATION_PER_ATTEMPT_RANGE[1])
-
-        # Seleziona target (logica campionamento pesato semplificata)
-        num_electors_to_target = config.INFLUENCE_ELECTORS_PER_CANDIDATE
-        target_ids = []
-        if num_electors_to_target > 0 and elector_ids and elector_allocation_weights:
-            population = list(elector_allocation_weights.keys())
-             weights = list(elector_allocation_weights.values())
-             sum_weights = sum(weights)
-             if sum_weights <= 0 and len(weights) > 0:
-                 weights = [1.0 / len(weights)] * len(weights)
-                 sum_weights = 1.0
-             elif sum_weights != 1.0 and sum_weights > 0:
-                 weights = [w / sum_weights for w in weights]
-             if population and sum(weights) > 0:
-                 try:
-                     num_to_sample_unique = min(
-                         num_electors_to_target, len(population))
-                     sampled_ids = random.choices(
-                         population, weights=weights, k=num_to_sample_unique)  # Semplificato
-                     target_ids = list(set(sampled_ids))
-                     while len(target_ids) < num_to_sample_unique:  # Simple fill
-                         additional_sample = random.choices(
-                             population, weights=weights, k=1)
-                         if additional_sample[0] not in target_ids:
-                             target_ids.append(additional_sample[0])
-                 except Exception:
-                     target_ids = random.sample(elector_ids, min(
-                         num_electors_to_target, len(elector_ids)))
-             else:
-                 target_ids = random.sample(elector_ids, min(
-                     num_electors_to_target, len(elector_ids)))
-        elif elector_ids:
-            target_ids = random.sample(elector_ids, min(
-                num_electors_to_target, len(elector_ids)))
-
-        # Ciclo sugli elettori target
+            cfg.CAMPAIGN_ALLOCATION_PER_ATTEMPT_RANGE[1])
+
+        # Seleziona target: campionamento pesato senza reinserimento
+        target_rows = targeting_plan.sample_indices(
+            cfg.INFLUENCE_ELECTORS_PER_CANDIDATE, rng)
+
+        # Ciclo sugli elettori target (accesso per indice allo stato)
+        cand_col = state.candidate_index.get(cand_name)
         successful_influences_this_candidate = 0
         electors_targeted_this_candidate = 0
-        for e_id in target_ids:
+        for row in target_rows:
             if hasattr(utils, 'simulation_running_event') and not utils.simulation_running_event.is_set():
                 # Salva budget prima di uscire
                 candidates_info[cand_idx]['campaign_budget'] = current_candidate_budget
-                db_manager.save_candidate(candidates_info[cand_idx])
-                 return
+                db_writer.save_candidate(candidates_info[cand_idx])
+                return
 
             if current_candidate_budget < min_cost_per_elector and min_cost_per_elector > 0:
                 break
 
             electors_targeted_this_candidate += 1
-            e_info = elector_map.get(e_id)
-            e_prefs = elector_full_preferences_data.get(e_id)
-            if not e_info or not e_prefs or not isinstance(e_prefs, dict):
+            if cand_col is None:
                 continue
-            e_traits = e_info.get('traits', [])
-            if not isinstance(e_traits, list): e_traits = []
 
             # Calcola Allocazione Budget
-            elector_weight = elector_allocation_weights.get(e_id, 0)
+            elector_weight = elector_allocation_weights[row]
             alloc_range_size = max(
                 0, max_alloc_per_attempt - min_cost_per_elector)
             alloc_for_this_elector = min_cost_per_elector + elector_weight * alloc_range_size
@@ -602,28 +691,26 @@ def simulate_campaigning(candidates_info, electors, elector_full_preferences_dat
 
             # Calcola Suscettibilità Elettore
             # ... (logica tratti Loyal/EasilyInfluenced) ...
-            base_susceptibility = config.ELECTOR_SUSCEPTIBILITY_BASE + \
+            base_susceptibility = cfg.ELECTOR_SUSCEPTIBILITY_BASE + \
                 random.uniform(-0.2, 0.2)
-            lit_score = e_prefs.get(
-                'media_literacy', config.MEDIA_LITERACY_RANGE[0])
-            min_lit, max_lit = config.MEDIA_LITERACY_RANGE
+            min_lit, max_lit = cfg.MEDIA_LITERACY_RANGE
             lit_range = max_lit - min_lit
-            norm_lit = (lit_score - min_lit) / \
-                        lit_range if lit_range > 0 else 0
-            lit_reduction = norm_lit * config.MEDIA_LITERACY_EFFECT_FACTOR
+            norm_lit = (state.media_literacy[row] - min_lit) / \
+                lit_range if lit_range > 0 else 0
+            lit_reduction = norm_lit * cfg.MEDIA_LITERACY_EFFECT_FACTOR
             final_susceptibility = max(
                 0.05, min(0.95, base_susceptibility * (1.0 - lit_reduction)))
 
             # Calcola Chance Successo (con Rendimenti Decrescenti)
             base_success_chance = (
-                cand_med / config.ATTRIBUTE_RANGE[1]) * final_susceptibility
+                cand_med / cfg.ATTRIBUTE_RANGE[1]) * final_susceptibility
             allocation_success_bonus = 0.0
             if max_alloc_per_attempt > 0:
                 normalized_allocation_ratio = min(
                     1.0, alloc_for_this_elector / max_alloc_per_attempt)
-                effective_norm_alloc_success = normalized_allocation_ratio ** config.DIMINISHING_RETURNS_EXPONENT_PER_ATTEMPT
+                effective_norm_alloc_success = normalized_allocation_ratio ** cfg.DIMINISHING_RETURNS_EXPONENT_PER_ATTEMPT
                 allocation_success_bonus = effective_norm_alloc_success * \
-                    config.CAMPAIGN_ALLOCATION_SUCCESS_CHANCE_FACTOR
+                    cfg.CAMPAIGN_ALLOCATION_SUCCESS_CHANCE_FACTOR
             final_success_chance = max(
                 0.05, min(1.0, base_success_chance + allocation_success_bonus))
 
@@ -631,53 +718,51 @@ def simulate_campaigning(candidates_info, electors, elector_full_preferences_dat
             if random.random() < final_success_chance:
                 successful_influences_this_candidate += 1
                 # Calcola Forza Influenza (con Rendimenti Decrescenti)
-                base_influence_strength = config.INFLUENCE_STRENGTH_FACTOR * \
-                    config.MAX_ELECTOR_LEANING_BASE * random.uniform(0.8, 1.2)
+                base_influence_strength = cfg.INFLUENCE_STRENGTH_FACTOR * \
+                    cfg.MAX_ELECTOR_LEANING_BASE * random.uniform(0.8, 1.2)
                 allocation_influence_bonus = 0.0
                 if max_alloc_per_attempt > 0:
                     normalized_allocation_ratio_inf = min(
                         1.0, alloc_for_this_elector / max_alloc_per_attempt)
-                    effective_norm_alloc_inf = normalized_allocation_ratio_inf ** config.DIMINISHING_RETURNS_EXPONENT_PER_ATTEMPT
+                    effective_norm_alloc_inf = normalized_allocation_ratio_inf ** cfg.DIMINISHING_RETURNS_EXPONENT_PER_ATTEMPT
                     allocation_influence_bonus = effective_norm_alloc_inf * \
-                        config.CAMPAIGN_ALLOCATION_INFLUENCE_FACTOR
+                        cfg.CAMPAIGN_ALLOCATION_INFLUENCE_FACTOR
                 total_influence = min(
-                    base_influence_strength + allocation_influence_bonus, config.MAX_CAMPAIGN_INFLUENCE_PER_ATTEMPT)
+                    base_influence_strength + allocation_influence_bonus, cfg.MAX_CAMPAIGN_INFLUENCE_PER_ATTEMPT)
                 # Bonus Tema
                 theme_match_bonus = 0.0
-                elector_weights = e_prefs.get('weights', {})
-                if themes and elector_weights:
+                if themes:
                     for theme_item in themes:
-                        weight_for_theme = elector_weights.get(theme_item, 0)
-                        if weight_for_theme > config.ELECTOR_ATTRIBUTE_WEIGHT_RANGE[0]:
-                            max_weight_range = config.ELECTOR_ATTRIBUTE_WEIGHT_RANGE[1]
+                        theme_col = state.attribute_index.get(theme_item)
+                        weight_for_theme = state.weights[row,
+                                                         theme_col] if theme_col is not None else 0
+                        if weight_for_theme > cfg.ELECTOR_ATTRIBUTE_WEIGHT_RANGE[0]:
+                            max_weight_range = cfg.ELECTOR_ATTRIBUTE_WEIGHT_RANGE[1]
                             normalized_weight = weight_for_theme / \
-                                 max_weight_range if max_weight_range > 0 else 0.5
-                             theme_match_bonus += config.CAMPAIGN_THEME_BONUS_PER_ATTRIBUTE * \
-                                 normalized_weight * random.uniform(1.0, 1.2)
+                                max_weight_range if max_weight_range > 0 else 0.5
+                            theme_match_bonus += cfg.CAMPAIGN_THEME_BONUS_PER_ATTRIBUTE * \
+                                normalized_weight * random.uniform(1.0, 1.2)
                 total_influence += theme_match_bonus
                 # Bias Conferma
                 confirmation_modifier = 1.0
-                if "Confirmation Prone" in e_traits:
-                    current_leaning_conf = e_prefs.get(
-                        'leanings', {}).get(cand_name, 0)
-                    midpoint_leaning_conf = config.MAX_ELECTOR_LEANING_BASE / 2.0
-                    bias_strength = config.CONFIRMATION_BIAS_FACTOR
+                if state.has_trait_at(row, "Confirmation Prone"):
+                    current_leaning_conf = state.leanings[row, cand_col]
+                    midpoint_leaning_conf = cfg.MAX_ELECTOR_LEANING_BASE / 2.0
+                    bias_strength = cfg.CONFIRMATION_BIAS_FACTOR
                     if current_leaning_conf > midpoint_leaning_conf:
                         confirmation_modifier = bias_strength
                     elif current_leaning_conf < midpoint_leaning_conf * 0.8:
                         confirmation_modifier = 1.0 / bias_strength
                 adjusted_influence = total_influence * confirmation_modifier
                 # Applica Influenza
-                # Usa la funzione helper
-                apply_elector_impact(
-                    e_id, cand_name, adjusted_influence, elector_full_preferences_data)
+                apply_elector_impact_at(
+                    state, row, cand_col, adjusted_influence, sim_config=cfg)
                 # Apprendimento Agente
                 if adjusted_influence > 0.1:
-                    learning_rate_factor = config.ELECTOR_LEARNING_RATE * \
-                        config.CAMPAIGN_EXPOSURE_LEARNING_EFFECT
+                    learning_rate_factor = cfg.ELECTOR_LEARNING_RATE * \
+                        cfg.CAMPAIGN_EXPOSURE_LEARNING_EFFECT
                     learn_direction = 0.0
-                    elector_party_pref_learn = e_prefs.get(
-                        'party_preference', 'Independent')
+                    elector_party_pref_learn = state.party_ids[state.party_preference[row]]
                     candidate_party_learn = cand_data_ref.get(
                         'party_id', 'Unknown')
                     if elector_party_pref_learn != "Independent" and candidate_party_learn == elector_party_pref_learn:
@@ -685,12 +770,12 @@ def simulate_campaigning(candidates_info, electors, elector_full_preferences_dat
                     elif candidate_party_learn != elector_party_pref_learn or elector_party_pref_learn == "Independent":
                         learn_direction = random.uniform(-0.7, -0.2)
                     learning_adjustment_value = learning_rate_factor * learn_direction
-                    current_identity_weight_learn = e_prefs.get(
-                        'identity_weight', 0.5)
-                    new_identity_weight_learn = current_identity_weight_learn + learning_adjustment_value
-                    e_prefs['identity_weight'] = max(
+                    new_identity_weight_learn = state.identity_weight[row] + \
+                        learning_adjustment_value
+                    state.identity_weight[row] = max(
                         0.05, min(0.95, new_identity_weight_learn))
-                    e_prefs['policy_weight'] = 1.0 - e_prefs['identity_weight']
+                    state.policy_weight[row] = 1.0 - \
+                        state.identity_weight[row]
 
         # Fine ciclo elettori target
         # Aggiorna e salva budget candidato
@@ -704,8 +789,8 @@ def simulate_campaigning(candidates_info, electors, elector_full_preferences_dat
         if 'uuid' not in candidate_to_save:
             candidate_to_save['uuid'] = str(uuid.uuid4())
         if 'initial_budget' not in candidate_to_save:
-            candidate_to_save['initial_budget'] = config.INITIAL_CAMPAIGN_BUDGET
-        db_manager.save_candidate(candidate_to_save)
+            candidate_to_save['initial_budget'] = cfg.INITIAL_CAMPAIGN_BUDGET
+        db_writer.save_candidate(candidate_to_save)
         # Log
         themes_string = ", ".join([t.replace('_', ' ').title()
                                   for t in themes if t]) if themes else "N/A"
@@ -714,83 +799,73 @@ def simulate_campaigning(candidates_info, electors, elector_full_preferences_dat
     # Fine ciclo candidati
 
 
-def simulate_social_influence(network_graph, current_preferences):
-    """Simula influenza sociale con apprendimento agenti e debug interno."""
+def simulate_social_influence(network_graph, current_preferences, engine=None, sim_config=None):
+    """
+    Simula influenza sociale con apprendimento agenti (motore CSR, niente deepcopy).
+    Aggiorna l'ElectorState in-place e lo restituisce; `engine` può essere
+    riutilizzato tra i round per non ricostruire l'adiacenza.
+    """
+    cfg = config.resolve(sim_config)
     func_name = "simulate_social_influence"
-    if not config.USE_SOCIAL_NETWORK or network_graph is None:
+    if not cfg.USE_SOCIAL_NETWORK or network_graph is None:
         return current_preferences
-    alpha = config.SOCIAL_INFLUENCE_STRENGTH
-    iterations = config.SOCIAL_INFLUENCE_ITERATIONS
-    if not isinstance(current_preferences, dict) or not current_preferences or alpha <= 0:
+    alpha = cfg.SOCIAL_INFLUENCE_STRENGTH
+    iterations = cfg.SOCIAL_INFLUENCE_ITERATIONS
+    if not isinstance(current_preferences, ElectorState) or not current_preferences or alpha <= 0:
         return current_preferences
 
     utils.send_pygame_update(utils.UPDATE_TYPE_MESSAGE,
                              "\n--- Simulating Social Network Influence ---")
-    print(f"DEBUG {func_name}: Starting. Prefs type: {type(current_preferences)}, Num electors: {len(current_preferences)}")  # DEBUG
+    if log.debug:
+        log.write(f"DEBUG {func_name}: Starting. Num electors: {len(current_preferences)}")
 
-    next_prefs_social = None
     try:
-        all_candidate_names = set()
-        # ... (logica estrazione all_candidate_names come prima) ...
-        if not all_candidate_names:
+        if current_preferences.num_candidates == 0:
             utils.send_pygame_update(
                 utils.UPDATE_TYPE_WARNING, "Social influence skipped: No candidates.")
-            print(f"DEBUG {func_name}: Ret original (No cands)."); return current_preferences
-        try:  # Deepcopy
-            next_prefs_social = copy.deepcopy(current_preferences)
-            if not isinstance(next_prefs_social, dict):
-                 raise TypeError(
-                     f"deepcopy returned {type(next_prefs_social)}")
-        except Exception as e_copy:
-            print(f"ERROR {func_name}: deepcopy failed: {e_copy}"); utils.send_pygame_update(utils.UPDATE_TYPE_ERROR, f"SI deepcopy failed: {e_copy}"); print(f"DEBUG {func_name}: Ret original (deepcopy fail)."); return current_preferences
-        # Iterazioni
-        for iter_num in range(iterations):
-            if hasattr(utils, 'simulation_running_event') and not utils.simulation_running_event.is_set():
-                print(f"DEBUG {func_name}: Ret current (stop signal).")
-                return next_prefs_social if isinstance(next_prefs_social, dict) else current_preferences
-            current_iteration_prefs = copy.deepcopy(next_prefs_social)
-            # Ciclo Elettori
-            for elector_id_social, elector_data_social in current_iteration_prefs.items():
-                # ... (Controlli e calcolo media vicini come prima) ...
-                # Aggiorna leanings e pesi in next_prefs_social
-                if elector_id_social in next_prefs_social and isinstance(next_prefs_social[elector_id_social], dict):
-                    # ... (Logica aggiornamento leaning e apprendimento agente come prima) ...
-                    pass  # Placeholder per logica interna
-            # print(f"DEBUG {func_name}: Iteration {iter_num + 1}/{iterations} complete.")
+            return current_preferences
+        if engine is None:
+            engine = social_influence.SocialInfluenceEngine(
+                network_graph, current_preferences.elector_ids, sim_config=cfg)
 
+        def _still_running():
+            running_event = getattr(utils, 'simulation_running_event', None)
+            return running_event is None or running_event.is_set()
+
+        done = engine.run(current_preferences, iterations,
+                          should_continue=_still_running)
         utils.send_pygame_update(
-            utils.UPDATE_TYPE_MESSAGE, f"Social influence computed ({iterations} iter, strength={alpha:.2f}).")
-        # DEBUG
-        print(
-            f"DEBUG {func_name}: Finished successfully. Returning type: {type(next_prefs_social)}")
-        if not isinstance(next_prefs_social, dict):
-            print(
-                f"CRITICAL DEBUG {func_name}: Not dict before final return! Type: {type(next_prefs_social)}.")
-            return current_preferences  # Fallback
-        return next_prefs_social  # Ritorno Normale
+            utils.UPDATE_TYPE_MESSAGE, f"Social influence computed ({done} iter, strength={alpha:.2f}).")
+        return current_preferences  # Ritorno Normale
 
     except Exception as e_inner:  # Cattura errori interni
         tb_inner = traceback.format_exc()
         error_msg_inner = f"CRITICAL ERROR INSIDE {func_name}: {e_inner}\n{tb_inner}"
-        print(error_msg_inner); utils.send_pygame_update(
-            utils.UPDATE_TYPE_ERROR, error_msg_inner)
-        # DEBUG
-        print(f"DEBUG {func_name}: Returning None due to internal exception.")
+        if log.error:
+            log.write(error_msg_inner, simlog.ERROR)
+        utils.send_pygame_update(utils.UPDATE_TYPE_ERROR, error_msg_inner)
         return None  # Ritorno Esplicito None in caso di errore interno
 
 
 def verify_election(current_results, num_electors, required_majority_percentage):
-    """Verifica se un candidato è stato eletto."""
-    # ... (Codice completo come mostrato prima) ...
+    """
+    Verifica se un candidato è stato eletto.
+    Restituisce (nome eletto o None, voti necessari, voti del primo classificato).
+    """
     votes_needed = math.ceil(
-         num_electors * required_majority_percentage) if num_electors > 0 else 1
-     return None, votes_needed, 0  # Placeholder
+        num_electors * required_majority_percentage) if num_electors > 0 else 1
+    if not isinstance(current_results, Counter) or not current_results:
+        return None, votes_needed, 0
+    leader_name, leader_votes = current_results.most_common(1)[0]
+    if leader_votes >= votes_needed:
+        return leader_name, votes_needed, leader_votes
+    return None, votes_needed, leader_votes
 
 
 def count_votes(votes_list):
     """Conta i voti per ogni candidato da una lista, filtrando None."""
     # ... (Codice completo come mostrato prima) ...
     if not isinstance(votes_list, list):
-         return Counter()
-     valid_votes = [vote for vote in votes_list if vote is not None]
-     return Counter(valid_votes)
+        return Counter()
+    valid_votes = [vote for vote in votes_list if vote is not None]
+    return Counter(valid_votes)